@@ -5,7 +5,15 @@ by the tree of tangles uncrossing algorithm.
 """
 
 from .logic import TextTerm
-from .interpret_corner import interpret_feature, interpret_feature_array
+from .interpret_corner import (
+    interpret_feature,
+    interpret_feature_array,
+    approximate_feature_array,
+    FeatureInterpreter,
+    InterpretationBudget,
+)
+from .simplify import simplify_term
+from .compile_terms import CompiledTerms, compile_terms, evaluate_labels
 from .label_tot import (
     label_corners_using_logic_term,
     label_conditioned_corners_using_logic_term,
@@ -16,6 +24,13 @@ __all__ = [
     "TextTerm",
     "interpret_feature",
     "interpret_feature_array",
+    "approximate_feature_array",
+    "FeatureInterpreter",
+    "InterpretationBudget",
+    "simplify_term",
+    "CompiledTerms",
+    "compile_terms",
+    "evaluate_labels",
     "label_corners_using_logic_term",
     "label_conditioned_corners_using_logic_term",
     "label_locations_using_logic_term",
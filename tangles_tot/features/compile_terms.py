@@ -0,0 +1,242 @@
+from typing import Hashable, Union
+import numpy as np
+from tangles_tot._tangles_lib import MetaData
+from .logic import TextTerm, _TermNode, _CONSTANTS, _LEAF, _AND, _OR, _NOT
+
+MetaDataType = Union[str, TextTerm, MetaData]
+
+DEFAULT_ROW_CHUNK_SIZE = 1 << 20
+# multiple of 8
+DEFAULT_UNPACK_BLOCK_SIZE = 4096
+
+_TRUE = "true"
+_FALSE = "false"
+
+
+class CompiledTerms:
+    """
+    Logical terms of original features compiled into a program of bitwise operations.
+
+    The subterms shared by the terms, or repeated inside of a term, are evaluated once.
+    The rows are evaluated in chunks, packed into bits.
+
+    Note:
+        CompiledTerms are not intended to be built using the constructor but by using
+        compile_terms.
+    """
+
+    def __init__(
+        self,
+        instructions: list[tuple],
+        outputs: list[int],
+        used_features: np.ndarray,
+    ):
+        """
+        @private
+        """
+        self._instructions = instructions
+        self._outputs = outputs
+        self.used_features = used_features
+        # the registers are freed after their last use, unless they are outputs
+        last_use = {}
+        for idx, (operation, *operands) in enumerate(instructions):
+            if operation in [_AND, _OR, _NOT]:
+                for operand in operands:
+                    last_use[operand] = idx
+        output_set = set(outputs)
+        self._freed_after: list[list[int]] = [[] for _ in instructions]
+        for register, idx in last_use.items():
+            if register not in output_set:
+                self._freed_after[idx].append(register)
+
+    @property
+    def number_of_terms(self) -> int:
+        return len(self._outputs)
+
+    def evaluate(
+        self, rows: np.ndarray, chunk_size: int = DEFAULT_ROW_CHUNK_SIZE
+    ) -> np.ndarray:
+        """
+        Evaluates the terms on rows of original features.
+
+        Args:
+            rows: Array of shape (number of rows, number of original features) with values 1 and -1.
+            chunk_size: Number of rows evaluated at once.
+
+        Returns:
+            Array of shape (number of rows, number of terms) with values 1 and -1.
+        """
+        number_of_rows = rows.shape[0]
+        result = np.empty((number_of_rows, self.number_of_terms), dtype=np.int8)
+        for start in range(0, number_of_rows, chunk_size):
+            chunk = slice(start, min(start + chunk_size, number_of_rows))
+            chunk_rows = rows[chunk][:, self.used_features]
+            packed = np.packbits(chunk_rows.T == 1, axis=1)
+            bits = self._run(packed, chunk.stop - chunk.start, used_features_only=True)
+            _unpack_to_specifications(bits, result[chunk])
+        return result
+
+    def evaluate_packed(
+        self, packed_features: np.ndarray, number_of_rows: int
+    ) -> np.ndarray:
+        """
+        Evaluates the terms on bit-packed rows of original features.
+
+        Args:
+            packed_features: uint8 array of shape (number of original features, number of packed bytes)
+                containing the rows of every original feature packed by np.packbits.
+            number_of_rows: The number of rows.
+
+        Returns:
+            uint8 array of shape (number of terms, number of packed bytes) containing the
+            rows satisfying every term packed by np.packbits.
+        """
+        return self._run(packed_features, number_of_rows, used_features_only=False)
+
+    def _run(
+        self, packed: np.ndarray, number_of_rows: int, used_features_only: bool
+    ) -> np.ndarray:
+        ones = np.packbits(np.ones(number_of_rows, dtype=bool))
+        registers: list = [None] * len(self._instructions)
+        for idx, (operation, *operands) in enumerate(self._instructions):
+            if operation == _LEAF:
+                column = operands[0] if used_features_only else operands[1]
+                registers[idx] = packed[column]
+            elif operation == _TRUE:
+                registers[idx] = ones
+            elif operation == _FALSE:
+                registers[idx] = np.zeros_like(ones)
+            elif operation == _NOT:
+                registers[idx] = ~registers[operands[0]] & ones
+            elif operation == _AND:
+                registers[idx] = registers[operands[0]] & registers[operands[1]]
+            else:
+                registers[idx] = registers[operands[0]] | registers[operands[1]]
+            for register in self._freed_after[idx]:
+                registers[register] = None
+        if len(self._outputs) == 0:
+            return np.zeros((0, len(ones)), dtype=np.uint8)
+        return np.stack([registers[output] for output in self._outputs])
+
+
+def _unpack_to_specifications(
+    bits: np.ndarray, out: np.ndarray, block_size: int = DEFAULT_UNPACK_BLOCK_SIZE
+):
+    # the rows are unpacked in small blocks, such that the transposition of the bits
+    # of every term into the columns of out stays in the cache
+    number_of_rows = out.shape[0]
+    for start in range(0, number_of_rows, block_size):
+        stop = min(start + block_size, number_of_rows)
+        unpacked = np.unpackbits(
+            bits[:, start // 8 : (stop + 7) // 8], axis=1, count=stop - start
+        )
+        np.subtract(
+            np.left_shift(unpacked.T, 1), 1, out=out[start:stop], casting="unsafe"
+        )
+
+
+def compile_terms(terms: list[TextTerm], metadata: list[MetaDataType]) -> CompiledTerms:
+    """
+    Compiles logical terms of original features, for example the labels of a tree of tangles,
+    into one vectorized evaluator.
+
+    Args:
+        terms: The terms to compile.
+        metadata: List containing the labels of the original features, in the order of the
+            columns of the rows the terms are evaluated on.
+
+    Returns:
+        The compiled terms.
+
+    Raises:
+        ValueError: If a term contains a statement which is not the label of exactly one original feature.
+    """
+    columns: dict[int, int] = {}
+    ambiguous = set()
+    # the nodes of the labels are kept alive, such that their ids stay unique
+    label_nodes = []
+    for column, label in enumerate(metadata):
+        node = TextTerm(label)._node
+        label_nodes.append(node)
+        if id(node) in columns:
+            ambiguous.add(id(node))
+        columns.setdefault(id(node), column)
+
+    registers: dict[int, int] = {}
+    instructions: list[tuple] = []
+    used_features: list[int] = []
+    used_positions: dict[int, int] = {}
+    for term in terms:
+        if not isinstance(term, TextTerm):
+            raise ValueError(f"Cannot compile {term}, it is not a TextTerm.")
+        # post-order traversal with an explicit stack, every node is compiled once
+        stack = [term._node]
+        while stack:
+            node = stack[-1]
+            if id(node) in registers:
+                stack.pop()
+                continue
+            missing = [child for child in node.children if id(child) not in registers]
+            if len(missing) > 0:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            instructions.append(_compile_node(node, registers, columns, ambiguous))
+            if instructions[-1][0] == _LEAF:
+                column = instructions[-1][2]
+                if column not in used_positions:
+                    used_positions[column] = len(used_features)
+                    used_features.append(column)
+                instructions[-1] = (_LEAF, used_positions[column], column)
+            registers[id(node)] = len(instructions) - 1
+
+    return CompiledTerms(
+        instructions=instructions,
+        outputs=[registers[id(term._node)] for term in terms],
+        used_features=np.array(used_features, dtype=int),
+    )
+
+
+def _compile_node(
+    node: _TermNode,
+    registers: dict[int, int],
+    columns: dict[int, int],
+    ambiguous: set[int],
+) -> tuple:
+    if node is _CONSTANTS["true"]:
+        return (_TRUE,)
+    if node is _CONSTANTS["false"]:
+        return (_FALSE,)
+    if node.kind == _LEAF:
+        if id(node) not in columns or id(node) in ambiguous:
+            raise ValueError(
+                f"The statement {node.render()} is not the label of exactly one original feature."
+            )
+        return (_LEAF, None, columns[id(node)])
+    return (node.kind, *[registers[id(child)] for child in node.children])
+
+
+def evaluate_labels(
+    labels: dict[Hashable, TextTerm],
+    rows: np.ndarray,
+    metadata: list[MetaDataType],
+    chunk_size: int = DEFAULT_ROW_CHUNK_SIZE,
+) -> dict[Hashable, np.ndarray]:
+    """
+    Evaluates labels, like the ones of label_corners_using_logic_term, on new rows of the
+    original features. All of the labels are compiled together and evaluated in one pass.
+
+    Args:
+        labels: Dictionary of TextTerms.
+        rows: Array of shape (number of rows, number of original features) with values 1 and -1.
+        metadata: List containing the labels of the original features.
+        chunk_size: Number of rows evaluated at once.
+
+    Returns:
+        Dictionary containing, for every key of labels, an array with value 1 for the rows
+        satisfying the label and -1 otherwise.
+    """
+    keys = list(labels)
+    compiled = compile_terms([labels[key] for key in keys], metadata)
+    values = compiled.evaluate(rows, chunk_size=chunk_size)
+    return {key: values[:, idx] for idx, key in enumerate(keys)}
@@ -1,19 +1,57 @@
-from typing import Union, Optional
+import itertools
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Union, Optional
 import numpy as np
 from tangles_tot._tangles_lib import MetaData, FeatureSystem, SetSeparationSystem
 from tangles_tot._typing import Feature
 from tangles_tot.search import UncrossingFeatureSystem
-from .logic import TextTerm, _SemanticTextTerm
+from .logic import TextTerm, _SemanticTextTerm, _pack_columns, _popcount
+from .simplify import _simplify_term
 
 MetaDataType = Union[str, TextTerm, MetaData]
 FeatureArray = np.ndarray
 
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_COLUMN_CHUNK_SIZE = 1024
+DEFAULT_TASK_CHUNK_SIZE = 16
+
+
+@dataclass(frozen=True)
+class InterpretationBudget:
+    """
+    Limits of the search for the logical term interpreting a feature.
+
+    Once a limit is reached, the parts of the ground set which have not been described
+    yet are approximated by the statement reached so far or by false, whichever of the
+    two misclassifies fewer elements. The result is the best approximation found within
+    the budget, not an exact interpretation.
+
+    Attributes:
+        max_term_size: Optional maximal number of statements of original features in the term.
+        max_depth: Optional maximal number of nested statements the search follows.
+        timeout: Optional number of seconds after which the search stops refining the term.
+        error_tolerance: A part of the ground set is not refined further if it can be
+            approximated by misclassifying at most this many of its elements.
+    """
+
+    max_term_size: Optional[int] = None
+    max_depth: Optional[int] = None
+    timeout: Optional[float] = None
+    error_tolerance: int = 0
+
 
 def interpret_feature_array(
     feature: np.ndarray,
     original_features: np.ndarray,
     metadata: list[MetaDataType],
     under_condition: Optional[FeatureArray] = None,
+    simplify: bool = False,
 ) -> TextTerm:
     """Interpret a feature array by representing it as a logical term.
 
@@ -39,22 +77,206 @@ def interpret_feature_array(
         original_features: Array of features which are labeled for reference.
         metadata: List containing labels for each feature.
         under_condition: Optional feature. If provided condition the output statement on the under_condition feature being true.
+        simplify: If True, the term is simplified by simplify_term before it is returned.
 
     Returns:
         A TextTerm representing the reconstructed logical interpretation of the feature.
     """
-    if under_condition is None:
-        under_condition = np.ones(feature.shape[0], dtype=np.int8)
-    rec_log = _RecursionLogic(
-        original_features[under_condition == 1], metadata, feature[under_condition == 1]
+    term, _ = approximate_feature_array(
+        feature=feature,
+        original_features=original_features,
+        metadata=metadata,
+        under_condition=under_condition,
+        simplify=simplify,
+    )
+    return term
+
+
+def approximate_feature_array(
+    feature: np.ndarray,
+    original_features: np.ndarray,
+    metadata: list[MetaDataType],
+    under_condition: Optional[FeatureArray] = None,
+    budget: Optional[InterpretationBudget] = None,
+    simplify: bool = False,
+) -> tuple[TextTerm, int]:
+    """Interpret a feature array by a logical term within a budget.
+
+    Runs the same search as interpret_feature_array, but stops refining the term once
+    one of the limits of the budget is reached. If the feature can not be represented
+    exactly by the original features, the best approximation is returned as well.
+
+    Args:
+        feature: The feature to interpret.
+        original_features: Array of features which are labeled for reference.
+        metadata: List containing labels for each feature.
+        under_condition: Optional feature. If provided condition the output statement on the under_condition feature being true.
+        budget: Optional limits of the search. Without a budget the search runs until the
+            feature is represented as well as possible.
+        simplify: If True, the term is simplified by simplify_term before it is returned.
+
+    Returns:
+        A TextTerm approximating the feature and the number of elements (satisfying the
+        condition) which are misclassified by it.
+    """
+    return _interpret_feature_array(
+        feature=feature,
+        packed_features=_pack_columns(original_features),
+        text_terms=[TextTerm(label) for label in metadata],
+        under_condition=under_condition,
+        budget=budget,
+        simplify=simplify,
     )
-    starting_approximation = np.ones(feature.shape, dtype=np.int8)[under_condition == 1]
-    return _array_to_term_recursive(
-        sep=feature[under_condition == 1],
-        approximation=starting_approximation,
-        next_term=_SemanticTextTerm.true(len(starting_approximation)),
+
+
+def _interpret_feature_array(
+    feature: np.ndarray,
+    packed_features: np.ndarray,
+    text_terms: list[TextTerm],
+    under_condition: Optional[FeatureArray] = None,
+    budget: Optional[InterpretationBudget] = None,
+    simplify: bool = False,
+) -> tuple[TextTerm, int]:
+    sep, domain = _pack_feature(feature, under_condition)
+    return _interpret_packed_feature(
+        sep, domain, len(feature), packed_features, text_terms, budget, simplify
+    )
+
+
+def _pack_feature(
+    feature: np.ndarray, under_condition: Optional[FeatureArray]
+) -> tuple[np.ndarray, np.ndarray]:
+    # all arrays of the search are bit-packed. Instead of removing the elements
+    # outside of the condition, every comparison is restricted to the condition.
+    domain = (
+        _SemanticTextTerm.true(len(feature)).bits
+        if under_condition is None
+        else np.packbits(np.asarray(under_condition) == 1)
+    )
+    return np.packbits(np.asarray(feature) == 1) & domain, domain
+
+
+def _interpret_packed_feature(
+    sep: np.ndarray,
+    domain: np.ndarray,
+    length: int,
+    packed_features: np.ndarray,
+    text_terms: list[TextTerm],
+    budget: Optional[InterpretationBudget],
+    simplify: bool = False,
+) -> tuple[TextTerm, int]:
+    rec_log = _RecursionLogic(packed_features, text_terms, sep, domain, length)
+    term = _array_to_term(
+        sep=sep,
+        approximation=domain,
         rec_log=rec_log,
-    ).text
+        budget=budget or InterpretationBudget(),
+    )
+    errors = int(_popcount((term.bits ^ sep) & domain))
+    if simplify:
+        return (
+            _simplify_term(term.text, packed_features, text_terms, domain, length),
+            errors,
+        )
+    return term.text, errors
+
+
+def _interpret_packed_features(
+    packed: Iterable[tuple[np.ndarray, np.ndarray]],
+    number_of_features: int,
+    length: int,
+    packed_features: np.ndarray,
+    text_terms: list[TextTerm],
+    budget: Optional[InterpretationBudget],
+    simplify: bool,
+    n_jobs: Optional[int],
+) -> list[tuple[TextTerm, int]]:
+    """
+    Interprets the packed features, which are only packed when they are interpreted, such
+    that at most a bounded number of them is in memory at once.
+    """
+    if n_jobs is None or n_jobs <= 1 or number_of_features < 2:
+        return [
+            _interpret_packed_feature(
+                sep, domain, length, packed_features, text_terms, budget, simplify
+            )
+            for sep, domain in packed
+        ]
+    with _worker_pool(
+        packed_features, length, text_terms, budget, simplify, n_jobs
+    ) as executor:
+        return _interpret_in_pool(executor, packed, number_of_features, n_jobs)
+
+
+@contextmanager
+def _worker_pool(
+    packed_features: np.ndarray,
+    length: int,
+    text_terms: list[TextTerm],
+    budget: Optional[InterpretationBudget],
+    simplify: bool,
+    n_jobs: int,
+) -> Iterator[ProcessPoolExecutor]:
+    # the workers share the packed original features through a memory map instead
+    # of receiving a copy with every task
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "original_features.npy")
+        np.save(path, packed_features)
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_initialize_worker,
+            initargs=(path, length, text_terms, budget, simplify),
+        ) as executor:
+            yield executor
+
+
+def _interpret_in_pool(
+    executor: ProcessPoolExecutor,
+    packed: Iterable[tuple[np.ndarray, np.ndarray]],
+    number_of_features: int,
+    n_jobs: int,
+) -> list[tuple[TextTerm, int]]:
+    chunksize = max(1, min(DEFAULT_TASK_CHUNK_SIZE, number_of_features // (4 * n_jobs)))
+    # executor.map submits all of its items at once, so the items are handed to it in
+    # windows of a few chunks per process
+    window_size = 4 * n_jobs * chunksize
+    results = []
+    packed = iter(packed)
+    while True:
+        window = list(itertools.islice(packed, window_size))
+        if len(window) == 0:
+            return results
+        results.extend(executor.map(_interpret_in_worker, window, chunksize=chunksize))
+
+
+_worker_state: Optional[tuple] = None
+
+
+def _initialize_worker(
+    path: str,
+    length: int,
+    text_terms: list[TextTerm],
+    budget: Optional[InterpretationBudget],
+    simplify: bool,
+):
+    global _worker_state
+    _worker_state = (
+        length,
+        np.load(path, mmap_mode="r"),
+        text_terms,
+        budget,
+        simplify,
+    )
+
+
+def _interpret_in_worker(
+    packed_feature: tuple[np.ndarray, np.ndarray],
+) -> tuple[TextTerm, int]:
+    length, packed_features, text_terms, budget, simplify = _worker_state
+    sep, domain = packed_feature
+    return _interpret_packed_feature(
+        sep, domain, length, packed_features, text_terms, budget, simplify
+    )
 
 
 def interpret_feature(
@@ -85,91 +307,479 @@ def interpret_feature(
     Returns:
         A TextTerm representing the reconstructed logical interpretation of the feature.
     """
-    if isinstance(feat_sys, FeatureSystem):
-        feat_sys = UncrossingFeatureSystem.from_feature_system(feat_sys)
-    elif isinstance(feat_sys, SetSeparationSystem):
-        feat_sys = UncrossingFeatureSystem.from_set_separation_system(feat_sys)
-    if under_condition is None or len(under_condition) == 0:
-        under_condition_feature = None
-    else:
+    return FeatureInterpreter(feat_sys, cache_size=0).interpret(
+        feature, under_condition=under_condition
+    )
+
+
+class FeatureInterpreter:
+    """
+    Interprets features of a feature system as logical terms of its original features.
+
+    Wrapping the feature system, extracting the original features and their labels is
+    done once when the FeatureInterpreter is created, instead of once per interpreted
+    feature. The interpretations of the last cache_size pairs of feature and condition
+    are cached.
+
+    Use one FeatureInterpreter for all of the interpretations of a labeling run, the
+    feature system must not be changed while it is in use.
+    """
+
+    def __init__(
+        self,
+        feat_sys: Union[FeatureSystem, SetSeparationSystem, UncrossingFeatureSystem],
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        budget: Optional[InterpretationBudget] = None,
+        simplify: bool = False,
+    ):
+        """
+        Args:
+            feat_sys: The feature system containing information about all features.
+            cache_size: The maximal number of cached interpretations.
+            budget: Optional limits of the search for every interpretation, see
+                approximate_feature_array.
+            simplify: If True, every interpretation is simplified by simplify_term.
+        """
+        self.feat_sys = _as_uncrossing_feature_system(feat_sys)
+        # bit-packed original features are used as they are, without unpacking them
+        packed_features = self.feat_sys.get_packed_original_features()
+        self._number_of_elements = self.feat_sys.get_number_of_elements()
+        self._packed_features = (
+            packed_features
+            if packed_features is not None
+            else _pack_columns(self.feat_sys.get_original_features())
+        )
+        self._text_terms = [
+            TextTerm(label)
+            for label in self.feat_sys.get_metadata_of_original_features()
+        ]
+        self._cache_size = cache_size
+        self.budget = budget
+        self.simplify = simplify
+        self._cache: OrderedDict[tuple, TextTerm] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # the pool opened by worker_pool and its number of processes
+        self._pool: Optional[tuple[ProcessPoolExecutor, int]] = None
+
+    @contextmanager
+    def worker_pool(self, n_jobs: Optional[int]) -> Iterator[None]:
+        """
+        Keeps a pool of n_jobs processes sharing the original features open, which is used
+        by all calls of interpret_many and interpret_arrays in the with block, instead of
+        opening a pool in every call.
+
+        Args:
+            n_jobs: Optional number of processes, no pool is opened if it is at most 1.
+        """
+        if n_jobs is None or n_jobs <= 1 or self._pool is not None:
+            yield
+            return
+        with _worker_pool(
+            self._packed_features,
+            self._number_of_elements,
+            self._text_terms,
+            self.budget,
+            self.simplify,
+            n_jobs,
+        ) as executor:
+            self._pool = (executor, n_jobs)
+            try:
+                yield
+            finally:
+                self._pool = None
+
+    def interpret(
+        self, feature: Feature, under_condition: Optional[list[Feature]] = None
+    ) -> TextTerm:
+        """Interpret a feature of the feature system by representing it as a logical term.
+
+        See interpret_feature.
+
+        Args:
+            feature: The feature to interpret.
+            under_condition: Optional list of features. If provided condition the output statement on all of the feature being true.
+
+        Returns:
+            A TextTerm representing the reconstructed logical interpretation of the feature.
+        """
+        return self.interpret_many([feature], [under_condition])[0]
+
+    def interpret_many(
+        self,
+        features: list[Feature],
+        under_conditions: Optional[list[Optional[list[Feature]]]] = None,
+        n_jobs: Optional[int] = None,
+    ) -> list[TextTerm]:
+        """Interpret several features of the feature system.
+
+        The interpretations are independent of each other, the ones which are not cached
+        are computed in n_jobs processes. The result is the same as calling interpret for
+        every feature.
+
+        Args:
+            features: The features to interpret.
+            under_conditions: Optional list containing the condition of every feature.
+            n_jobs: Optional number of processes the features are interpreted in.
+
+        Returns:
+            The TextTerms interpreting the features, in the same order.
+        """
+        if under_conditions is None:
+            under_conditions = [None] * len(features)
+        keys = [
+            _cache_key(feature, under_condition)
+            for feature, under_condition in zip(features, under_conditions)
+        ]
+        terms: dict[tuple, TextTerm] = {}
+        missing: dict[tuple, int] = {}
+        for idx, key in enumerate(keys):
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                terms[key] = self._cache[key]
+            elif key not in missing:
+                self.misses += 1
+                missing[key] = idx
+        computed = self._interpret_packed(
+            (
+                _pack_feature(
+                    self.feat_sys.get_feature(features[idx]),
+                    self._condition_array(under_conditions[idx]),
+                )
+                for idx in missing.values()
+            ),
+            len(missing),
+            n_jobs=n_jobs,
+        )
+        for key, term in zip(missing, computed):
+            terms[key] = term
+            if self._cache_size > 0:
+                self._cache[key] = term
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return [terms[key] for key in keys]
+
+    def _condition_array(
+        self, under_condition: Optional[list[Feature]]
+    ) -> Optional[FeatureArray]:
+        if under_condition is None or len(under_condition) == 0:
+            return None
         condition_ids = []
         condition_spec = []
         for id, spec in under_condition:
             condition_ids.append(id)
             condition_spec.append(spec)
-        under_condition_feature = feat_sys.compute_infimum(
-            condition_ids, condition_spec
+        return self.feat_sys.compute_infimum(condition_ids, condition_spec)
+
+    def interpret_array(
+        self, feature: np.ndarray, under_condition: Optional[FeatureArray] = None
+    ) -> TextTerm:
+        """Interpret a feature array by representing it as a logical term of the original
+        features of the feature system. The result is not cached.
+
+        See interpret_feature_array.
+        """
+        term, _ = self.approximate_array(feature, under_condition=under_condition)
+        return term
+
+    def interpret_arrays(
+        self,
+        features: list[np.ndarray],
+        under_conditions: Optional[list[Optional[FeatureArray]]] = None,
+        n_jobs: Optional[int] = None,
+    ) -> list[TextTerm]:
+        """Interpret several feature arrays in n_jobs processes. The results are not cached.
+
+        See interpret_array.
+        """
+        if under_conditions is None:
+            under_conditions = [None] * len(features)
+        return self._interpret_packed(
+            (
+                _pack_feature(feature, under_condition)
+                for feature, under_condition in zip(features, under_conditions)
+            ),
+            len(features),
+            n_jobs=n_jobs,
+        )
+
+    def _interpret_packed(
+        self,
+        packed: Iterable[tuple[np.ndarray, np.ndarray]],
+        number_of_features: int,
+        n_jobs: Optional[int],
+    ) -> list[TextTerm]:
+        # the features are packed one at a time while they are interpreted
+        if self._pool is not None and n_jobs is not None and n_jobs > 1:
+            executor, pool_jobs = self._pool
+            results = _interpret_in_pool(
+                executor, packed, number_of_features, pool_jobs
+            )
+            return [term for term, _ in results]
+        results = _interpret_packed_features(
+            packed,
+            number_of_features,
+            self._number_of_elements,
+            self._packed_features,
+            self._text_terms,
+            self.budget,
+            self.simplify,
+            n_jobs,
+        )
+        return [term for term, _ in results]
+
+    def approximate_array(
+        self, feature: np.ndarray, under_condition: Optional[FeatureArray] = None
+    ) -> tuple[TextTerm, int]:
+        """Interpret a feature array by a logical term of the original features of the
+        feature system within the budget of the interpreter. The result is not cached.
+
+        See approximate_feature_array.
+        """
+        return _interpret_feature_array(
+            feature=feature,
+            packed_features=self._packed_features,
+            text_terms=self._text_terms,
+            under_condition=under_condition,
+            budget=self.budget,
+            simplify=self.simplify,
         )
-    return interpret_feature_array(
-        feature=feat_sys.get_feature(feature),
-        original_features=feat_sys.get_original_features(),
-        metadata=feat_sys.get_metadata_of_original_features(),
-        under_condition=under_condition_feature,
+
+
+def _cache_key(feature: Feature, under_condition: Optional[list[Feature]]) -> tuple:
+    return (
+        (int(feature[0]), int(feature[1])),
+        frozenset((int(id), int(spec)) for id, spec in under_condition or []),
     )
 
 
-def _array_to_term_recursive(
+def _as_uncrossing_feature_system(
+    feat_sys: Union[FeatureSystem, SetSeparationSystem, UncrossingFeatureSystem],
+) -> UncrossingFeatureSystem:
+    if isinstance(feat_sys, FeatureSystem):
+        return UncrossingFeatureSystem.from_feature_system(feat_sys)
+    if isinstance(feat_sys, SetSeparationSystem):
+        return UncrossingFeatureSystem.from_set_separation_system(feat_sys)
+    return feat_sys
+
+
+class _SearchNode:
+    """A node of the search of _array_to_term, which is expanded into two children."""
+
+    __slots__ = [
+        "sep",
+        "approximation",
+        "next_term",
+        "new_term",
+        "depth",
+        "counts",
+        "first_term",
+    ]
+
+    def __init__(
+        self,
+        sep: np.ndarray,
+        approximation: np.ndarray,
+        next_term: _SemanticTextTerm,
+        new_term: _SemanticTextTerm,
+        depth: int,
+        counts: "_ContingencyCounts",
+    ):
+        self.sep = sep
+        self.approximation = approximation
+        self.next_term = next_term
+        self.new_term = new_term
+        self.depth = depth
+        self.counts = counts
+        self.first_term: Optional[_SemanticTextTerm] = None
+
+
+def _array_to_term(
     sep: np.ndarray,
     approximation: np.ndarray,
-    next_term: _SemanticTextTerm,
     rec_log: "_RecursionLogic",
+    budget: InterpretationBudget,
 ) -> _SemanticTextTerm:
-    next_sep = np.minimum(sep, next_term.array)
-    next_approx = np.minimum(approximation, next_term.array)
+    # depth first search using an explicit stack. A node restricts the approximation
+    # by its term and is expanded into the term chosen by find_best_term_extension and
+    # its negation, until the restricted feature is described by the term of the node.
+    deadline = None if budget.timeout is None else time.monotonic() + budget.timeout
+    stack: list[_SearchNode] = []
+    next_term = _SemanticTextTerm.true(rec_log.length)
+    depth = 0
+    counts = None
+    # the contingency counts of the last finished first child, the counts of its
+    # sibling follow by subtraction
+    first_counts = None
 
-    if np.all(next_approx == next_sep):
-        return next_term
-    if np.all(next_sep == -1):
-        return _SemanticTextTerm.false(sep.shape[0])
+    while True:
+        # descend into the node (sep, approximation, next_term)
+        next_sep = sep & next_term.bits
+        next_approx = approximation & next_term.bits
+        result = None
+        if np.array_equal(next_approx, next_sep):
+            result = next_term
+        elif not np.any(next_sep):
+            result = _SemanticTextTerm.false(next_term.length)
+        else:
+            if counts is None:
+                counts = rec_log.contingency_counts(sep=next_sep, term=next_approx)
+            new_term = rec_log.find_best_term_extension(counts)
+            # errors of approximating the node by its term or by false
+            leaf_errors = min(counts.size_ab, counts.size_cd)
+            splits = np.any(next_approx & new_term.bits) and np.any(
+                next_approx & ~new_term.bits
+            )
+            if (
+                leaf_errors <= budget.error_tolerance
+                or not splits
+                or (budget.max_depth is not None and depth >= budget.max_depth)
+                or (deadline is not None and time.monotonic() >= deadline)
+            ):
+                result = rec_log.leaf_term(next_term, counts)
+            else:
+                stack.append(
+                    _SearchNode(sep, approximation, next_term, new_term, depth, counts)
+                )
+                sep, approximation = next_sep, next_approx
+                next_term, depth, counts = new_term, depth + 1, None
+                first_counts = None
+                continue
+        finished_counts = counts
 
-    new_term = rec_log.find_best_term_extension(sep=next_sep, term=next_approx)
+        # ascend while the finished node is the second child of its parent
+        while True:
+            if len(stack) == 0:
+                return result
+            parent = stack[-1]
+            if parent.first_term is None:
+                parent.first_term = result
+                first_counts = finished_counts
+                break
+            stack.pop()
+            result = rec_log.and_term(
+                parent.next_term,
+                rec_log.or_term(parent.first_term, result, parent.next_term),
+                parent.approximation,
+            )
+            if budget.max_term_size is not None and result.size > budget.max_term_size:
+                result = rec_log.leaf_term(parent.next_term, parent.counts)
+            finished_counts = parent.counts
 
-    first_term = _array_to_term_recursive(
-        sep=next_sep,
-        approximation=next_approx,
-        next_term=new_term,
-        rec_log=rec_log,
-    )
-    second_term = _array_to_term_recursive(
-        sep=next_sep,
-        approximation=next_approx,
-        next_term=new_term.not_(),
-        rec_log=rec_log,
-    )
-    or_term = rec_log.or_term(first_term, second_term, next_term)
-    and_term = rec_log.and_term(next_term, or_term, approximation)
-    return and_term
+        # descend into the second child of the parent
+        sep = parent.sep & parent.next_term.bits
+        approximation = parent.approximation & parent.next_term.bits
+        next_term = parent.new_term.not_()
+        depth = parent.depth + 1
+        counts = None if first_counts is None else parent.counts - first_counts
+
+
+class _ContingencyCounts:
+    """
+    The number of elements of the two masks of a recursion node, the elements of the
+    approximation outside of the feature (ab) and inside of the feature (cd), together
+    with the number of positive entries of every original feature inside of the masks.
+
+    The masks of the children of a node partition the masks of the node, the counts of
+    one child are the counts of the node minus the counts of the other child.
+    """
+
+    def __init__(
+        self,
+        size_ab: int,
+        size_cd: int,
+        positive_ab: np.ndarray,
+        positive_cd: np.ndarray,
+    ):
+        self.size_ab = size_ab
+        self.size_cd = size_cd
+        self.positive_ab = positive_ab
+        self.positive_cd = positive_cd
+
+    def __sub__(self, other: "_ContingencyCounts") -> "_ContingencyCounts":
+        return _ContingencyCounts(
+            size_ab=self.size_ab - other.size_ab,
+            size_cd=self.size_cd - other.size_cd,
+            positive_ab=self.positive_ab - other.positive_ab,
+            positive_cd=self.positive_cd - other.positive_cd,
+        )
 
 
 class _RecursionLogic:
     def __init__(
-        self, features: np.ndarray, feature_labels: list[str], og_sep: np.ndarray
+        self,
+        packed_features: np.ndarray,
+        text_terms: list[TextTerm],
+        og_sep: np.ndarray,
+        domain: np.ndarray,
+        length: int,
+        column_chunk_size: int = DEFAULT_COLUMN_CHUNK_SIZE,
     ):
-        self._features = features
+        self._packed_features = packed_features
+        self._text_terms = text_terms
         self._og_sep = og_sep
-        self._terms = [
-            _SemanticTextTerm(TextTerm(feature_labels[i]), features[:, i])
-            for i in range(features.shape[1])
-        ]
+        self._domain = domain
+        self.length = length
+        self._column_chunk_size = column_chunk_size
 
-    def find_best_term_extension(
-        self, sep: np.ndarray, term: np.ndarray
+    def _term(self, idx: int) -> _SemanticTextTerm:
+        return _SemanticTextTerm(
+            self._text_terms[idx], self._packed_features[idx], self.length
+        )
+
+    def leaf_term(
+        self, text_term: _SemanticTextTerm, counts: "_ContingencyCounts"
     ) -> _SemanticTextTerm:
-        mask_ab = np.minimum(term, -sep) == 1
-        mask_cd = np.minimum(term, sep) == 1
-        a_ar = np.sum(self._features[mask_ab] == 1, axis=0)
-        b_ar = np.sum(-self._features[mask_ab] == 1, axis=0)
-        c_ar = np.sum(self._features[mask_cd] == 1, axis=0)
-        d_ar = np.sum(-self._features[mask_cd] == 1, axis=0)
+        """The term approximating a node whose expansion was stopped early."""
+        if counts.size_ab <= counts.size_cd:
+            return text_term
+        return _SemanticTextTerm.false(self.length)
+
+    def _count_positive(self, mask: np.ndarray) -> np.ndarray:
+        """Counts the positive entries of every original feature inside of the mask."""
+        # the masks shrink down the recursion, only the words containing elements of
+        # the mask are read once they make up less than half of the ground set
+        words = np.flatnonzero(mask)
+        if 2 * len(words) < len(mask):
+            mask = mask[words]
+        else:
+            words = slice(None)
+        number_of_features = self._packed_features.shape[0]
+        counts = np.empty(number_of_features, dtype=np.int64)
+        for start in range(0, number_of_features, self._column_chunk_size):
+            chunk = slice(
+                start, min(start + self._column_chunk_size, number_of_features)
+            )
+            counts[chunk] = _popcount(self._packed_features[chunk, words] & mask)
+        return counts
+
+    def contingency_counts(
+        self, sep: np.ndarray, term: np.ndarray
+    ) -> _ContingencyCounts:
+        mask_ab = term & ~sep
+        mask_cd = term & sep
+        return _ContingencyCounts(
+            size_ab=int(_popcount(mask_ab)),
+            size_cd=int(_popcount(mask_cd)),
+            positive_ab=self._count_positive(mask_ab),
+            positive_cd=self._count_positive(mask_cd),
+        )
+
+    def find_best_term_extension(self, counts: _ContingencyCounts) -> _SemanticTextTerm:
+        a_ar = counts.positive_ab
+        b_ar = counts.size_ab - counts.positive_ab
+        c_ar = counts.positive_cd
+        d_ar = counts.size_cd - counts.positive_cd
 
         nested_bias = np.maximum(a_ar * (c_ar == 0), b_ar * (d_ar == 0))
         if np.any(nested_bias) > 0:
-            return self._terms[np.argmax(nested_bias)]
-        scores_1 = np.zeros(self._features.shape[1], dtype=np.float64)
+            return self._term(np.argmax(nested_bias))
+        scores_1 = np.zeros(len(a_ar), dtype=np.float64)
         scores_1[c_ar != 0] = a_ar[c_ar != 0] / c_ar[c_ar != 0]
-        scores_2 = np.zeros(self._features.shape[1], dtype=np.float64)
+        scores_2 = np.zeros(len(b_ar), dtype=np.float64)
         scores_2[d_ar != 0] = b_ar[d_ar != 0] / d_ar[d_ar != 0]
-        return self._terms[np.argmax(np.maximum(scores_1, scores_2))]
+        return self._term(np.argmax(np.maximum(scores_1, scores_2)))
 
     def or_term(
         self,
@@ -177,17 +787,14 @@ class _RecursionLogic:
         second_term: _SemanticTextTerm,
         text_term: _SemanticTextTerm,
     ) -> _SemanticTextTerm:
-        if np.all(
-            np.minimum(first_term.array, text_term.array)
-            <= np.minimum(second_term.array, text_term.array)
-        ):
+        restriction = text_term.bits & self._domain
+        if not np.any(first_term.bits & ~second_term.bits & restriction):
             return second_term
-        if np.all(
-            np.minimum(second_term.array, text_term.array)
-            <= np.minimum(first_term.array, text_term.array)
-        ):
+        if not np.any(second_term.bits & ~first_term.bits & restriction):
             return first_term
-        if second_term.array.sum() <= first_term.array.sum():
+        if _popcount(second_term.bits & self._domain) <= _popcount(
+            first_term.bits & self._domain
+        ):
             return first_term.or_(second_term)
         return second_term.or_(first_term)
 
@@ -197,6 +804,6 @@ class _RecursionLogic:
         or_term: _SemanticTextTerm,
         approximation: np.ndarray,
     ) -> _SemanticTextTerm:
-        if np.all(np.minimum(or_term.array, approximation) <= self._og_sep):
+        if not np.any(or_term.bits & approximation & ~self._og_sep):
             return or_term
         return text_term.and_(or_term)
@@ -1,33 +1,35 @@
-from typing import Union
-import numpy as np
+from typing import Optional, Union
 from tangles_tot._tangles_lib import FeatureSystem
 from tangles_tot.search import UncrossingFeatureSystem
 from tangles_tot.tree import TreeOfTangles, FeatureLabels, LocationLabels
-from .interpret_corner import interpret_feature, interpret_feature_array
+from .interpret_corner import FeatureInterpreter
+
+DEFAULT_LOCATION_BATCH_SIZE = 256
 
 
 def label_corners_using_logic_term(
     tree_of_tangles: TreeOfTangles,
     feat_sys: Union[FeatureSystem, UncrossingFeatureSystem],
+    n_jobs: Optional[int] = None,
 ) -> FeatureLabels:
-    feature_labels = {}
+    interpreter = FeatureInterpreter(feat_sys)
 
+    all_features = []
     for feature_id in tree_of_tangles.feature_ids():
-        feature_labels[(feature_id, 1)] = interpret_feature(
-            feature=(feature_id, 1), feat_sys=feat_sys
-        )
-        feature_labels[(feature_id, -1)] = interpret_feature(
-            feature=(feature_id, -1), feat_sys=feat_sys
-        )
+        all_features.extend([(feature_id, 1), (feature_id, -1)])
 
-    return feature_labels
+    return dict(
+        zip(all_features, interpreter.interpret_many(all_features, n_jobs=n_jobs))
+    )
 
 
 def label_conditioned_corners_using_logic_term(
     tree_of_tangles: TreeOfTangles,
     feat_sys: Union[FeatureSystem, UncrossingFeatureSystem],
+    n_jobs: Optional[int] = None,
 ) -> FeatureLabels:
-    feature_labels = {}
+    interpreter = FeatureInterpreter(feat_sys)
+    all_conditions = []
 
     all_features = [(feature_id, 1) for feature_id in tree_of_tangles.feature_ids()] + [
         (feature_id, -1) for feature_id in tree_of_tangles.feature_ids()
@@ -43,31 +45,42 @@ def label_conditioned_corners_using_logic_term(
         assert (
             len(conditions) == len(location.features) - 1
         ), "critical error in conditioned feature labeling method"
-        feature_labels[(feature_id, spec)] = interpret_feature(
-            feature=(feature_id, spec),
-            feat_sys=feat_sys,
-            under_condition=conditions,
-        )
+        all_conditions.append(conditions)
 
-    return feature_labels
+    return dict(
+        zip(
+            all_features,
+            interpreter.interpret_many(all_features, all_conditions, n_jobs=n_jobs),
+        )
+    )
 
 
 def label_locations_using_logic_term(
     tree_of_tangles: TreeOfTangles,
     feat_sys: Union[FeatureSystem, UncrossingFeatureSystem],
+    n_jobs: Optional[int] = None,
+    batch_size: int = DEFAULT_LOCATION_BATCH_SIZE,
 ) -> LocationLabels:
-    if isinstance(feat_sys, FeatureSystem):
-        feat_sys = UncrossingFeatureSystem.from_feature_system(feat_sys)
-    location_labels = {}
-
-    for location in tree_of_tangles.locations():
-        ids = np.array([id for id, _ in location.features], dtype=int)
-        specs = np.array([spec for _, spec in location.features], dtype=np.int8)
-        location_array = feat_sys.compute_infimum(ids, specs)
-        location_labels[location.node_idx] = interpret_feature_array(
-            feature=location_array,
-            original_features=feat_sys.get_original_features(),
-            metadata=feat_sys.get_metadata_of_original_features(),
-        )
+    interpreter = FeatureInterpreter(feat_sys)
+    locations = list(tree_of_tangles.locations())
 
-    return location_labels
+    # the arrays of the locations are computed and interpreted batch by batch, so only
+    # the arrays of one batch are in memory at once, all batches share one worker pool
+    labels = {}
+    with interpreter.worker_pool(n_jobs):
+        for batch_start in range(0, len(locations), batch_size):
+            batch = locations[batch_start : batch_start + batch_size]
+            location_arrays = interpreter.feat_sys.compute_infima(
+                [[id for id, _ in location.features] for location in batch],
+                [[spec for _, spec in location.features] for location in batch],
+            )
+            labels.update(
+                zip(
+                    [location.node_idx for location in batch],
+                    interpreter.interpret_arrays(
+                        [location_arrays[:, idx] for idx in range(len(batch))],
+                        n_jobs=n_jobs,
+                    ),
+                )
+            )
+    return labels
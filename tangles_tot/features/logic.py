@@ -1,11 +1,139 @@
-from typing import Optional
+from typing import Optional, Union
 import warnings
+import weakref
 import numpy as np
 from tangles_tot._tangles_lib import MetaData
 
+_LEAF = "leaf"
+_AND = "and"
+_OR = "or"
+_NOT = "not"
+
+
+class _TermNode:
+    """
+    An immutable node of the expression tree of a TextTerm.
+
+    Nodes are hash-consed: two nodes with the same kind, text and children are the same
+    object, which is why the children can be compared by identity.
+    """
+
+    __slots__ = [
+        "kind",
+        "text",
+        "outer_operation",
+        "children",
+        "_rendered",
+        "__weakref__",
+    ]
+
+    _instances: "weakref.WeakValueDictionary[tuple, _TermNode]" = (
+        weakref.WeakValueDictionary()
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        text: Optional[str],
+        outer_operation: str,
+        children: tuple["_TermNode", ...],
+    ):
+        self.kind = kind
+        self.text = text
+        self.outer_operation = outer_operation
+        self.children = children
+        self._rendered: Optional[str] = None
+
+    @staticmethod
+    def get(
+        kind: str,
+        text: Optional[str] = None,
+        outer_operation: str = "",
+        children: tuple["_TermNode", ...] = (),
+    ) -> "_TermNode":
+        key = (kind, text, outer_operation, tuple(id(child) for child in children))
+        node = _TermNode._instances.get(key)
+        if node is None:
+            node = _TermNode(kind, text, outer_operation, children)
+            _TermNode._instances[key] = node
+        return node
+
+    def render(self) -> str:
+        if self._rendered is None:
+            self._rendered = _render(self)
+        return self._rendered
+
+
+def _render(node: _TermNode) -> str:
+    # renders iteratively into a list of pieces, such that a term of size k is rendered
+    # in time linear in the length of its text, independently of its depth
+    pieces = []
+    stack: list[Union[str, _TermNode]] = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        elif item._rendered is not None:
+            pieces.append(item._rendered)
+        elif item.kind == _LEAF:
+            pieces.append(item.text)
+        elif item.kind == _NOT:
+            child = item.children[0]
+            if child.outer_operation == "":
+                stack.extend([child, "¬"])
+            else:
+                stack.extend([")", child, "¬("])
+        else:
+            operation = " ∧ " if item.kind == _AND else " ∨ "
+            other_operation = _OR if item.kind == _AND else _AND
+            left, right = item.children
+            for child in [right, operation, left]:
+                if isinstance(child, str):
+                    stack.append(child)
+                elif child.outer_operation == other_operation:
+                    stack.extend([")", child, "("])
+                else:
+                    stack.append(child)
+    return "".join(pieces)
+
+
+# the nodes of the constants are kept alive
+_CONSTANTS = {value: _TermNode.get(_LEAF, value) for value in ["true", "false"]}
+
+
+def _serialize(node: _TermNode) -> list[tuple]:
+    # the nodes in post-order, the children are given by their positions
+    positions: dict[int, int] = {}
+    nodes = []
+    stack = [node]
+    while stack:
+        current = stack[-1]
+        if id(current) in positions:
+            stack.pop()
+            continue
+        missing = [child for child in current.children if id(child) not in positions]
+        if len(missing) > 0:
+            stack.extend(missing)
+            continue
+        stack.pop()
+        positions[id(current)] = len(nodes)
+        nodes.append(
+            (
+                current.kind,
+                current.text,
+                current.outer_operation,
+                tuple(positions[id(child)] for child in current.children),
+            )
+        )
+    return nodes
+
 
 class TextTerm:
-    """Class representing a text-based logical term with operations."""
+    """Class representing a text-based logical term with operations.
+
+    The term is stored as an immutable expression tree whose equal subterms are shared.
+    The text of the term is rendered when it is first needed.
+    """
 
     def __init__(self, text: str, _outer_operation: Optional[str] = None):
         """Initialize a TextTerm instance.
@@ -13,8 +141,25 @@ class TextTerm:
         Args:
             text: The text content of the term.
         """
-        self._text = text
-        self._outer_operation = "" if not _outer_operation else _outer_operation
+        outer_operation = "" if not _outer_operation else _outer_operation
+        self._node = _TermNode.get(_LEAF, text, outer_operation)
+
+    @staticmethod
+    def _from_node(node: _TermNode) -> "TextTerm":
+        term = TextTerm.__new__(TextTerm)
+        term._node = node
+        return term
+
+    @property
+    def _text(self) -> str:
+        return self._node.render()
+
+    @property
+    def _outer_operation(self) -> str:
+        return self._node.outer_operation
+
+    def _is_constant(self, value: str) -> bool:
+        return self._node is _CONSTANTS[value]
 
     @staticmethod
     def build_from(source) -> "TextTerm":
@@ -59,27 +204,18 @@ class TextTerm:
         Returns:
             A new TextTerm representing the AND combination.
         """
-        if self._text == "true":
+        if self._is_constant("true"):
             return other_term
-        if other_term._text == "true":
+        if other_term._is_constant("true"):
             return self
 
-        if self._text == "false":
+        if self._is_constant("false"):
             return self
-        if other_term._text == "false":
+        if other_term._is_constant("false"):
             return other_term
 
-        first_term_text = (
-            self._text if self._outer_operation != "or" else f"({self._text})"
-        )
-        second_term_text = (
-            other_term._text
-            if other_term._outer_operation != "or"
-            else f"({other_term._text})"
-        )
-        return TextTerm(
-            text=f"{first_term_text} ∧ {second_term_text}",
-            _outer_operation="and",
+        return TextTerm._from_node(
+            _TermNode.get(_AND, None, _AND, (self._node, other_term._node))
         )
 
     def or_(self, other_term: "TextTerm") -> "TextTerm":
@@ -91,27 +227,18 @@ class TextTerm:
         Returns:
             A new TextTerm representing the OR combination.
         """
-        if self._text == "false":
+        if self._is_constant("false"):
             return other_term
-        if other_term._text == "false":
+        if other_term._is_constant("false"):
             return self
 
-        if self._text == "true":
+        if self._is_constant("true"):
             return self
-        if other_term._text == "true":
+        if other_term._is_constant("true"):
             return other_term
 
-        first_term_text = (
-            self._text if self._outer_operation != "and" else f"({self._text})"
-        )
-        second_term_text = (
-            other_term._text
-            if other_term._outer_operation != "and"
-            else f"({other_term._text})"
-        )
-        return TextTerm(
-            text=f"{first_term_text} ∨ {second_term_text}",
-            _outer_operation="or",
+        return TextTerm._from_node(
+            _TermNode.get(_OR, None, _OR, (self._node, other_term._node))
         )
 
     def not_(self) -> "TextTerm":
@@ -120,22 +247,45 @@ class TextTerm:
         Returns:
             A new TextTerm representing the negation.
         """
-        if self._text == "true":
-            return "false"
-        if self._text == "false":
-            return "true"
-        if self._text[0] == "¬":
-            new_text = self._text[1:]
-            if new_text[0] == "(" and new_text[-1] == ")":
-                new_text = new_text[1:-1]
-            return TextTerm(new_text, _outer_operation=self._outer_operation)
-        if self._outer_operation == "":
-            return TextTerm(f"¬{self._text}")
-        return TextTerm(f"¬({self._text})", _outer_operation=self._outer_operation)
+        if self._is_constant("true"):
+            return TextTerm.false()
+        if self._is_constant("false"):
+            return TextTerm.true()
+        if self._node.kind == _NOT:
+            return TextTerm._from_node(self._node.children[0])
+        # like its text, the negation of a combined term keeps the outer operation
+        return TextTerm._from_node(
+            _TermNode.get(_NOT, None, self._node.outer_operation, (self._node,))
+        )
 
     def __repr__(self) -> str:
         """Return string representation of the term."""
-        return self._text
+        return self._node.render()
+
+    def __eq__(self, other: object) -> bool:
+        """Two terms are equal if they have the same expression tree."""
+        if not isinstance(other, TextTerm):
+            return NotImplemented
+        return self._node is other._node
+
+    def __hash__(self) -> int:
+        return id(self._node)
+
+    def __reduce__(self):
+        # the expression tree is pickled as a flat list of nodes, such that the nodes
+        # are shared again after unpickling and deep terms do not hit the recursion limit
+        return TextTerm._from_nodes, (_serialize(self._node),)
+
+    @staticmethod
+    def _from_nodes(nodes: list[tuple]) -> "TextTerm":
+        built: list[_TermNode] = []
+        for kind, text, outer_operation, children in nodes:
+            built.append(
+                _TermNode.get(
+                    kind, text, outer_operation, tuple(built[idx] for idx in children)
+                )
+            )
+        return TextTerm._from_node(built[-1])
 
     @staticmethod
     def true() -> "TextTerm":
@@ -157,31 +307,99 @@ class TextTerm:
 
 
 class _SemanticTextTerm:
-    def __init__(self, text: TextTerm, array: np.ndarray):
+    """
+    A text term together with the elements of the ground set it is true on, stored as
+    bits packed into a uint8 array by np.packbits. The padding bits are always zero.
+    The size of the term is the number of statements of original features it contains.
+    """
+
+    def __init__(self, text: TextTerm, bits: np.ndarray, length: int, size: int = 1):
         self.text = text
-        self.array = array
+        self.bits = bits
+        self.length = length
+        self.size = size
 
     def and_(self, other_term: "_SemanticTextTerm") -> "_SemanticTextTerm":
         return _SemanticTextTerm(
             text=self.text.and_(other_term.text),
-            array=np.minimum(self.array, other_term.array),
+            bits=self.bits & other_term.bits,
+            length=self.length,
+            size=self.size + other_term.size,
         )
 
     def or_(self, other_term: "_SemanticTextTerm") -> "_SemanticTextTerm":
         return _SemanticTextTerm(
             text=self.text.or_(other_term.text),
-            array=np.maximum(self.array, other_term.array),
+            bits=self.bits | other_term.bits,
+            length=self.length,
+            size=self.size + other_term.size,
         )
 
     def not_(self) -> "_SemanticTextTerm":
-        return _SemanticTextTerm(text=self.text.not_(), array=-self.array)
+        return _SemanticTextTerm(
+            text=self.text.not_(),
+            bits=~self.bits & _packed_ones(self.length),
+            length=self.length,
+            size=self.size,
+        )
 
     @staticmethod
     def true(n: int) -> "_SemanticTextTerm":
-        return _SemanticTextTerm(text=TextTerm.true(), array=np.ones(n, dtype=np.int8))
+        return _SemanticTextTerm(
+            text=TextTerm.true(), bits=_packed_ones(n), length=n, size=0
+        )
 
     @staticmethod
     def false(n: int) -> "_SemanticTextTerm":
         return _SemanticTextTerm(
-            text=TextTerm.false(), array=-np.ones(n, dtype=np.int8)
+            text=TextTerm.false(),
+            bits=np.zeros(_packed_size(n), dtype=np.uint8),
+            length=n,
+            size=0,
         )
+
+
+_POPCOUNT_TABLE = np.array(
+    [bin(byte).count("1") for byte in range(256)], dtype=np.uint8
+)
+
+
+def _packed_size(n: int) -> int:
+    return (n + 7) // 8
+
+
+def _packed_ones(n: int) -> np.ndarray:
+    return np.packbits(np.ones(n, dtype=bool))
+
+
+def _popcount(bits: np.ndarray, axis: int = -1) -> np.ndarray:
+    """Counts the set bits of a packed array along an axis."""
+    if hasattr(np, "bitwise_count"):
+        return np.sum(np.bitwise_count(bits), axis=axis, dtype=np.int64)
+    return np.sum(_POPCOUNT_TABLE[bits], axis=axis, dtype=np.int64)
+
+
+def _pack_columns(
+    features: np.ndarray, chunk_size: int = 1024, row_chunk_size: int = 1 << 16
+) -> np.ndarray:
+    """
+    Packs the positive entries of every column of a ±1 feature array into bits.
+
+    The array is read in chunks of rows, such that memory-mapped features are streamed.
+
+    Returns:
+        uint8 array of shape (number of features, number of packed bytes).
+    """
+    number_of_elements, number_of_features = features.shape
+    packed = np.empty(
+        (number_of_features, _packed_size(number_of_elements)), dtype=np.uint8
+    )
+    # a multiple of 8, such that every chunk of rows fills whole bytes
+    row_chunk_size = max(8, row_chunk_size - row_chunk_size % 8)
+    for row_start in range(0, number_of_elements, row_chunk_size):
+        rows = features[row_start : row_start + row_chunk_size]
+        words = slice(row_start // 8, _packed_size(row_start + len(rows)))
+        for start in range(0, number_of_features, chunk_size):
+            chunk = slice(start, min(start + chunk_size, number_of_features))
+            packed[chunk, words] = np.packbits(rows[:, chunk].T == 1, axis=1)
+    return packed
@@ -0,0 +1,217 @@
+from typing import Optional
+import numpy as np
+from .logic import (
+    TextTerm,
+    _TermNode,
+    _pack_columns,
+    _packed_ones,
+    _LEAF,
+    _AND,
+    _OR,
+    _NOT,
+    _CONSTANTS,
+)
+
+
+def simplify_term(
+    term: TextTerm,
+    original_features: np.ndarray,
+    metadata: list,
+    under_condition: Optional[np.ndarray] = None,
+) -> TextTerm:
+    """Simplify a logical term of original features without changing the set it represents.
+
+    The simplification removes repeated subterms (A ∧ A = A), absorbed subterms
+    (A ∧ (A ∨ B) = A) and every subterm of a conjunction or disjunction which does not
+    change the set of elements of the ground set represented by it. Subterms which
+    represent the whole ground set or no element are replaced by true and false.
+
+    Args:
+        term: The term to simplify, for example the output of interpret_feature_array.
+        original_features: Array of features which are labeled for reference.
+        metadata: List containing labels for each feature.
+        under_condition: Optional feature. If provided, the represented sets are only compared on the
+            elements on which the under_condition feature is true.
+
+    Returns:
+        A TextTerm representing the same set of elements as the term.
+    """
+    length = original_features.shape[0]
+    domain = (
+        _packed_ones(length)
+        if under_condition is None
+        else np.packbits(np.asarray(under_condition) == 1)
+    )
+    return _simplify_term(
+        term,
+        _pack_columns(original_features),
+        [TextTerm(label) for label in metadata],
+        domain,
+        length,
+    )
+
+
+def _simplify_term(
+    term: TextTerm,
+    packed_features: np.ndarray,
+    text_terms: list[TextTerm],
+    domain: np.ndarray,
+    length: int,
+) -> TextTerm:
+    # the bits of a leaf are only known if its label belongs to exactly one feature
+    leaf_columns: dict[int, Optional[int]] = {}
+    for idx, text_term in enumerate(text_terms):
+        node_id = id(text_term._node)
+        leaf_columns[node_id] = None if node_id in leaf_columns else idx
+    ones = _packed_ones(length)
+    evaluator = _TermEvaluator(packed_features, leaf_columns, ones, domain)
+
+    # post-order traversal of the expression tree with an explicit stack, every shared
+    # subterm is simplified once
+    simplified: dict[int, _TermNode] = {}
+    stack = [(term._node, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if id(node) in simplified:
+            continue
+        if not children_done and len(node.children) > 0:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children)
+            continue
+        children = [simplified[id(child)] for child in node.children]
+        if node.kind == _LEAF:
+            result = node
+        elif node.kind == _NOT:
+            result = TextTerm._from_node(children[0]).not_()._node
+        else:
+            result = _simplify_operation(node.kind, children, evaluator)
+        bits = evaluator.bits(result)
+        if bits is not None and result.kind != _LEAF:
+            if not np.any(~bits & domain):
+                result = _CONSTANTS["true"]
+            elif not np.any(bits & domain):
+                result = _CONSTANTS["false"]
+        simplified[id(node)] = result
+    return TextTerm._from_node(simplified[id(term._node)])
+
+
+def _simplify_operation(
+    kind: str, children: list[_TermNode], evaluator: "_TermEvaluator"
+) -> _TermNode:
+    absorbing = _CONSTANTS["false"] if kind == _AND else _CONSTANTS["true"]
+    neutral = _CONSTANTS["true"] if kind == _AND else _CONSTANTS["false"]
+    dual = _OR if kind == _AND else _AND
+
+    # idempotence
+    operands = []
+    seen = set()
+    for operand in _flatten(kind, children):
+        if operand is absorbing:
+            return absorbing
+        if operand is neutral or id(operand) in seen:
+            continue
+        seen.add(id(operand))
+        operands.append(operand)
+
+    # absorption, A ∧ (A ∨ B) = A and A ∨ (A ∧ B) = A
+    operands = [
+        operand
+        for operand in operands
+        if operand.kind != dual
+        or not any(id(inner) in seen for inner in _flatten(dual, operand.children))
+    ]
+
+    # operands which do not change the represented set
+    operand_bits = [evaluator.bits(operand) for operand in operands]
+    if len(operands) > 1 and all(bits is not None for bits in operand_bits):
+        combine = np.bitwise_and if kind == _AND else np.bitwise_or
+        identity = evaluator.ones if kind == _AND else np.zeros_like(evaluator.ones)
+        suffixes = [identity]
+        for bits in reversed(operand_bits):
+            suffixes.append(combine(bits, suffixes[-1]))
+        suffixes.reverse()
+        prefix = identity
+        kept = []
+        for idx, (operand, bits) in enumerate(zip(operands, operand_bits)):
+            without = combine(prefix, suffixes[idx + 1])
+            if not np.any((without ^ suffixes[0]) & evaluator.domain):
+                continue
+            kept.append(operand)
+            prefix = combine(prefix, bits)
+        operands = kept
+
+    if len(operands) == 0:
+        return neutral
+    result = TextTerm._from_node(operands[0])
+    for operand in operands[1:]:
+        other = TextTerm._from_node(operand)
+        result = result.and_(other) if kind == _AND else result.or_(other)
+    return result._node
+
+
+def _flatten(kind: str, nodes: list[_TermNode]) -> list[_TermNode]:
+    """The operands of nested operations of the same kind, from left to right."""
+    operands = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        if node.kind == kind:
+            stack.extend(reversed(node.children))
+        else:
+            operands.append(node)
+    return operands
+
+
+class _TermEvaluator:
+    """Computes the packed bits of the elements represented by the nodes of terms."""
+
+    def __init__(
+        self,
+        packed_features: np.ndarray,
+        leaf_columns: dict[int, Optional[int]],
+        ones: np.ndarray,
+        domain: np.ndarray,
+    ):
+        self._packed_features = packed_features
+        self._leaf_columns = leaf_columns
+        self.ones = ones
+        self.domain = domain
+        self._bits: dict[int, Optional[np.ndarray]] = {
+            id(_CONSTANTS["true"]): ones,
+            id(_CONSTANTS["false"]): np.zeros(len(ones), dtype=np.uint8),
+        }
+        # the evaluated nodes are kept alive, such that their ids stay unique
+        self._nodes: list[_TermNode] = []
+
+    def bits(self, node: _TermNode) -> Optional[np.ndarray]:
+        if id(node) in self._bits:
+            return self._bits[id(node)]
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if id(current) in self._bits:
+                stack.pop()
+                continue
+            missing = [
+                child for child in current.children if id(child) not in self._bits
+            ]
+            if len(missing) > 0:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            self._nodes.append(current)
+            self._bits[id(current)] = self._evaluate(current)
+        return self._bits[id(node)]
+
+    def _evaluate(self, node: _TermNode) -> Optional[np.ndarray]:
+        if node.kind == _LEAF:
+            column = self._leaf_columns.get(id(node))
+            return None if column is None else self._packed_features[column]
+        children = [self._bits[id(child)] for child in node.children]
+        if any(bits is None for bits in children):
+            return None
+        if node.kind == _NOT:
+            return ~children[0] & self.ones
+        if node.kind == _AND:
+            return children[0] & children[1]
+        return children[0] | children[1]
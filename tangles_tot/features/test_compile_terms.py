@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+from tangles_tot._testing import generate_random_features
+from .logic import TextTerm, _pack_columns
+from .interpret_corner import FeatureInterpreter
+from .compile_terms import compile_terms, evaluate_labels
+from tangles_tot.search import UncrossingFeatureSystem
+
+rows = np.array([[1, 1], [1, -1], [-1, 1], [-1, -1]], dtype=np.int8)
+metadata = ["a", "b"]
+a = TextTerm("a")
+b = TextTerm("b")
+
+
+def test_compile_terms_evaluate():
+    compiled = compile_terms(
+        [a.and_(b), a.or_(b.not_()), TextTerm.true(), TextTerm.false(), b], metadata
+    )
+    assert compiled.number_of_terms == 5
+    assert np.array_equal(
+        compiled.evaluate(rows, chunk_size=3),
+        np.array(
+            [
+                [1, 1, 1, -1, 1],
+                [-1, 1, 1, -1, -1],
+                [-1, -1, 1, -1, 1],
+                [-1, 1, 1, -1, -1],
+            ]
+        ),
+    )
+
+
+def test_compile_terms_shares_subterms():
+    a_and_b = a.and_(b)
+    compiled = compile_terms([a_and_b.or_(a_and_b.not_()), a_and_b], metadata)
+    # a, b, a ∧ b, ¬(a ∧ b) and the disjunction
+    assert len(compiled._instructions) == 5
+
+
+def test_compile_terms_evaluate_packed():
+    compiled = compile_terms([a.and_(b.not_())], metadata)
+    packed = compiled.evaluate_packed(_pack_columns(rows), len(rows))
+    assert np.array_equal(np.unpackbits(packed[0], count=4), [0, 1, 0, 0])
+
+
+def test_compile_terms_unknown_label():
+    with pytest.raises(ValueError):
+        compile_terms([a.and_(TextTerm("c"))], metadata)
+    with pytest.raises(ValueError):
+        compile_terms([a], ["a", "a"])
+
+
+def test_evaluate_interpreted_labels():
+    features = generate_random_features(5, 300)
+    feature_metadata = [str(i) for i in range(5)]
+    feat_sys = UncrossingFeatureSystem.with_array(features, metadata=feature_metadata)
+    interpreter = FeatureInterpreter(feat_sys)
+    corners = {
+        "and": np.minimum(features[:, 0], -features[:, 1]),
+        "or": np.maximum(np.minimum(features[:, 2], features[:, 3]), features[:, 4]),
+    }
+    labels = {
+        key: interpreter.interpret_array(corner) for key, corner in corners.items()
+    }
+    values = evaluate_labels(labels, features, feature_metadata, chunk_size=100)
+    for key, corner in corners.items():
+        assert np.array_equal(values[key], corner)
@@ -6,7 +6,15 @@ from tangles_tot._testing import (
 )
 from tangles_tot._tangles_lib import FeatureSystem
 from tangles_tot.search import UncrossingFeatureSystem
-from .interpret_corner import interpret_feature_array, interpret_feature
+from .interpret_corner import (
+    interpret_feature_array,
+    interpret_feature,
+    FeatureInterpreter,
+    InterpretationBudget,
+    approximate_feature_array,
+    _RecursionLogic,
+)
+from .logic import TextTerm, _pack_columns
 
 
 def test_interpret_feature_array_finds_input():
@@ -131,3 +139,173 @@ def test_interpret_feature_under_weird_conditions(FeatSys):
         str(interpret_feature((0, 1), feat_sys, under_condition=[(0, 1), (1, 1)]))
         == "true"
     )
+
+
+@pytest.mark.parametrize("FeatSys", feature_systems)
+def test_feature_interpreter_same_as_interpret_feature(FeatSys):
+    num_features = 10
+    feature_length = 100
+    number_of_corners = 100
+    features = generate_random_features(num_features, feature_length)
+    metadata = ["a", "b"] + [str(i) for i in range(2, num_features)]
+    feat_sys = FeatSys.with_array(features, metadata=metadata)
+    add_random_corners_to_feat_sys(feat_sys, number_of_corners)
+    interpreter = FeatureInterpreter(feat_sys)
+    for feature_id in range(len(feat_sys)):
+        for spec in [1, -1]:
+            assert str(interpreter.interpret((feature_id, spec))) == str(
+                interpret_feature((feature_id, spec), feat_sys)
+            )
+            assert str(
+                interpreter.interpret((feature_id, spec), under_condition=[(0, 1)])
+            ) == str(
+                interpret_feature(
+                    (feature_id, spec), feat_sys, under_condition=[(0, 1)]
+                )
+            )
+
+
+def test_feature_interpreter_caches_interpretations():
+    num_features = 10
+    feature_length = 100
+    features = generate_random_features(num_features, feature_length)
+    metadata = [str(i) for i in range(num_features)]
+    feat_sys = UncrossingFeatureSystem.with_array(features, metadata=metadata)
+    interpreter = FeatureInterpreter(feat_sys, cache_size=2)
+    first = interpreter.interpret((0, 1), under_condition=[(1, 1), (2, -1)])
+    assert interpreter.interpret((0, 1), under_condition=[(2, -1), (1, 1)]) is first
+    assert (interpreter.hits, interpreter.misses) == (1, 1)
+    interpreter.interpret((1, 1))
+    interpreter.interpret((2, 1))
+    interpreter.interpret((0, 1), under_condition=[(1, 1), (2, -1)])
+    assert (interpreter.hits, interpreter.misses) == (1, 4)
+
+
+def test_contingency_counts_of_children_by_subtraction():
+    features = generate_random_features(20, 1000)
+    packed = _pack_columns(features)
+    sep = packed[0] | packed[1]
+    domain = packed[2]
+    rec_log = _RecursionLogic(
+        packed, [TextTerm(str(i)) for i in range(20)], sep & domain, domain, 1000
+    )
+    counts = rec_log.contingency_counts(sep=sep & domain, term=domain)
+    first_counts = rec_log.contingency_counts(
+        sep=sep & domain & packed[3], term=domain & packed[3]
+    )
+    second_counts = rec_log.contingency_counts(
+        sep=sep & domain & ~packed[3], term=domain & ~packed[3]
+    )
+    difference = counts - first_counts
+    assert difference.size_ab == second_counts.size_ab
+    assert difference.size_cd == second_counts.size_cd
+    assert np.array_equal(difference.positive_ab, second_counts.positive_ab)
+    assert np.array_equal(difference.positive_cd, second_counts.positive_cd)
+
+
+def test_approximate_feature_array_exact_without_budget():
+    features = generate_random_features(10, 100)
+    metadata = [str(i) for i in range(10)]
+    a_and_b = np.minimum(features[:, 0], features[:, 1])
+    term, errors = approximate_feature_array(a_and_b, features, metadata)
+    assert str(term) in ["0 ∧ 1", "1 ∧ 0"]
+    assert errors == 0
+
+
+def test_approximate_feature_array_not_representable():
+    features = np.array([[1], [1], [-1], [-1]], dtype=np.int8)
+    feature = np.array([1, -1, -1, -1], dtype=np.int8)
+    term, errors = approximate_feature_array(feature, features, ["a"])
+    assert errors == 1
+    assert str(term) in ["a", "false"]
+
+
+@pytest.mark.parametrize(
+    "budget",
+    [
+        InterpretationBudget(max_depth=2),
+        InterpretationBudget(max_term_size=3),
+        InterpretationBudget(timeout=0),
+        InterpretationBudget(error_tolerance=30),
+    ],
+)
+def test_approximate_feature_array_within_budget(budget):
+    features = generate_random_features(6, 1000)
+    metadata = [str(i) for i in range(6)]
+    feature = np.prod(features, axis=1, dtype=np.int8)
+    term, errors = approximate_feature_array(feature, features, metadata, budget=budget)
+    exact_term, _ = approximate_feature_array(feature, features, metadata)
+    term_size = sum(str(term).count(str(i)) for i in range(6))
+    if budget.max_term_size is not None:
+        assert term_size <= budget.max_term_size
+    assert errors > 0
+    assert term_size < sum(str(exact_term).count(str(i)) for i in range(6))
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_feature_interpreter_interpret_many(n_jobs):
+    num_features = 10
+    feature_length = 100
+    number_of_corners = 50
+    features = generate_random_features(num_features, feature_length)
+    metadata = ["a", "b"] + [str(i) for i in range(2, num_features)]
+    feat_sys = UncrossingFeatureSystem.with_array(features, metadata=metadata)
+    add_random_corners_to_feat_sys(feat_sys, number_of_corners)
+    all_features = [(feature_id, 1) for feature_id in range(len(feat_sys))]
+    conditions = [
+        [(0, 1)] if feature_id % 2 else None for feature_id, _ in all_features
+    ]
+    interpreter = FeatureInterpreter(feat_sys)
+    terms = interpreter.interpret_many(all_features, conditions, n_jobs=n_jobs)
+    assert [str(term) for term in terms] == [
+        str(interpret_feature(feature, feat_sys, under_condition=condition))
+        for feature, condition in zip(all_features, conditions)
+    ]
+    assert interpreter.misses == len(all_features)
+    interpreter.interpret_many(all_features, conditions, n_jobs=n_jobs)
+    assert interpreter.hits == len(all_features)
+
+
+def test_feature_interpreter_worker_pool():
+    features = generate_random_features(10, 100)
+    feat_sys = UncrossingFeatureSystem.with_array(features)
+    add_random_corners_to_feat_sys(feat_sys, 20)
+    arrays = [
+        feat_sys.get_feature((feature_id, 1)) for feature_id in range(len(feat_sys))
+    ]
+    interpreter = FeatureInterpreter(feat_sys)
+    expected = [str(term) for term in interpreter.interpret_arrays(arrays)]
+    with interpreter.worker_pool(2):
+        pool = interpreter._pool
+        for start in range(0, len(arrays), 7):
+            terms = interpreter.interpret_arrays(arrays[start : start + 7], n_jobs=2)
+            assert [str(term) for term in terms] == expected[start : start + 7]
+            assert interpreter._pool is pool
+    assert interpreter._pool is None
+
+
+def test_feature_interpreter_with_packed_memmap(tmp_path):
+    num_features = 10
+    feature_length = 100
+    features = generate_random_features(num_features, feature_length)
+    # the first rows make the features distinct and not complements of each other
+    features[:num_features] = 2 * np.eye(num_features, dtype=int) - 1
+    metadata = [str(i) for i in range(num_features)]
+    feat_sys = UncrossingFeatureSystem.with_array(features, metadata=metadata)
+    assert len(feat_sys) == num_features
+    np.save(tmp_path / "packed.npy", np.packbits(features.T == 1, axis=1))
+    packed_feat_sys = UncrossingFeatureSystem.with_memmap(
+        str(tmp_path / "packed.npy"),
+        metadata,
+        packed=True,
+        number_of_elements=feature_length,
+    )
+    for system in [feat_sys, packed_feat_sys]:
+        for corner in [(0, 1, 1, -1), (2, -1, 10, 1), (3, 1, 11, -1)]:
+            system.add_corner(*corner)
+    interpreter = FeatureInterpreter(feat_sys)
+    packed_interpreter = FeatureInterpreter(packed_feat_sys)
+    for feature_id in range(len(feat_sys)):
+        assert str(packed_interpreter.interpret((feature_id, 1))) == str(
+            interpreter.interpret((feature_id, 1))
+        )
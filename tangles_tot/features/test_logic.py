@@ -1,4 +1,6 @@
-from .logic import TextTerm
+import pickle
+import numpy as np
+from .logic import TextTerm, _SemanticTextTerm, _pack_columns, _popcount
 
 
 def test_text_term_constants():
@@ -80,3 +82,60 @@ def test_text_term_from_metadata():
     assert str(TextTerm.build_from(MetaData("test"))) == "test"
     assert str(TextTerm.build_from(MetaData("test", orientation=1))) == "test"
     assert str(TextTerm.build_from(MetaData("test", orientation=-1))) == "¬test"
+
+
+def test_text_term_equality():
+    a = TextTerm("a")
+    b = TextTerm("b")
+    assert a.and_(b) == TextTerm("a").and_(TextTerm("b"))
+    assert hash(a.or_(b)) == hash(TextTerm("a").or_(TextTerm("b")))
+    assert a.and_(b) != b.and_(a)
+    assert a.and_(b) != a.or_(b)
+    assert a.not_().not_() == a
+    assert len({a.and_(b), TextTerm("a").and_(TextTerm("b")), a}) == 2
+
+
+def test_text_term_not_of_negated_compound_term():
+    a = TextTerm("a")
+    b = TextTerm("b")
+    c = TextTerm("c")
+    not_a_or_b = a.or_(b).not_().or_(c)
+    assert str(not_a_or_b) == "¬(a ∨ b) ∨ c"
+    assert str(not_a_or_b.not_()) == "¬(¬(a ∨ b) ∨ c)"
+    assert str(a.not_().and_(b).not_()) == "¬(¬a ∧ b)"
+
+
+def test_text_term_deep_term():
+    term = TextTerm("x")
+    for i in range(10000):
+        term = term.and_(TextTerm(str(i)).or_(TextTerm("y")))
+    text = str(term)
+    assert text.startswith("x ∧ (0 ∨ y) ∧ (1 ∨ y)")
+    assert text.endswith("(9999 ∨ y)")
+
+
+def test_text_term_pickle():
+    a = TextTerm("a")
+    b = TextTerm("b")
+    term = a.and_(b).or_(a.and_(b).not_()).and_(TextTerm.true())
+    unpickled = pickle.loads(pickle.dumps(term))
+    assert unpickled == term
+    assert str(unpickled) == str(term)
+    assert pickle.loads(pickle.dumps(TextTerm.false())).or_(a) == a
+
+
+def test_semantic_text_term_bit_operations():
+    features = np.array([[1, -1], [1, 1], [-1, 1], [-1, -1], [1, -1]], dtype=np.int8)
+    packed = _pack_columns(features)
+    a = _SemanticTextTerm(TextTerm("a"), packed[0], 5)
+    b = _SemanticTextTerm(TextTerm("b"), packed[1], 5)
+    assert list(_popcount(packed)) == [3, 2]
+    assert _popcount(a.and_(b).bits) == 1
+    assert _popcount(a.or_(b).bits) == 4
+    assert _popcount(a.not_().bits) == 2
+    assert np.array_equal(a.not_().not_().bits, a.bits)
+    assert np.array_equal(
+        np.unpackbits(a.or_(b).not_().bits, count=5), np.array([0, 0, 0, 1, 0])
+    )
+    assert _popcount(_SemanticTextTerm.true(5).bits) == 5
+    assert _popcount(_SemanticTextTerm.false(5).bits) == 0
@@ -0,0 +1,51 @@
+import numpy as np
+from tangles_tot._testing import generate_random_features
+from .logic import TextTerm
+from .interpret_corner import approximate_feature_array
+from .simplify import simplify_term
+
+features = np.array([[1, 1], [1, -1], [-1, 1], [-1, -1]], dtype=np.int8)
+metadata = ["a", "b"]
+a = TextTerm("a")
+b = TextTerm("b")
+
+
+def test_simplify_term_idempotence():
+    assert str(simplify_term(a.and_(a), features, metadata)) == "a"
+    assert str(simplify_term(a.or_(b).or_(a), features, metadata)) == "a ∨ b"
+
+
+def test_simplify_term_absorption():
+    assert str(simplify_term(a.and_(a.or_(b)), features, metadata)) == "a"
+    assert str(simplify_term(b.and_(a).or_(a), features, metadata)) == "a"
+
+
+def test_simplify_term_evaluation():
+    assert str(simplify_term(a.or_(a.not_()), features, metadata)) == "true"
+    assert str(simplify_term(b.and_(a.and_(a.not_())), features, metadata)) == "false"
+    assert (
+        str(
+            simplify_term(a.and_(b), features, metadata, under_condition=features[:, 1])
+        )
+        == "a"
+    )
+
+
+def test_simplify_term_keeps_unknown_labels():
+    c = TextTerm("c")
+    assert str(simplify_term(c.and_(c.or_(b)), features, metadata)) == "c"
+    assert str(simplify_term(c.or_(c.not_()), features, metadata)) == "c ∨ ¬c"
+
+
+def test_interpretation_simplified():
+    original_features = generate_random_features(6, 200)
+    feature_metadata = [str(i) for i in range(6)]
+    feature = np.prod(original_features[:, :3], axis=1, dtype=np.int8)
+    term, errors = approximate_feature_array(
+        feature, original_features, feature_metadata
+    )
+    simplified, simplified_errors = approximate_feature_array(
+        feature, original_features, feature_metadata, simplify=True
+    )
+    assert errors == simplified_errors
+    assert len(str(simplified)) <= len(str(term))
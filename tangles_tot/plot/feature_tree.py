@@ -2,6 +2,7 @@ from typing import Union, Optional, Any
 import networkx as nx
 from tangles_tot.tree import (
     FeatureTree,
+    CompactFeatureTree,
     TreeOfTangles,
     FeatureSpecification,
     FeatureLabels,
@@ -11,7 +12,7 @@ from .networkx_plot import feature_tree_to_nx
 
 
 def plot_feature_tree(
-    feature_tree: FeatureTree,
+    feature_tree: Union[FeatureTree, CompactFeatureTree],
     feature_labels: Optional[FeatureLabels] = None,
     location_labels: Optional[LocationLabels] = None,
     feature_specification: Optional[FeatureSpecification] = None,
@@ -57,7 +58,7 @@ def plot_feature_tree(
 
 
 def plot_tree_of_tangles(
-    tree: Union[TreeOfTangles, FeatureTree],
+    tree: Union[TreeOfTangles, FeatureTree, CompactFeatureTree],
     feature_labels: Optional[FeatureLabels] = None,
     location_labels: Optional[LocationLabels] = None,
     feature_specification: Optional[FeatureSpecification] = None,
@@ -74,10 +75,12 @@ def plot_tree_of_tangles(
         feature_tree = tree.feature_tree
         feature_labels = feature_labels or tree.label_features_by_id()
         location_labels = location_labels or tree.label_locations_by_idx()
-    elif isinstance(tree, FeatureTree):
+    elif isinstance(tree, (FeatureTree, CompactFeatureTree)):
         feature_tree = tree
     else:
-        raise ValueError(f"tree {tree} must be of type TreeOfTangles or FeatureTree")
+        raise ValueError(
+            f"tree {tree} must be of type TreeOfTangles, FeatureTree or CompactFeatureTree"
+        )
     plot_feature_tree(
         feature_tree,
         feature_labels=feature_labels,
@@ -2,6 +2,7 @@ from typing import Union, Optional
 import networkx as nx
 from tangles_tot.tree import (
     FeatureTree,
+    CompactFeatureTree,
     LocationLabels,
     FeatureLabels,
     FeatureSpecification,
@@ -11,7 +12,7 @@ NXTree = Union[nx.Graph, nx.DiGraph]
 
 
 def feature_tree_to_nx(
-    feature_tree: FeatureTree,
+    feature_tree: Union[FeatureTree, CompactFeatureTree],
     location_labels: Optional[LocationLabels] = None,
     feature_labels: Optional[FeatureLabels] = None,
     feature_specification: Optional[FeatureSpecification] = None,
@@ -1,5 +1,5 @@
 from tangles_tot._testing.feature_trees import three_star
-from tangles_tot.tree import TreeOfTangles
+from tangles_tot.tree import TreeOfTangles, CompactFeatureTree
 from .feature_tree import plot_tree_of_tangles
 
 
@@ -20,3 +20,7 @@ def test_plot_tree_of_tangles_with_invalid_input():
 
 def test_plot_tree_of_tangles_with_tree_of_tangles():
     plot_tree_of_tangles(TreeOfTangles(three_star()))
+
+
+def test_plot_tree_of_tangles_with_compact_feature_tree():
+    plot_tree_of_tangles(CompactFeatureTree.from_feature_tree(three_star()))
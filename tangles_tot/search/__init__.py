@@ -3,7 +3,10 @@ Package containing functionality for searching for trees of tangles.
 """
 
 from .uncrossing_feature_system import UncrossingFeatureSystem
+from .uncross import uncross_distinguishers, UncrossingReport
 
 __all__ = [
     "UncrossingFeatureSystem",
+    "uncross_distinguishers",
+    "UncrossingReport",
 ]
@@ -0,0 +1,115 @@
+import numpy as np
+from tangles_tot._tangles_lib import TangleSweep
+from tangles_tot.tree import build_tree_of_tangles_from_sweep
+from .uncrossing_feature_system import UncrossingFeatureSystem
+from .uncross import uncross_distinguishers, find_crossing_pairs
+
+
+class MockSearchTree:
+    def __init__(self, sep_ids: list[int]):
+        self.sep_ids = sep_ids
+        self.first_sep_ids = list(sep_ids)
+
+    def get_efficient_distinguishers(self, agreement: int):
+        # the first corner replaces the last distinguisher once it has been inserted
+        corners = [
+            sep_id for sep_id in self.sep_ids if sep_id not in self.first_sep_ids
+        ]
+        return None, np.array(
+            self.first_sep_ids[:1] + (corners[:1] or [self.first_sep_ids[-1]])
+        )
+
+
+class MockSweep:
+    def __init__(self, sep_ids: list[int]):
+        self.tree = MockSearchTree(sep_ids)
+        self.swept_below = []
+
+    def sweep_below(self, agreement: int):
+        self.swept_below.append(agreement)
+
+    def insert_separation(self, level: int, sep_id: int, agreement: int):
+        self.tree.sep_ids.insert(level, sep_id)
+
+
+def crossing_features() -> np.ndarray:
+    return np.array(
+        [
+            [1, 1, 1],
+            [1, -1, 1],
+            [-1, 1, 1],
+            [-1, -1, -1],
+        ]
+    )
+
+
+def assert_uncrossed(
+    feat_sys: UncrossingFeatureSystem,
+    distinguishers: np.ndarray,
+    crossing_pair: tuple[int, int],
+    corner_ids: list[int],
+):
+    assert len(corner_ids) > 0
+    assert np.all(feat_sys.is_nested_matrix(distinguishers))
+    assert np.all(
+        feat_sys.is_nested_matrix(corner_ids, list(crossing_pair) + list(corner_ids))
+    )
+    assert not feat_sys.is_nested_matrix([crossing_pair[0]], [crossing_pair[1]])[0, 0]
+    infima = [
+        feat_sys.compute_infimum(np.array(crossing_pair), np.array([s, t]))
+        for s in [1, -1]
+        for t in [1, -1]
+    ]
+    for corner_id in corner_ids:
+        corner = feat_sys.get_feature((corner_id, 1))
+        assert any(
+            np.array_equal(corner, infimum) or np.array_equal(-corner, infimum)
+            for infimum in infima
+        )
+
+
+def test_find_crossing_pairs():
+    feat_sys = UncrossingFeatureSystem.with_array(crossing_features())
+    crossing_pairs = find_crossing_pairs(feat_sys, np.array([2, 0, 1]), block_size=1)
+    assert crossing_pairs.tolist() == [[0, 1]]
+    assert find_crossing_pairs(feat_sys, np.array([0, 2])).shape == (0, 2)
+
+
+def test_uncross_distinguishers():
+    feat_sys = UncrossingFeatureSystem.with_array(crossing_features())
+    sweep = MockSweep([0, 2, 1])
+    report = uncross_distinguishers(sweep, feat_sys, agreement=3)
+    assert report.number_of_rounds == 1
+    assert report.number_of_crossing_pairs == 0
+    assert report.number_of_corners == len(sweep.tree.sep_ids) - 3
+    assert report.number_of_corners > 0
+    # the corners are inserted before the later feature of the crossing pair
+    assert sweep.tree.sep_ids[:2] == [0, 2]
+    assert sweep.tree.sep_ids[-1] == 1
+    assert sweep.swept_below == [3, 3]
+    _, distinguishers = sweep.tree.get_efficient_distinguishers(agreement=3)
+    assert_uncrossed(feat_sys, distinguishers, (0, 1), sweep.tree.sep_ids[2:-1])
+    assert set(report.seconds) == {"sweep", "crossing_detection", "corner_insertion"}
+
+
+def test_tree_of_tangles_can_be_built_after_uncrossing():
+    feat_sys = UncrossingFeatureSystem.with_array(crossing_features())
+    sweep = MockSweep([0, 2, 1])
+    uncross_distinguishers(sweep, feat_sys, agreement=3)
+    _, efficient_distinguishers = sweep.tree.get_efficient_distinguishers(agreement=3)
+    assert_uncrossed(
+        feat_sys, efficient_distinguishers, (0, 1), sweep.tree.sep_ids[2:-1]
+    )
+
+    mock_agreement_function = lambda _: 0
+    mock_agreement_function.max_value = 2
+    tangle_sweep = TangleSweep(
+        mock_agreement_function, feat_sys.is_le, list(sweep.tree.sep_ids)
+    )
+    tangle_sweep.tree.get_efficient_distinguishers = lambda agreement: (
+        None,
+        efficient_distinguishers,
+    )
+    tree_of_tangles = build_tree_of_tangles_from_sweep(tangle_sweep, agreement_value=3)
+    assert sorted(tree_of_tangles.feature_ids()) == sorted(efficient_distinguishers)
+    assert len(tree_of_tangles.locations()) == len(efficient_distinguishers) + 1
@@ -1,10 +1,16 @@
+import pytest
 import numpy as np
 from tangles_tot._tangles_lib import FeatureSystem
 from tangles_tot._testing import (
     generate_random_features,
     add_random_corners_to_feat_sys,
 )
-from .uncrossing_feature_system import UncrossingFeatureSystem
+from .uncrossing_feature_system import (
+    UncrossingFeatureSystem,
+    ORIGINAL_FEATURE,
+    CORNER_FEATURE,
+    is_nested_in_arrays,
+)
 
 
 def test_creation_with_array_not_unique():
@@ -43,7 +49,7 @@ def test_creation_with_array():
         feat_sys = UncrossingFeatureSystem.with_array(features, metadata)
         if len(feat_sys) == num_features:
             break
-    assert feat_sys._original_ids == list(range(num_features))
+    assert feat_sys.original_ids().tolist() == list(range(num_features))
     assert len(feat_sys._feat_sys) == num_features
 
 
@@ -63,7 +69,7 @@ def test_creation_with_feature_system():
     uncrossing_feat_sys = UncrossingFeatureSystem.from_feature_system(feat_sys)
     assert len(uncrossing_feat_sys) == len(feat_sys)
     assert uncrossing_feat_sys.get_number_of_original_features() == num_features
-    assert uncrossing_feat_sys._original_ids == list(range(num_features))
+    assert uncrossing_feat_sys.original_ids().tolist() == list(range(num_features))
 
 
 def test_creation_with_feature_system_no_metadata():
@@ -81,7 +87,7 @@ def test_creation_with_feature_system_no_metadata():
     uncrossing_feat_sys = UncrossingFeatureSystem.from_feature_system(feat_sys)
     assert len(uncrossing_feat_sys) == len(feat_sys)
     assert uncrossing_feat_sys.get_number_of_original_features() == num_features
-    assert uncrossing_feat_sys._original_ids == list(range(num_features))
+    assert uncrossing_feat_sys.original_ids().tolist() == list(range(num_features))
 
 
 def test_get_original_features():
@@ -94,7 +100,7 @@ def test_get_original_features():
     add_random_corners_to_feat_sys(feat_sys, number_of_corners_to_add)
 
     assert np.all(
-        feat_sys.get_original_features() == original_features[:, feat_sys._original_ids]
+        feat_sys.get_original_features() == original_features[:, feat_sys.original_ids()]
     )
 
 
@@ -140,3 +146,258 @@ def test_uncrossing_feature_system_has_feature_system_interface():
     assert (
         len(missing) == 0
     ), f"there are methods of FeatureSystem which UncrossingFeatureSystem does not implement: {missing}"
+
+
+def test_compute_infima():
+    num_features = 10
+    feature_length = 100
+    features = generate_random_features(num_features, feature_length)
+    feat_sys = UncrossingFeatureSystem.with_array(features)
+    add_random_corners_to_feat_sys(feat_sys, 20)
+    feat_ids = [[0, 3], [], [len(feat_sys) - 1], [1, 2, 3, 1]]
+    specifications = [[1, -1], [], [-1], [1, 1, -1, 1]]
+    infima = feat_sys.compute_infima(feat_ids, specifications, row_chunk_size=30)
+    assert infima.shape == (feature_length, len(feat_ids))
+    assert np.all(infima[:, 1] == 1)
+    for idx in [0, 2, 3]:
+        assert np.all(
+            infima[:, idx]
+            == feat_sys.compute_infimum(
+                np.array(feat_ids[idx]), np.array(specifications[idx])
+            )
+        )
+
+
+def test_add_features_updates_original_features():
+    num_features = 5
+    feature_length = 50
+    features = generate_random_features(num_features, feature_length)
+    feat_sys = UncrossingFeatureSystem.with_array(features)
+    add_random_corners_to_feat_sys(feat_sys, 10)
+    corner_id = len(feat_sys) - 1
+    cached = feat_sys.get_original_features()
+    assert feat_sys.get_original_features() is cached
+
+    for _ in range(20):
+        previous_length = len(feat_sys)
+        feat_sys.add_features(generate_random_features(1, feature_length))
+        new_ids = list(range(previous_length, len(feat_sys)))
+        assert np.all(feat_sys.is_original(new_ids))
+    assert not feat_sys.is_original(corner_id)
+    original_ids = feat_sys.original_ids()
+    assert feat_sys.get_number_of_original_features() == len(original_ids)
+    assert np.all(feat_sys.get_original_features() == feat_sys[original_ids.tolist()])
+    assert feat_sys.get_original_features() is not cached
+
+
+def test_label_types_are_classified_incrementally():
+    num_features = 10
+    feature_length = 100
+    while True:
+        original_features = generate_random_features(num_features, feature_length)
+        feat_sys = FeatureSystem.with_array(
+            original_features, metadata=list(range(num_features))
+        )
+        if len(feat_sys) == num_features:
+            break
+    add_random_corners_to_feat_sys(feat_sys, 20)
+    label_types = UncrossingFeatureSystem.label_types(feat_sys)
+    assert np.all(label_types[:num_features] == ORIGINAL_FEATURE)
+    assert np.all(label_types[num_features:] == CORNER_FEATURE)
+    assert UncrossingFeatureSystem.label_types(feat_sys) is label_types
+
+    add_random_corners_to_feat_sys(feat_sys, 20)
+    stored = np.array(label_types)
+    new_label_types = UncrossingFeatureSystem.label_types(feat_sys)
+    assert len(new_label_types) == len(feat_sys)
+    assert np.all(new_label_types[: len(stored)] == stored)
+    assert np.all(new_label_types[len(stored) :] == CORNER_FEATURE)
+
+    uncrossing_feat_sys = UncrossingFeatureSystem.from_feature_system(
+        feat_sys.copy(), label_types=stored
+    )
+    assert uncrossing_feat_sys.original_ids().tolist() == list(range(num_features))
+
+
+def test_corner_re_added_as_original_is_original():
+    features = np.array(
+        [
+            [1, 1],
+            [1, -1],
+            [-1, 1],
+            [-1, -1],
+        ]
+    )
+    feat_sys = FeatureSystem.with_array(features, metadata=["a", "b"])
+    corner_id, _ = feat_sys.add_corner(0, 1, 1, 1)
+    assert UncrossingFeatureSystem.label_types(feat_sys)[corner_id] == CORNER_FEATURE
+
+    corner = np.asarray(feat_sys[[corner_id]]).reshape(-1, 1)
+    feat_sys.add_features(corner, metadata=["a and b"])
+    UncrossingFeatureSystem.clear_label_types(feat_sys)
+    assert UncrossingFeatureSystem.label_types(feat_sys)[corner_id] == ORIGINAL_FEATURE
+    uncrossing_feat_sys = UncrossingFeatureSystem.from_feature_system(feat_sys)
+    assert uncrossing_feat_sys.is_original(corner_id)
+
+
+def test_re_adding_features_clears_label_types():
+    features = np.array(
+        [
+            [1, 1],
+            [1, -1],
+            [-1, 1],
+            [-1, -1],
+        ]
+    )
+    feat_sys = FeatureSystem.with_array(features, metadata=["a", "b"])
+    corner_id, _ = feat_sys.add_corner(0, 1, 1, 1)
+    uncrossing_feat_sys = UncrossingFeatureSystem.from_feature_system(feat_sys)
+    assert UncrossingFeatureSystem.label_types(feat_sys)[corner_id] == CORNER_FEATURE
+
+    corner = np.asarray(feat_sys[[corner_id]]).reshape(-1, 1)
+    uncrossing_feat_sys.add_features(corner, metadata=["a and b"])
+    assert UncrossingFeatureSystem.label_types(feat_sys)[corner_id] == ORIGINAL_FEATURE
+
+
+@pytest.mark.parametrize("chunk_size", [1, 256])
+def test_add_corners_skips_duplicates(chunk_size):
+    features = np.array(
+        [
+            [1, 1],
+            [1, -1],
+            [-1, 1],
+            [-1, -1],
+        ]
+    )
+    feat_sys = UncrossingFeatureSystem.with_array(features)
+    ids, specifications = feat_sys.add_corners(
+        [0, 0, 0], [1, 1, -1], [1, 1, 1], [1, 1, 1], chunk_size=chunk_size
+    )
+    assert len(feat_sys) == 4
+    assert ids[0] == ids[1]
+    assert feat_sys.skipped_duplicate_corners == 1
+    for idx, (id_a, spec_a, id_b, spec_b) in enumerate(
+        [(0, 1, 1, 1), (0, 1, 1, 1), (0, -1, 1, 1)]
+    ):
+        assert np.all(
+            feat_sys.get_feature((ids[idx], specifications[idx]))
+            == feat_sys.compute_infimum(
+                np.array([id_a, id_b]), np.array([spec_a, spec_b])
+            )
+        )
+
+    assert feat_sys.add_corner(0, 1, 1, 1) == (ids[0], specifications[0])
+    assert feat_sys.skipped_duplicate_corners == 2
+
+
+def test_relation_matrices():
+    num_features = 8
+    feature_length = 40
+    features = generate_random_features(num_features, feature_length)
+    feat_sys = UncrossingFeatureSystem.with_array(features)
+    add_random_corners_to_feat_sys(feat_sys, 20)
+    feature_ids = np.arange(len(feat_sys))
+    specifications = np.random.choice([1, -1], size=len(feat_sys))
+    other_ids = feature_ids[::3]
+    other_specifications = specifications[::3]
+
+    is_le = feat_sys.is_le_matrix(
+        feature_ids,
+        specifications,
+        other_ids,
+        other_specifications,
+        block_size=5,
+        row_chunk_size=7,
+        n_jobs=2,
+    )
+    is_nested = feat_sys.is_nested_matrix(feature_ids, other_ids, block_size=5)
+    assert is_le.shape == is_nested.shape == (len(feature_ids), len(other_ids))
+    for i, (feature_id, specification) in enumerate(zip(feature_ids, specifications)):
+        for j, (other_id, other_specification) in enumerate(
+            zip(other_ids, other_specifications)
+        ):
+            assert is_le[i, j] == feat_sys.is_le(
+                feature_id, specification, other_id, other_specification
+            )
+            assert is_nested[i, j] == feat_sys.is_nested(feature_id, other_id)
+    assert np.all(np.diag(feat_sys.is_le_matrix(feature_ids, specifications)))
+
+
+@pytest.mark.parametrize("values", [[1, -1], [1, 0, -1]])
+def test_is_nested_in_arrays(values):
+    features = np.random.choice(values, size=(6, 20)).astype(np.int8)
+    is_nested = is_nested_in_arrays(
+        features[:, :7], features, block_size=3, row_chunk_size=4, n_jobs=2
+    )
+    sizes = np.sum(features == 1, axis=0)
+    assert np.array_equal(
+        is_nested_in_arrays(
+            features[:, :7],
+            features,
+            block_size=3,
+            sizes_1=sizes[:7],
+            sizes_2=sizes,
+            has_zeros=bool(np.any(features == 0)),
+        ),
+        is_nested,
+    )
+    for i in range(7):
+        for j in range(20):
+            assert is_nested[i, j] == any(
+                np.all(features[:, i] * s <= features[:, j] * t)
+                for s in [1, -1]
+                for t in [1, -1]
+            )
+
+
+def test_with_memmap(tmp_path):
+    num_features = 6
+    feature_length = 101
+    features = generate_random_features(num_features, feature_length).astype(np.int8)
+    # the first rows make the features distinct and not complements of each other
+    features[:num_features] = 2 * np.eye(num_features, dtype=np.int8) - 1
+    metadata = [str(i) for i in range(num_features)]
+    np.save(tmp_path / "features.npy", features)
+    np.save(tmp_path / "packed.npy", np.packbits(features.T == 1, axis=1))
+    feat_sys = UncrossingFeatureSystem.with_array(features, metadata)
+    assert len(feat_sys) == num_features
+    memmap_feat_sys = UncrossingFeatureSystem.with_memmap(
+        str(tmp_path / "features.npy"), metadata, column_chunk_size=4
+    )
+    packed_feat_sys = UncrossingFeatureSystem.with_memmap(
+        str(tmp_path / "packed.npy"),
+        metadata,
+        packed=True,
+        number_of_elements=feature_length,
+    )
+    corners = [(0, 1, 1, -1), (2, -1, 3, -1), (6, 1, 4, 1), (7, -1, 5, 1)]
+    for system in [feat_sys, memmap_feat_sys, packed_feat_sys]:
+        for corner in corners:
+            system.add_corner(*corner)
+    assert memmap_feat_sys.get_packed_original_features() is None
+    assert packed_feat_sys.get_packed_original_features().shape == (
+        num_features,
+        (feature_length + 7) // 8,
+    )
+    feat_ids = [[0, 6], [1, 2, 3], [], [7, 8, 0]]
+    specifications = [[1, -1], [1, 1, -1], [], [-1, 1, 1]]
+    expected = feat_sys.compute_infima(feat_ids, specifications)
+    assert np.all(memmap_feat_sys.get_original_features() == features)
+    with pytest.raises(ValueError):
+        packed_feat_sys.get_original_features()
+    for system in [memmap_feat_sys, packed_feat_sys]:
+        assert system.get_number_of_elements() == feature_length
+        assert system.get_metadata_of_original_features() == metadata
+        assert np.all(
+            system.compute_infima(feat_ids, specifications, row_chunk_size=13)
+            == expected
+        )
+        system.add_features(np.ones((feature_length, 1), dtype=np.int8))
+        assert system.get_packed_original_features() is None
+        assert np.all(system.get_original_features()[:, :num_features] == features)
+
+
+def test_with_memmap_duplicates():
+    features = np.array([[1, -1], [-1, 1], [1, -1]], dtype=np.int8)
+    with pytest.raises(ValueError):
+        UncrossingFeatureSystem.with_memmap(features)
@@ -0,0 +1,179 @@
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Optional
+import numpy as np
+from tangles_tot._tangles_lib import TangleSweep
+from .uncrossing_feature_system import (
+    UncrossingFeatureSystem,
+    is_nested_in_arrays,
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_ROW_CHUNK_SIZE,
+)
+
+
+@dataclass
+class UncrossingReport:
+    """
+    Summary of a run of uncross_distinguishers.
+
+    Attributes:
+        number_of_corners: The number of corners inserted into the tangle sweep.
+        number_of_rounds: The number of rounds in which corners were inserted.
+        number_of_crossing_pairs: The number of crossing pairs of efficient distinguishers
+            left at the end, 0 if the efficient distinguishers have been uncrossed.
+        seconds: The time spent in every phase, "sweep", "crossing_detection" and
+            "corner_insertion".
+    """
+
+    number_of_corners: int = 0
+    number_of_rounds: int = 0
+    number_of_crossing_pairs: int = 0
+    seconds: dict[str, float] = field(
+        default_factory=lambda: {
+            "sweep": 0.0,
+            "crossing_detection": 0.0,
+            "corner_insertion": 0.0,
+        }
+    )
+
+
+def uncross_distinguishers(
+    sweep: TangleSweep,
+    feat_sys: UncrossingFeatureSystem,
+    agreement: int,
+    max_rounds: Optional[int] = None,
+) -> UncrossingReport:
+    """
+    Uncrosses the efficient distinguishers of the tangles of the tangle sweep of at least
+    the agreement value, such that a tree of tangles can be built from the sweep.
+
+    Every round finds all crossing pairs of efficient distinguishers at once, adds the
+    corners of these pairs to the feature system in one batch, skipping corners which are
+    already features of the system, and inserts the new corners into the sweep right
+    before the later of the two features of their pair. The sweep only revisits the
+    subtrees below the inserted corners. The rounds are repeated until the efficient
+    distinguishers are nested.
+
+    Args:
+        sweep: A tangle sweep over the features of feat_sys.
+        feat_sys: The feature system the corners are added to.
+        agreement: The agreement value of the tangles whose efficient distinguishers are uncrossed.
+        max_rounds: Optional maximal number of rounds.
+
+    Returns:
+        A report of the number of inserted corners and the time spent in every phase.
+    """
+    report = UncrossingReport()
+    start = perf_counter()
+    sweep.sweep_below(agreement)
+    report.seconds["sweep"] += perf_counter() - start
+    while True:
+        _, efficient_distinguishers = sweep.tree.get_efficient_distinguishers(
+            agreement=agreement
+        )
+        efficient_distinguishers = np.asarray(efficient_distinguishers, dtype=int)
+        start = perf_counter()
+        crossing_pairs = find_crossing_pairs(feat_sys, efficient_distinguishers)
+        report.seconds["crossing_detection"] += perf_counter() - start
+        report.number_of_crossing_pairs = len(crossing_pairs)
+        if len(crossing_pairs) == 0 or (
+            max_rounds is not None and report.number_of_rounds >= max_rounds
+        ):
+            return report
+
+        start = perf_counter()
+        number_of_corners = _insert_corners(sweep, feat_sys, crossing_pairs, agreement)
+        report.seconds["corner_insertion"] += perf_counter() - start
+        if number_of_corners == 0:
+            # every corner is already part of the sweep, more rounds would not change it
+            return report
+        report.number_of_corners += number_of_corners
+        report.number_of_rounds += 1
+
+        start = perf_counter()
+        sweep.sweep_below(agreement)
+        report.seconds["sweep"] += perf_counter() - start
+
+
+def find_crossing_pairs(
+    feat_sys: UncrossingFeatureSystem,
+    feature_ids: np.ndarray,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    row_chunk_size: int = DEFAULT_ROW_CHUNK_SIZE,
+    n_jobs: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Finds all pairs of features which are not nested. The features are pulled out of the
+    feature system once and compared using is_nested_in_arrays on blocks of the features.
+
+    Args:
+        feat_sys: The feature system containing the features.
+        feature_ids: The ids of the features to check.
+        block_size: Number of features compared against all other features at once.
+        row_chunk_size: Number of rows converted to floating point at once.
+        n_jobs: Optional number of threads every block is computed in.
+
+    Returns:
+        Array of shape (number of crossing pairs, 2) containing the ids of the crossing
+        pairs, the first id of every pair comes first in feature_ids.
+    """
+    feature_ids = np.asarray(feature_ids, dtype=int)
+    pairs = [np.zeros((0, 2), dtype=int)]
+    if len(feature_ids) < 2:
+        return np.concatenate(pairs)
+    features = np.asarray(feat_sys[feature_ids.tolist()], dtype=np.int8).reshape(
+        -1, len(feature_ids)
+    )
+    # every block is split between the threads
+    thread_block_size = max(1, -(-block_size // max(1, n_jobs or 1)))
+    sizes = np.sum(features == 1, axis=0)
+    has_zeros = bool(np.any(features == 0))
+    for block_start in range(0, len(feature_ids), block_size):
+        block = slice(block_start, min(block_start + block_size, len(feature_ids)))
+        nested = is_nested_in_arrays(
+            features[:, block],
+            features,
+            block_size=thread_block_size,
+            row_chunk_size=row_chunk_size,
+            n_jobs=n_jobs,
+            sizes_1=sizes[block],
+            sizes_2=sizes,
+            has_zeros=has_zeros,
+        )
+        block_pairs = np.argwhere(np.triu(~nested, k=block_start + 1))
+        block_pairs[:, 0] += block_start
+        pairs.append(block_pairs)
+    return feature_ids[np.concatenate(pairs)]
+
+
+def _insert_corners(
+    sweep: TangleSweep,
+    feat_sys: UncrossingFeatureSystem,
+    crossing_pairs: np.ndarray,
+    agreement: int,
+) -> int:
+    sep_ids = list(sweep.tree.sep_ids)
+    levels = {sep_id: level for level, sep_id in enumerate(sep_ids)}
+    # the four corners of every crossing pair are added to the feature system at once
+    first_ids = np.repeat(crossing_pairs[:, 0], 4)
+    second_ids = np.repeat(crossing_pairs[:, 1], 4)
+    first_specifications = np.tile([1, 1, -1, -1], len(crossing_pairs))
+    second_specifications = np.tile([1, -1, 1, -1], len(crossing_pairs))
+    corner_ids, _ = feat_sys.add_corners(
+        first_ids, first_specifications, second_ids, second_specifications
+    )
+    # every new corner is inserted before the later feature of the first pair producing it
+    insertion_levels: dict[int, int] = {}
+    for first_id, second_id, corner_id in zip(
+        first_ids.tolist(), second_ids.tolist(), corner_ids.tolist()
+    ):
+        if corner_id in levels:
+            continue
+        level = max(levels[first_id], levels[second_id])
+        insertion_levels[corner_id] = min(level, insertion_levels.get(corner_id, level))
+    # inserting from the back keeps the levels in front of the insertion valid
+    for corner_id, level in sorted(
+        insertion_levels.items(), key=lambda item: item[1], reverse=True
+    ):
+        sweep.insert_separation(level, corner_id, agreement)
+    return len(insertion_levels)
@@ -1,23 +1,56 @@
-from typing import Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
+import weakref
 import numpy as np
 from tangles_tot._tangles_lib import FeatureSystem, CUSTOM_LABEL, INF_LABEL, MetaData, SetSeparationSystem
 from tangles_tot._typing import Feature
 
+UNLABELED_FEATURE = 0
+ORIGINAL_FEATURE = 1
+CORNER_FEATURE = 2
+
+DEFAULT_BLOCK_SIZE = 1024
+DEFAULT_ROW_CHUNK_SIZE = 65536
+DEFAULT_CORNER_CHUNK_SIZE = 256
+
+# the label types of every classified feature system. They are extended by the features
+# added later and dropped by clear_label_types, re-adding an existing feature changes
+# its metadata without changing the length of the system
+_label_types_of_system: "weakref.WeakKeyDictionary[Any, np.ndarray]" = (
+    weakref.WeakKeyDictionary()
+)
 
 class UncrossingFeatureSystem:
     """
     A class which implements the functionality of a feature system and is additionally
     specialised for use cases involving uncrossing.
 
-    Currently it manages a list of feature ids of the features which were not added by
-    corners, the "original ids".
+    Currently it manages the feature ids of the features which were not added by
+    corners, the "original ids". They are stored in a growable array together with a
+    mask over all feature ids, and the matrix of the original features is cached until
+    new original features are added.
 
     Still very unstable and will probably change a lot between releases.
     """
 
-    def __init__(self, feat_sys: FeatureSystem, original_ids: list[int]):
+    def __init__(
+        self, feat_sys: FeatureSystem, original_ids: Union[np.ndarray, list[int]]
+    ):
         self._feat_sys = feat_sys
-        self._original_ids = original_ids
+        original_ids = np.asarray(original_ids, dtype=int)
+        self._original_id_buffer = original_ids.copy()
+        self._number_of_original_ids = len(original_ids)
+        self._original_mask = np.zeros(
+            max(len(feat_sys), int(original_ids.max(initial=-1)) + 1), dtype=bool
+        )
+        self._original_mask[original_ids] = True
+        self._original_features: Optional[np.ndarray] = None
+        # memory-mapped original features, see with_memmap
+        self._source: Optional[_FeatureSource] = None
+        # hashes of the features, normalized up to complement, built lazily by add_corners
+        self._feature_index: dict[int, list[int]] = {}
+        self._feature_signs = np.zeros(0, dtype=np.int8)
+        self.skipped_duplicate_corners = 0
 
     @staticmethod
     def with_array(
@@ -29,50 +62,157 @@ class UncrossingFeatureSystem:
         )
 
     @staticmethod
-    def from_feature_system(feat_sys: FeatureSystem) -> "UncrossingFeatureSystem":
-        original_ids = []
-        corner_ids = []
-        for i in range(len(feat_sys)):
-            metadata = feat_sys.feature_metadata(i)
-            while metadata:
-                if metadata.type == CUSTOM_LABEL:
-                    original_ids.append(i)
-                    break
-                if metadata.type == INF_LABEL:
-                    corner_ids.append(i)
-                metadata = metadata.next
-        if len(original_ids) == 0 and len(corner_ids) == 0:
-            original_ids = list(range(len(feat_sys)))
-        if len(original_ids) == 0:
-            raise Exception(
-                "could not determine which features were added by uncrossing and which were added by user. You can fix this by adding metadata to your features."
+    def with_memmap(
+        features: Union[np.ndarray, str],
+        metadata: Optional[Any] = None,
+        packed: bool = False,
+        number_of_elements: Optional[int] = None,
+        column_chunk_size: int = 1024,
+    ) -> "UncrossingFeatureSystem":
+        """
+        Creates an UncrossingFeatureSystem whose original features stay memory-mapped.
+
+        The feature system is filled in chunks of columns. get_original_features,
+        get_packed_original_features and compute_infima read the original features from the
+        memory map, in chunks of rows, instead of copying them out of the feature system. The
+        memory map is used until further original features are added. Bit-packed original
+        features are never unpacked as a whole, get_original_features refuses to do so.
+
+        Args:
+            features: Array of shape (number of elements, number of features), for example an
+                np.memmap, or the path of a .npy file containing it, which is opened memory-mapped.
+                If packed is True, the array has shape (number of features, number of packed bytes)
+                and contains every feature packed by np.packbits(feature == 1).
+            metadata: Optional metadata of the features.
+            packed: Whether the features are bit-packed.
+            number_of_elements: The number of elements of the ground set, required if packed is True.
+            column_chunk_size: Number of features added to the feature system at once.
+
+        Raises:
+            ValueError: If number_of_elements is missing for bit-packed features, or if two of the
+                features are equal or complements of each other.
+        """
+        if isinstance(features, str):
+            features = np.load(features, mmap_mode="r")
+        if packed and number_of_elements is None:
+            raise ValueError(
+                "number_of_elements is required to read bit-packed features."
             )
-        return UncrossingFeatureSystem(
-            feat_sys=feat_sys,
-            original_ids=original_ids,
+        source = (
+            _FeatureSource(packed=features, number_of_elements=number_of_elements)
+            if packed
+            else _FeatureSource(features=features)
         )
-    
+        number_of_features = source.number_of_features
+        first_chunk = min(column_chunk_size, number_of_features)
+        feat_sys = FeatureSystem.with_array(
+            source.columns(0, first_chunk),
+            metadata=None if metadata is None else metadata[:first_chunk],
+        )
+        is_distinct = len(feat_sys) == first_chunk
+        for start in range(first_chunk, number_of_features, column_chunk_size):
+            stop = min(start + column_chunk_size, number_of_features)
+            ids, specifications = feat_sys.add_features(
+                source.columns(start, stop),
+                None if metadata is None else metadata[start:stop],
+            )
+            is_distinct = (
+                is_distinct
+                and np.array_equal(ids, np.arange(start, stop))
+                and bool(np.all(specifications == 1))
+            )
+        if not is_distinct:
+            raise ValueError(
+                "The memory-mapped features contain features which are equal or complements "
+                "of each other, please remove them first."
+            )
+        uncrossing_feat_sys = UncrossingFeatureSystem(
+            feat_sys=feat_sys, original_ids=np.arange(number_of_features)
+        )
+        uncrossing_feat_sys._source = source
+        return uncrossing_feat_sys
+
     @staticmethod
-    def from_set_separation_system(sep_sys: SetSeparationSystem) -> "UncrossingFeatureSystem":
-        original_ids = []
-        corner_ids = []
-        for i in range(len(sep_sys)):
-            metadata = sep_sys.separation_metadata(i)
-            while metadata:
-                if metadata.type == CUSTOM_LABEL:
-                    original_ids.append(i)
-                    break
-                if metadata.type == INF_LABEL:
-                    corner_ids.append(i)
-                metadata = metadata.next
-        if len(original_ids) == 0 and len(corner_ids) == 0:
-            original_ids = list(range(len(sep_sys)))
+    def from_feature_system(
+        feat_sys: FeatureSystem, label_types: Optional[np.ndarray] = None
+    ) -> "UncrossingFeatureSystem":
+        """
+        Wraps a feature system, the features with a custom label are the original features.
+
+        Args:
+            feat_sys: The feature system.
+            label_types: Optional label types of the features, as returned by
+                UncrossingFeatureSystem.label_types, for example of a stored system. Only the
+                features which are not covered by it are classified, so it has to be computed
+                after the last feature has been re-added. Defaults to the label types cached
+                for the system, see label_types.
+        """
+        return UncrossingFeatureSystem._from_label_types(
+            feat_sys,
+            _classify_features(feat_sys, feat_sys.feature_metadata, label_types),
+        )
+
+    @staticmethod
+    def from_set_separation_system(
+        sep_sys: SetSeparationSystem, label_types: Optional[np.ndarray] = None
+    ) -> "UncrossingFeatureSystem":
+        """
+        Wraps a set separation system, see from_feature_system.
+        """
+        return UncrossingFeatureSystem._from_label_types(
+            sep_sys,
+            _classify_features(sep_sys, sep_sys.separation_metadata, label_types),
+        )
+
+    @staticmethod
+    def label_types(feat_sys: Union[FeatureSystem, SetSeparationSystem]) -> np.ndarray:
+        """
+        Classifies the features of a feature system by their metadata. The classification
+        is cached for the system, later calls and wrapping the system only classify the
+        features added since.
+
+        Re-adding an existing feature to the system changes its metadata without adding a
+        feature, for example a corner can be re-added as an original feature. The cache is
+        not aware of this, call clear_label_types after re-adding features to the system.
+        UncrossingFeatureSystem.add_features does so itself.
+
+        The result can be stored alongside of the system and passed to from_feature_system
+        when the system is loaded again.
+
+        Returns:
+            Read-only int8 array containing, for every feature, ORIGINAL_FEATURE if it has a
+            custom label, CORNER_FEATURE if it was added as a corner and UNLABELED_FEATURE otherwise.
+        """
+        get_metadata = (
+            feat_sys.feature_metadata
+            if isinstance(feat_sys, FeatureSystem)
+            else feat_sys.separation_metadata
+        )
+        return _classify_features(feat_sys, get_metadata)
+
+    @staticmethod
+    def clear_label_types(feat_sys: Union[FeatureSystem, SetSeparationSystem]):
+        """
+        Drops the label types cached for the feature system, see label_types.
+        """
+        try:
+            _label_types_of_system.pop(feat_sys, None)
+        except TypeError:
+            pass
+
+    @staticmethod
+    def _from_label_types(
+        feat_sys: Union[FeatureSystem, SetSeparationSystem], label_types: np.ndarray
+    ) -> "UncrossingFeatureSystem":
+        original_ids = np.flatnonzero(label_types == ORIGINAL_FEATURE)
         if len(original_ids) == 0:
-            raise Exception(
-                "could not determine which features were added by uncrossing and which were added by user. You can fix this by adding metadata to your features."
-            )
+            if np.any(label_types == CORNER_FEATURE):
+                raise Exception(
+                    "could not determine which features were added by uncrossing and which were added by user. You can fix this by adding metadata to your features."
+                )
+            original_ids = np.arange(len(label_types))
         return UncrossingFeatureSystem(
-            feat_sys=sep_sys,
+            feat_sys=feat_sys,
             original_ids=original_ids,
         )
 
@@ -85,13 +225,101 @@ class UncrossingFeatureSystem:
         specification_a: int,
         feature_id_b: int,
         specification_b: int,
-    ):
-        self._feat_sys.add_corner(
-            feature_id_a,
-            specification_a,
-            feature_id_b,
-            specification_b,
+    ) -> Feature:
+        ids, specifications = self.add_corners(
+            [feature_id_a], [specification_a], [feature_id_b], [specification_b]
         )
+        return int(ids[0]), int(specifications[0])
+
+    def add_corners(
+        self,
+        feature_ids_a: Union[np.ndarray, list[int]],
+        specifications_a: Union[np.ndarray, list[int]],
+        feature_ids_b: Union[np.ndarray, list[int]],
+        specifications_b: Union[np.ndarray, list[int]],
+        chunk_size: int = DEFAULT_CORNER_CHUNK_SIZE,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Adds the corners (feature_ids_a[i], specifications_a[i]) ∧ (feature_ids_b[i], specifications_b[i]).
+
+        The features are indexed by a hash of their bit-packed arrays, normalized up to
+        complement. A corner which is equal to a feature of the system, or to its complement,
+        is not added again, instead the existing feature is returned and counted in
+        skipped_duplicate_corners.
+
+        The corners are computed, hashed and added in chunks of chunk_size corners, such that
+        only the arrays of one chunk are in memory at once.
+
+        Returns:
+            The ids and specifications of the corners.
+        """
+        feature_ids_a = np.asarray(feature_ids_a, dtype=int)
+        feature_ids_b = np.asarray(feature_ids_b, dtype=int)
+        specifications_a = np.asarray(specifications_a, dtype=np.int8)
+        specifications_b = np.asarray(specifications_b, dtype=np.int8)
+        number_of_corners = len(feature_ids_a)
+        ids = np.zeros(number_of_corners, dtype=int)
+        specifications = np.zeros(number_of_corners, dtype=np.int8)
+        self._update_feature_index()
+        for start in range(0, number_of_corners, chunk_size):
+            chunk = slice(start, min(start + chunk_size, number_of_corners))
+            chunk_length = chunk.stop - chunk.start
+            unique_ids, columns = np.unique(
+                np.concatenate([feature_ids_a[chunk], feature_ids_b[chunk]]),
+                return_inverse=True,
+            )
+            features = np.asarray(self._feat_sys[unique_ids.tolist()], dtype=np.int8)
+            features = features.reshape(-1, len(unique_ids))
+            corners = np.minimum(
+                features[:, columns[:chunk_length]] * specifications_a[chunk],
+                features[:, columns[chunk_length:]] * specifications_b[chunk],
+            )
+            del features
+            keys, signs = _feature_keys(corners)
+            for idx in range(chunk_length):
+                corner = corners[:, idx] * signs[idx]
+                feature = self._find_feature(keys[idx], corner)
+                if feature is None:
+                    self._feat_sys.add_corner(
+                        int(feature_ids_a[chunk.start + idx]),
+                        int(specifications_a[chunk.start + idx]),
+                        int(feature_ids_b[chunk.start + idx]),
+                        int(specifications_b[chunk.start + idx]),
+                    )
+                    self._update_feature_index()
+                    feature = self._find_feature(keys[idx], corner)
+                else:
+                    self.skipped_duplicate_corners += 1
+                ids[chunk.start + idx] = feature[0]
+                specifications[chunk.start + idx] = feature[1] * signs[idx]
+        return ids, specifications
+
+    def _update_feature_index(self, chunk_size: int = 1024):
+        number_of_indexed = len(self._feature_signs)
+        number_of_features = len(self._feat_sys)
+        if number_of_indexed >= number_of_features:
+            return
+        new_signs = []
+        for start in range(number_of_indexed, number_of_features, chunk_size):
+            stop = min(start + chunk_size, number_of_features)
+            features = np.asarray(
+                self._feat_sys[list(range(start, stop))], dtype=np.int8
+            ).reshape(-1, stop - start)
+            keys, signs = _feature_keys(features)
+            for feature_id, key in zip(range(start, stop), keys):
+                self._feature_index.setdefault(key, []).append(feature_id)
+            new_signs.append(signs)
+        self._feature_signs = np.concatenate([self._feature_signs, *new_signs])
+
+    def _find_feature(self, key: int, normalized: np.ndarray) -> Optional[Feature]:
+        """Finds a feature equal to the normalized array up to complement."""
+        for feature_id in self._feature_index.get(key, []):
+            sign = self._feature_signs[feature_id]
+            if np.array_equal(
+                np.asarray(self._feat_sys[feature_id]) * sign, normalized
+            ):
+                return feature_id, int(sign)
+        return None
 
     def compute_infimum(
         self,
@@ -100,21 +328,149 @@ class UncrossingFeatureSystem:
     ):
         return self._feat_sys.compute_infimum(feat_ids, specifications)
 
+    def compute_infima(
+        self,
+        feat_ids: list[Union[np.ndarray, list[int]]],
+        specifications: list[Union[np.ndarray, list[int]]],
+        row_chunk_size: int = 65536,
+    ) -> np.ndarray:
+        """
+        Computes the infima of several sets of oriented features at once, for example of
+        all locations of a tree of tangles.
+
+        Every feature is pulled out of the feature system once, even if it is contained
+        in several sets, and the infima are computed as one reduction over the stacked
+        oriented features, in chunks of rows.
+
+        Args:
+            feat_ids: The feature ids of every set.
+            specifications: The specifications of every set.
+            row_chunk_size: Number of elements of the ground set reduced at once.
+
+        Returns:
+            Array of shape (number of elements, number of sets) containing the infimum of
+            the i-th set in column i. The infimum of an empty set is the whole ground set.
+        """
+        sizes = np.array([len(ids) for ids in feat_ids], dtype=int)
+        non_empty = np.flatnonzero(sizes > 0)
+        if len(non_empty) == 0:
+            return np.ones(
+                (self.get_number_of_elements(), len(feat_ids)), dtype=np.int8
+            )
+        stacked_ids = np.concatenate(
+            [np.asarray(feat_ids[idx], dtype=int) for idx in non_empty]
+        )
+        stacked_specifications = np.concatenate(
+            [np.asarray(specifications[idx], dtype=np.int8) for idx in non_empty]
+        )
+        unique_ids, columns = np.unique(stacked_ids, return_inverse=True)
+        number_of_elements = self.get_number_of_elements()
+        # memory-mapped original features are only read chunk by chunk
+        in_source = (
+            unique_ids < self._source.number_of_features
+            if self._source is not None
+            else np.zeros(len(unique_ids), dtype=bool)
+        )
+        features = (
+            np.asarray(
+                self._feat_sys[unique_ids[~in_source].tolist()], dtype=np.int8
+            ).reshape(number_of_elements, -1)
+            if not np.all(in_source)
+            else np.zeros((number_of_elements, 0), dtype=np.int8)
+        )
+        infima = np.ones((number_of_elements, len(feat_ids)), dtype=np.int8)
+        offsets = np.concatenate([[0], np.cumsum(sizes[non_empty])[:-1]])
+        for start in range(0, number_of_elements, row_chunk_size):
+            rows = slice(start, min(start + row_chunk_size, number_of_elements))
+            chunk = np.empty((rows.stop - rows.start, len(unique_ids)), dtype=np.int8)
+            chunk[:, ~in_source] = features[rows]
+            if np.any(in_source):
+                chunk[:, in_source] = self._source.rows(rows, unique_ids[in_source])
+            oriented = chunk[:, columns] * stacked_specifications
+            infima[rows, non_empty] = np.minimum.reduceat(oriented, offsets, axis=1)
+        return infima
+
     def __getitem__(self, name):
         return self._feat_sys.__getitem__(name)
 
     def get_number_of_original_features(self) -> int:
-        return len(self._original_ids)
+        return self._number_of_original_ids
+
+    def original_ids(self) -> np.ndarray:
+        """
+        Returns:
+            Read-only array of the ids of the original features, in the order they were added.
+        """
+        original_ids = self._original_id_buffer[: self._number_of_original_ids]
+        original_ids.flags.writeable = False
+        return original_ids
+
+    def is_original(self, feature_ids: Union[int, np.ndarray, list[int]]):
+        """
+        Returns:
+            Whether the features with the given ids are original features.
+        """
+        feature_ids = np.asarray(feature_ids, dtype=int)
+        in_mask = feature_ids < len(self._original_mask)
+        result = np.zeros(feature_ids.shape, dtype=bool)
+        result[in_mask] = self._original_mask[feature_ids[in_mask]]
+        return bool(result) if result.ndim == 0 else result
 
     def get_original_features(self) -> np.ndarray:
-        return self._feat_sys[self._original_ids]
+        """
+        Returns:
+            Read-only array containing the original features as columns. The array is cached
+            and only recomputed after original features have been added. If the original
+            features are memory-mapped, the memory map is returned.
+
+        Raises:
+            ValueError: If the original features are memory-mapped bit-packed features, which
+                would have to be unpacked into memory. Use get_packed_original_features or
+                compute_infima, which read them in chunks, instead.
+        """
+        if self._original_features is None:
+            if self._source is not None and self._source.packed is not None:
+                raise ValueError(
+                    "The original features are bit-packed, unpacking all of them would load "
+                    "them into memory. Use get_packed_original_features or compute_infima instead."
+                )
+            if self._source is not None:
+                original_features = self._source.columns(
+                    0, self._source.number_of_features
+                ).view()
+            else:
+                original_features = np.asarray(
+                    self._feat_sys[self.original_ids().tolist()]
+                )
+            original_features.flags.writeable = False
+            self._original_features = original_features
+        return self._original_features
+
+    def get_packed_original_features(self) -> Optional[np.ndarray]:
+        """
+        Returns:
+            The memory-mapped array of shape (number of original features, number of packed bytes)
+            if the system was created by with_memmap from bit-packed features, otherwise None.
+        """
+        if self._source is None:
+            return None
+        return self._source.packed
+
+    def get_number_of_elements(self) -> int:
+        """
+        Returns:
+            The number of elements of the ground set.
+        """
+        if self._source is not None:
+            return self._source.number_of_elements
+        return len(self._feat_sys[0]) if len(self) > 0 else 0
 
     def get_feature(self, feature: Feature) -> np.ndarray:
         return self._feat_sys[feature[0]] * feature[1]
 
     def get_metadata_of_original_features(self) -> list[Any]:
         metadata_list = []
-        for original_id in self._original_ids:
+        for original_id in self.original_ids().tolist():
             metadata = self._feat_sys.separation_metadata(original_id)
             if not metadata or metadata.info is None:
                 metadata_list.append(f"s{original_id}")
@@ -170,23 +526,363 @@ class UncrossingFeatureSystem:
             feature_id_1, specification_1, feature_id_2, specification_2
         )
 
+    def is_le_matrix(
+        self,
+        feature_ids_1: Union[np.ndarray, list[int]],
+        specifications_1: Union[np.ndarray, list[int]],
+        feature_ids_2: Union[np.ndarray, list[int], None] = None,
+        specifications_2: Union[np.ndarray, list[int], None] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        row_chunk_size: int = DEFAULT_ROW_CHUNK_SIZE,
+        n_jobs: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Computes is_le for all pairs of two sets of oriented features at once.
+
+        The number of elements on which one oriented feature is greater than the other is
+        computed for blocks of features as matrix products, in chunks of rows.
+
+        Args:
+            feature_ids_1: The ids of the first oriented features.
+            specifications_1: The specifications of the first oriented features.
+            feature_ids_2: Optional ids of the second oriented features, defaults to the first.
+            specifications_2: Optional specifications of the second oriented features.
+            block_size: Number of first features compared against all second features at once.
+            row_chunk_size: Number of rows converted to floating point at once.
+            n_jobs: Optional number of threads the blocks are computed in.
+
+        Returns:
+            Boolean array of shape (len(feature_ids_1), len(feature_ids_2)) whose entry (i, j) is
+            is_le(feature_ids_1[i], specifications_1[i], feature_ids_2[j], specifications_2[j]).
+        """
+        oriented_1 = self._oriented_features(feature_ids_1, specifications_1)
+        oriented_2 = (
+            oriented_1
+            if feature_ids_2 is None
+            else self._oriented_features(feature_ids_2, specifications_2)
+        )
+        return _order_relation(
+            oriented_1, oriented_2, block_size, row_chunk_size, n_jobs
+        )
+
+    def is_nested_matrix(
+        self,
+        feature_ids_1: Union[np.ndarray, list[int]],
+        feature_ids_2: Union[np.ndarray, list[int], None] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        row_chunk_size: int = DEFAULT_ROW_CHUNK_SIZE,
+        n_jobs: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Computes is_nested for all pairs of two sets of features at once, see
+        is_nested_in_arrays.
+
+        Returns:
+            Boolean array of shape (len(feature_ids_1), len(feature_ids_2)) whose entry (i, j) is
+            is_nested(feature_ids_1[i], feature_ids_2[j]).
+        """
+        features_1 = self._oriented_features(feature_ids_1)
+        features_2 = (
+            features_1
+            if feature_ids_2 is None
+            else self._oriented_features(feature_ids_2)
+        )
+        return is_nested_in_arrays(
+            features_1, features_2, block_size, row_chunk_size, n_jobs
+        )
+
+    def _oriented_features(
+        self,
+        feature_ids: Union[np.ndarray, list[int]],
+        specifications: Union[np.ndarray, list[int], None] = None,
+    ) -> np.ndarray:
+        feature_ids = np.asarray(feature_ids, dtype=int)
+        features = np.asarray(self._feat_sys[feature_ids.tolist()], dtype=np.int8)
+        features = features.reshape(-1, len(feature_ids))
+        if specifications is None:
+            return features
+        return features * np.asarray(specifications, dtype=np.int8)[np.newaxis, :]
+
     def add_features(
         self, features: np.ndarray, metadata: Optional[Any] = None
     ) -> tuple[np.ndarray, np.ndarray]:
         previous_length = len(self._feat_sys)
         result = self._feat_sys.add_features(features, metadata)
         new_length = len(self._feat_sys)
-        self._original_ids = self._original_ids + list(
-            range(previous_length, new_length)
-        )
+        if np.any(np.asarray(result[0]) < previous_length):
+            # the metadata of the re-added features has changed
+            UncrossingFeatureSystem.clear_label_types(self._feat_sys)
+        if new_length > previous_length:
+            self._append_original_ids(np.arange(previous_length, new_length))
         return result
 
+    def _append_original_ids(self, new_ids: np.ndarray):
+        # the buffers grow geometrically, such that many small additions take amortised
+        # constant time per feature
+        required = self._number_of_original_ids + len(new_ids)
+        if required > len(self._original_id_buffer):
+            buffer = np.empty(
+                max(required, 2 * len(self._original_id_buffer)), dtype=int
+            )
+            buffer[: self._number_of_original_ids] = self.original_ids()
+            self._original_id_buffer = buffer
+        self._original_id_buffer[self._number_of_original_ids : required] = new_ids
+        self._number_of_original_ids = required
+        if new_ids.max() >= len(self._original_mask):
+            mask = np.zeros(
+                max(new_ids.max() + 1, 2 * len(self._original_mask)), dtype=bool
+            )
+            mask[: len(self._original_mask)] = self._original_mask
+            self._original_mask = mask
+        self._original_mask[new_ids] = True
+        self._original_features = None
+        self._source = None
+
     def get_corners(
         self, feature_id_1: int, feature_id_2: int
     ) -> tuple[np.ndarray, np.ndarray]:
         return self._feat_sys.get_corners(feature_id_1, feature_id_2)
 
     def copy(self) -> "UncrossingFeatureSystem":
-        return UncrossingFeatureSystem(
-            feat_sys=self._feat_sys.copy(), original_ids=self._original_ids.copy()
+        feat_sys = UncrossingFeatureSystem(
+            feat_sys=self._feat_sys.copy(), original_ids=self.original_ids()
+        )
+        feat_sys._source = self._source
+        return feat_sys
+
+
+def _classify_features(
+    feat_sys: Union[FeatureSystem, SetSeparationSystem],
+    get_metadata: Callable[[int], MetaData],
+    label_types: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    if label_types is None:
+        try:
+            label_types = _label_types_of_system.get(feat_sys)
+        except TypeError:
+            label_types = None
+    number_of_features = len(feat_sys)
+    if label_types is None:
+        label_types = np.zeros(0, dtype=np.int8)
+    label_types = np.asarray(label_types, dtype=np.int8)
+    if len(label_types) > number_of_features:
+        label_types = label_types[:number_of_features]
+    number_of_classified = len(label_types)
+    if number_of_classified < number_of_features or label_types.flags.writeable:
+        new_types = np.full(
+            number_of_features - number_of_classified, UNLABELED_FEATURE, dtype=np.int8
+        )
+        for feature_id in range(number_of_classified, number_of_features):
+            metadata = get_metadata(feature_id)
+            while metadata:
+                if metadata.type == CUSTOM_LABEL:
+                    new_types[feature_id - number_of_classified] = ORIGINAL_FEATURE
+                    break
+                if metadata.type == INF_LABEL:
+                    new_types[feature_id - number_of_classified] = CORNER_FEATURE
+                metadata = metadata.next
+        label_types = np.concatenate([label_types, new_types])
+        label_types.flags.writeable = False
+    try:
+        _label_types_of_system[feat_sys] = label_types
+    except TypeError:
+        pass
+    return label_types
+
+
+def _feature_keys(features: np.ndarray) -> tuple[list[int], np.ndarray]:
+    """
+    Hashes the columns of the features, such that a feature and its complement have the
+    same hash. Every column is normalized by the sign of its first non-zero entry.
+
+    Returns:
+        The hash of every column and the signs the columns were multiplied with.
+    """
+    first_non_zero = np.argmax(features != 0, axis=0)
+    signs = features[first_non_zero, np.arange(features.shape[1])].astype(np.int8)
+    signs[signs == 0] = 1
+    packed = np.packbits((features * signs) == 1, axis=0).T
+    return [hash(column.tobytes()) for column in packed], signs
+
+
+def positive_intersection_sizes(
+    left: np.ndarray, right: np.ndarray, row_chunk_size: int = DEFAULT_ROW_CHUNK_SIZE
+) -> np.ndarray:
+    """
+    Computes the sizes of the intersections of the positive sides of all columns of left
+    with the positive sides of all columns of right, as one matrix product in chunks of rows.
+
+    Returns:
+        Float array of shape (number of columns of left, number of columns of right).
+    """
+    intersection_sizes = np.zeros((left.shape[1], right.shape[1]), dtype=np.float64)
+    for row_start in range(0, left.shape[0], row_chunk_size):
+        rows = slice(row_start, row_start + row_chunk_size)
+        intersection_sizes += (left[rows] == 1).T.astype(np.float64) @ (
+            right[rows] == 1
+        ).astype(np.float64)
+    return intersection_sizes
+
+
+def is_nested_in_arrays(
+    features_1: np.ndarray,
+    features_2: np.ndarray,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    row_chunk_size: int = DEFAULT_ROW_CHUNK_SIZE,
+    n_jobs: Optional[int] = None,
+    sizes_1: Optional[np.ndarray] = None,
+    sizes_2: Optional[np.ndarray] = None,
+    has_zeros: Optional[bool] = None,
+) -> np.ndarray:
+    """
+    Computes for all pairs of columns of two feature arrays whether they are nested.
+
+    Two features A and B with values 1 and -1 are nested if one of the four corners A ∩ B,
+    A ∩ ¬B, ¬A ∩ B and ¬A ∩ ¬B is empty. The sizes of all four corners follow from the sizes
+    |A ∩ B|, which are computed with positive_intersection_sizes. Features with zeros are
+    compared in all four orientations instead.
+
+    Callers comparing blocks of columns against the same array can pass the sizes of the
+    positive sides and whether any of the arrays contains zeros, which are otherwise
+    computed from the arrays.
+
+    Returns:
+        Boolean array of shape (number of columns of features_1, number of columns of features_2).
+    """
+    number_1, number_2 = features_1.shape[1], features_2.shape[1]
+    if has_zeros is None:
+        has_zeros = bool(np.any(features_1 == 0) or np.any(features_2 == 0))
+    if has_zeros:
+        relation = _order_relation(
+            np.concatenate([features_1, -features_1], axis=1),
+            np.concatenate([features_2, -features_2], axis=1),
+            block_size,
+            row_chunk_size,
+            n_jobs,
+        )
+        return (
+            relation[:number_1, :number_2]
+            | relation[:number_1, number_2:]
+            | relation[number_1:, :number_2]
+            | relation[number_1:, number_2:]
         )
+
+    number_of_elements = features_1.shape[0]
+    if sizes_1 is None:
+        sizes_1 = np.sum(features_1 == 1, axis=0)
+    if sizes_2 is None:
+        sizes_2 = np.sum(features_2 == 1, axis=0)
+    sizes_1 = sizes_1[:, np.newaxis]
+    sizes_2 = sizes_2[np.newaxis, :]
+    nested = np.zeros((number_1, number_2), dtype=bool)
+
+    def fill_block(block: slice):
+        intersection_sizes = positive_intersection_sizes(
+            features_1[:, block], features_2, row_chunk_size
+        )
+        block_sizes = sizes_1[block]
+        nested[block] = (
+            (intersection_sizes == 0)
+            | (block_sizes == intersection_sizes)
+            | (sizes_2 == intersection_sizes)
+            | (number_of_elements - block_sizes - sizes_2 + intersection_sizes == 0)
+        )
+
+    _fill_blocks(fill_block, number_1, block_size, n_jobs)
+    return nested
+
+
+def _order_relation(
+    left: np.ndarray,
+    right: np.ndarray,
+    block_size: int,
+    row_chunk_size: int,
+    n_jobs: Optional[int],
+) -> np.ndarray:
+    """
+    Computes for all pairs of columns whether the column of left is less or equal to the
+    column of right in every row.
+    """
+    number_of_elements = left.shape[0]
+    has_zeros = bool(np.any(left == 0) or np.any(right == 0))
+    relation = np.zeros((left.shape[1], right.shape[1]), dtype=bool)
+
+    def fill_block(block: slice):
+        # a column is greater than another in a row if it is 1 where the other is not,
+        # or 0 where the other is -1
+        violations = np.zeros((block.stop - block.start, right.shape[1]))
+        for row_start in range(0, number_of_elements, row_chunk_size):
+            rows = slice(row_start, row_start + row_chunk_size)
+            left_rows, right_rows = left[rows, block], right[rows]
+            violations += (left_rows == 1).T.astype(np.float64) @ (
+                right_rows != 1
+            ).astype(np.float64)
+            if has_zeros:
+                violations += (left_rows == 0).T.astype(np.float64) @ (
+                    right_rows == -1
+                ).astype(np.float64)
+        relation[block] = violations == 0
+
+    _fill_blocks(fill_block, left.shape[1], block_size, n_jobs)
+    return relation
+
+
+def _fill_blocks(
+    fill_block: Callable[[slice], None],
+    number_of_columns: int,
+    block_size: int,
+    n_jobs: Optional[int],
+):
+    blocks = [
+        slice(start, min(start + block_size, number_of_columns))
+        for start in range(0, number_of_columns, block_size)
+    ]
+    if n_jobs is None or n_jobs <= 1 or len(blocks) <= 1:
+        for block in blocks:
+            fill_block(block)
+    else:
+        # the matrix products release the GIL, so the blocks are computed in threads
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(fill_block, blocks))
+
+
+class _FeatureSource:
+    """
+    Original features, which are read from an array, typically memory-mapped, either
+    of shape (number of elements, number of features) or bit-packed.
+    """
+
+    def __init__(
+        self,
+        features: Optional[np.ndarray] = None,
+        packed: Optional[np.ndarray] = None,
+        number_of_elements: Optional[int] = None,
+    ):
+        self.features = features
+        self.packed = packed
+        if features is not None:
+            self.number_of_elements, self.number_of_features = features.shape
+        else:
+            self.number_of_elements = number_of_elements
+            self.number_of_features = packed.shape[0]
+
+    def columns(self, start: int, stop: int) -> np.ndarray:
+        if self.features is not None:
+            return self.features[:, start:stop]
+        return self._unpack(
+            self.packed[start:stop], slice(0, self.number_of_elements)
+        ).T
+
+    def rows(self, rows: slice, columns: np.ndarray) -> np.ndarray:
+        if self.features is not None:
+            return np.asarray(self.features[rows], dtype=np.int8)[:, columns]
+        return self._unpack(self.packed[columns], rows).T
+
+    @staticmethod
+    def _unpack(packed: np.ndarray, rows: slice) -> np.ndarray:
+        unpacked = np.unpackbits(
+            packed[:, rows.start // 8 : (rows.stop + 7) // 8],
+            axis=1,
+            count=rows.stop - rows.start + rows.start % 8,
+        )[:, rows.start % 8 :]
+        return 2 * unpacked.astype(np.int8) - 1
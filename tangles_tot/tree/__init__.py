@@ -2,7 +2,14 @@
 Package containing the core tree of tangles objects.
 """
 
-from .build_tot import build_tree_of_tangles_from_sweep
+from .build_tot import (
+    build_tree_of_tangles_from_sweep,
+    build_trees_of_tangles_from_sweep,
+)
+from .update_tot import (
+    update_tree_of_tangles_from_sweep,
+    add_features_to_tree_of_tangles,
+)
 from .tree_of_tangles import (
     TreeOfTangles,
     FeatureLabels,
@@ -11,12 +18,19 @@ from .tree_of_tangles import (
     LocationIdx,
 )
 from .feature_tree import FeatureTree, Location
+from .compact_feature_tree import CompactFeatureTree
+from .order_cache import OrderCache
 
 __all__ = [
     "build_tree_of_tangles_from_sweep",
+    "build_trees_of_tangles_from_sweep",
+    "update_tree_of_tangles_from_sweep",
+    "add_features_to_tree_of_tangles",
     "TreeOfTangles",
     "FeatureTree",
+    "CompactFeatureTree",
     "Location",
+    "OrderCache",
     "FeatureLabels",
     "FeatureSpecification",
     "LocationLabels",
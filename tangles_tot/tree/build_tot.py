@@ -1,15 +1,162 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 import numpy as np
 from tangles_tot._tangles_lib import TangleSweep, LessOrEqFunc
 from tangles_tot._typing import FeatureId, Feature
 from .tree_of_tangles import TreeOfTangles
 from .feature_tree import FeatureTree, Location
+from .nestedness import find_crossing_pair
+from .order_cache import OrderCache
+from .containment_tree import (
+    find_containment_tree,
+    find_containment_tree_in_arrays,
+    NO_PARENT,
+)
 
 
 def build_tree_of_tangles_from_sweep(
     tangle_sweep: TangleSweep,
     agreement_value: Optional[int] = None,
+    order_cache: Optional[OrderCache] = None,
 ) -> TreeOfTangles:
+    """
+    Builds the tree of tangles of the efficient distinguishers of the maximal tangles
+    of the tangle sweep of at least the agreement value.
+
+    Args:
+        tangle_sweep: A tangle sweep whose efficient distinguishers have been uncrossed.
+        agreement_value: Optional agreement value, defaults to one more than the limit of the sweep.
+        order_cache: Optional OrderCache of the order of the tangle sweep, containing at least
+            the efficient distinguishers. Can be shared between calls on the same sweep.
+
+    Returns:
+        The tree of tangles.
+    """
+    is_le, efficient_distinguishers = _get_efficient_distinguishers(
+        tangle_sweep, agreement_value
+    )
+    if order_cache is None:
+        order_cache = OrderCache(is_le, efficient_distinguishers)
+    _check_nested(efficient_distinguishers, order_cache.is_le)
+    feature_tree = _build_feature_tree_from_nested_features(
+        efficient_distinguishers, is_le, order_cache
+    )
+    return TreeOfTangles(
+        feature_tree=feature_tree,
+    )
+
+
+def build_trees_of_tangles_from_sweep(
+    tangle_sweep: TangleSweep,
+    agreement_values: list[Optional[int]],
+    n_jobs: Optional[int] = None,
+) -> dict[Optional[int], TreeOfTangles]:
+    """
+    Builds the trees of tangles of a tangle sweep for several agreement values in one pass.
+
+    The feature arrays and the order cache are shared between the agreement values and
+    the nestedness of the efficient distinguishers is checked once for all of them. The
+    results are identical to calling build_tree_of_tangles_from_sweep once per agreement value.
+
+    Args:
+        tangle_sweep: A tangle sweep whose efficient distinguishers have been uncrossed.
+        agreement_values: The agreement values to build trees of tangles for.
+        n_jobs: Optional number of processes the trees are built in. The trees are only built
+            in parallel if the order of the sweep is the order of a feature system.
+
+    Returns:
+        A dictionary containing the tree of tangles of every agreement value.
+    """
+    is_le = None
+    distinguishers = {}
+    for agreement_value in agreement_values:
+        is_le, distinguishers[agreement_value] = _get_efficient_distinguishers(
+            tangle_sweep, agreement_value
+        )
+    if len(distinguishers) == 0:
+        return {}
+    all_distinguishers = np.unique(
+        np.concatenate([np.asarray(ids, dtype=int) for ids in distinguishers.values()])
+    )
+    order_cache = OrderCache(is_le, all_distinguishers)
+    if find_crossing_pair(all_distinguishers, order_cache.is_le) is not None:
+        for efficient_distinguishers in distinguishers.values():
+            _check_nested(efficient_distinguishers, order_cache.is_le)
+
+    if n_jobs is None or n_jobs <= 1 or order_cache.features is None:
+        feature_trees = [
+            _build_feature_tree_from_nested_features(
+                efficient_distinguishers, is_le, order_cache
+            )
+            for efficient_distinguishers in distinguishers.values()
+        ]
+    else:
+        feature_trees = _build_feature_trees_in_processes(
+            list(distinguishers.values()), order_cache, n_jobs
+        )
+    return {
+        agreement_value: TreeOfTangles(feature_tree=feature_tree)
+        for agreement_value, feature_tree in zip(distinguishers, feature_trees)
+    }
+
+
+def _build_feature_trees_in_processes(
+    distinguishers: list[np.ndarray], order_cache: OrderCache, n_jobs: int
+) -> list[FeatureTree]:
+    positions = {
+        feature_id: position
+        for position, feature_id in enumerate(order_cache.feature_ids.tolist())
+    }
+    # the workers share the feature arrays through a memory map instead of receiving
+    # a copy with every task
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "features.npy")
+        np.save(path, order_cache.features)
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_initialize_worker,
+            initargs=(path,),
+        ) as executor:
+            return list(
+                executor.map(
+                    _build_feature_tree_in_worker,
+                    distinguishers,
+                    [
+                        np.array(
+                            [
+                                positions[feature_id]
+                                for feature_id in efficient_distinguishers
+                            ],
+                            dtype=int,
+                        )
+                        for efficient_distinguishers in distinguishers
+                    ],
+                )
+            )
+
+
+_worker_features: Optional[np.ndarray] = None
+
+
+def _initialize_worker(path: str):
+    global _worker_features
+    _worker_features = np.load(path, mmap_mode="r")
+
+
+def _build_feature_tree_in_worker(
+    nested_feature_ids: np.ndarray, positions: np.ndarray
+) -> FeatureTree:
+    return _build_feature_tree_from_arrays(
+        nested_feature_ids, np.asarray(_worker_features[:, positions])
+    )
+
+
+def _get_efficient_distinguishers(
+    tangle_sweep: TangleSweep,
+    agreement_value: Optional[int],
+) -> tuple[LessOrEqFunc, np.ndarray]:
     if not isinstance(tangle_sweep, TangleSweep):
         raise ValueError(
             f"attribute {tangle_sweep}, passed in for tangle_sweep must be a TangleSweep"
@@ -28,26 +175,40 @@ def build_tree_of_tangles_from_sweep(
     _, efficient_distinguishers = tangle_sweep.tree.get_efficient_distinguishers(
         agreement=agreement_value
     )
-    if not _are_efficient_distinguishers_nested(is_le, efficient_distinguishers):
-        raise ValueError(
-            f"The efficient distinguishers of the tangles of the tangle sweep"
-            "have not been uncrossed. Please uncross the efficient distinguishers of the tangle sweep"
-            "before providing it to the build tree_of_tangles method"
-        )
-    feature_tree = _build_feature_tree_from_nested_features(
-        efficient_distinguishers, is_le
-    )
-    return TreeOfTangles(
-        feature_tree=feature_tree,
+    return is_le, efficient_distinguishers
+
+
+def _check_nested(efficient_distinguishers: np.ndarray, is_le: LessOrEqFunc):
+    crossing_pair = find_crossing_pair(efficient_distinguishers, is_le)
+    if crossing_pair is not None:
+        _raise_not_uncrossed(crossing_pair)
+
+
+def _raise_not_uncrossed(crossing_pair: tuple[FeatureId, FeatureId]):
+    raise ValueError(
+        f"The efficient distinguishers {crossing_pair[0]} and {crossing_pair[1]} of the tangles of the tangle sweep "
+        "cross, they have not been uncrossed. Please uncross the efficient distinguishers of the tangle sweep, "
+        "for example using tangles_tot.search.uncross_distinguishers, before providing it to the build "
+        "tree_of_tangles method"
     )
 
 
 def _build_feature_tree_from_nested_features(
     efficient_distinguishers: np.ndarray,
     is_le: LessOrEqFunc,
+    order_cache: Optional[OrderCache] = None,
 ) -> FeatureTree:
+    if order_cache is None:
+        order_cache = OrderCache(is_le, efficient_distinguishers)
+    features = order_cache.feature_arrays(efficient_distinguishers)
+    if features is not None:
+        # the containment tree is computed from the arrays, without filling the
+        # dense order relation of the cache
+        return _build_feature_tree_from_arrays(efficient_distinguishers, features)
     _edges = list(efficient_distinguishers)
-    _locations, _locations_of_edge = _find_locations(efficient_distinguishers, is_le)
+    _locations, _locations_of_edge = _find_locations(
+        efficient_distinguishers, order_cache.is_le
+    )
 
     return FeatureTree(
         _edges=_edges,
@@ -56,118 +217,99 @@ def _build_feature_tree_from_nested_features(
     )
 
 
-def _find_locations(nested_feature_ids: np.ndarray, is_le: LessOrEqFunc) -> FeatureTree:
-    _locations = []
-    _locations_of_edge: dict[
-        FeatureId, tuple[Optional[Location], Optional[Location]]
-    ] = {}
+def _build_feature_tree_from_arrays(
+    nested_feature_ids: np.ndarray, features: np.ndarray
+) -> FeatureTree:
+    specifications, parents = (
+        find_containment_tree_in_arrays(features)
+        if len(nested_feature_ids) > 0
+        else (np.zeros(0, dtype=np.int8), np.zeros(0, dtype=int))
+    )
+    _locations, _locations_of_edge = _locations_from_containment_tree(
+        nested_feature_ids, specifications, parents
+    )
+    return FeatureTree(
+        _edges=list(nested_feature_ids),
+        _locations=_locations,
+        _locations_of_edge=_locations_of_edge,
+    )
 
-    all_features = [(feature_id, 1) for feature_id in nested_feature_ids] + [
-        (feature_id, -1) for feature_id in nested_feature_ids
-    ]
 
-    for feature in all_features:
-        if _is_feature_in_location_already(feature, _locations_of_edge):
+def _find_locations(
+    nested_feature_ids: np.ndarray, is_le: LessOrEqFunc
+) -> tuple[
+    list[Location], dict[FeatureId, tuple[Optional[Location], Optional[Location]]]
+]:
+    specifications, parents = find_containment_tree(nested_feature_ids, is_le)
+    return _locations_from_containment_tree(nested_feature_ids, specifications, parents)
+
+
+def _locations_from_containment_tree(
+    nested_feature_ids: np.ndarray, specifications: np.ndarray, parents: np.ndarray
+) -> tuple[
+    list[Location], dict[FeatureId, tuple[Optional[Location], Optional[Location]]]
+]:
+    number_of_features = len(nested_feature_ids)
+
+    # every location is the star of an oriented feature pointing towards it together
+    # with the inverses of the maximal oriented features less than it. Going away from
+    # the root, these are the children in the containment tree.
+    stars: dict[int, list[int]] = {NO_PARENT: []}
+    for idx in range(number_of_features):
+        stars[idx] = [idx]
+    for idx in range(number_of_features):
+        stars[parents[idx]].append(idx + number_of_features)
+
+    def as_feature(position: int) -> Feature:
+        idx = position % number_of_features
+        towards_parent = position >= number_of_features
+        specification = -specifications[idx] if towards_parent else specifications[idx]
+        return (nested_feature_ids[idx], int(specification))
+
+    def position_in_all_features(feature: Feature, idx: int) -> int:
+        return idx if feature[1] == 1 else idx + number_of_features
+
+    # order the locations and their features as if the oriented features were visited
+    # in the order [(id, 1) for id in ids] + [(id, -1) for id in ids]
+    ordered_stars = []
+    for star in stars.values():
+        if len(star) == 0:
             continue
-        inverse_of_other_elements_in_location = _find_maximal_features_less_than(
-            feature, all_features, is_le
-        )
-        location_features = [feature] + [
-            (feature_id, -specification)
-            for (feature_id, specification) in inverse_of_other_elements_in_location
+        features = [as_feature(position) for position in star]
+        indices = [position % number_of_features for position in star]
+        positions = [
+            position_in_all_features(feature, idx)
+            for feature, idx in zip(features, indices)
         ]
-        _locations.append(
-            Location(
-                features=location_features,
-                node_idx=len(_locations),
-            )
+        first = int(np.argmin(positions))
+        others = sorted(
+            (idx for idx in range(len(star)) if idx != first),
+            key=lambda idx: (positions[idx] + number_of_features)
+            % (2 * number_of_features),
         )
-        for feature_id, specification in location_features:
-            if feature_id not in _locations_of_edge:
-                _locations_of_edge[feature_id] = (None, None)
+        ordered_stars.append(
+            (positions[first], [features[first]] + [features[idx] for idx in others])
+        )
+    ordered_stars.sort(key=lambda star: star[0])
+
+    _locations = [
+        Location(features=location_features, node_idx=node_idx)
+        for node_idx, (_, location_features) in enumerate(ordered_stars)
+    ]
+    _locations_of_edge: dict[
+        FeatureId, tuple[Optional[Location], Optional[Location]]
+    ] = {feature_id: (None, None) for feature_id in nested_feature_ids}
+    for location in _locations:
+        for feature_id, specification in location.features:
             if specification == 1:
                 _locations_of_edge[feature_id] = (
-                    _locations[-1],
+                    location,
                     _locations_of_edge[feature_id][1],
                 )
             else:
                 _locations_of_edge[feature_id] = (
                     _locations_of_edge[feature_id][0],
-                    _locations[-1],
+                    location,
                 )
 
     return _locations, _locations_of_edge
-
-
-def _find_maximal_features_less_than(
-    feature: Feature,
-    all_features: list[Feature],
-    is_le: LessOrEqFunc,
-) -> list[Feature]:
-    maximal_lesser_features = []
-
-    for potential_feature in all_features:
-        if potential_feature == feature:
-            continue
-        if not is_le(
-            potential_feature[0], potential_feature[1], feature[0], feature[1]
-        ):
-            continue
-        if any(
-            [
-                is_le(
-                    potential_feature[0],
-                    potential_feature[1],
-                    current_feature[0],
-                    current_feature[1],
-                )
-                for current_feature in maximal_lesser_features
-            ]
-        ):
-            continue
-        maximal_lesser_features = [
-            current_feature
-            for current_feature in maximal_lesser_features
-            if not is_le(
-                current_feature[0],
-                current_feature[1],
-                potential_feature[0],
-                potential_feature[1],
-            )
-        ]
-        maximal_lesser_features.append(potential_feature)
-
-    return maximal_lesser_features
-
-
-def _is_feature_in_location_already(
-    feature: Feature,
-    _locations_of_edge: dict[FeatureId, tuple[Optional[Location], Optional[Location]]],
-) -> bool:
-    if _locations_of_edge.get(feature[0]) is None:
-        return False
-    if feature[1] == 1 and _locations_of_edge.get(feature[0])[0] is None:
-        return False
-    if feature[1] == -1 and _locations_of_edge.get(feature[0])[1] is None:
-        return False
-    return True
-
-
-def _are_efficient_distinguishers_nested(
-    is_le: LessOrEqFunc,
-    efficient_distinguishers: np.ndarray,
-) -> bool:
-    for i in range(len(efficient_distinguishers)):
-        for j in range(i + 1, len(efficient_distinguishers)):
-            if not _is_nested(efficient_distinguishers[i], efficient_distinguishers[j], is_le):
-                return False
-    return True
-
-
-def _is_nested(feature_1: FeatureId, feature_2: FeatureId, is_le: LessOrEqFunc) -> bool:
-    return (
-        is_le(feature_1, 1, feature_2, 1)
-        or is_le(feature_1, -1, feature_2, 1)
-        or is_le(feature_1, 1, feature_2, -1)
-        or is_le(feature_1, -1, feature_2, -1)
-    )
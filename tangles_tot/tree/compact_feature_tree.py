@@ -0,0 +1,326 @@
+from typing import Optional, Union
+import json
+import os
+import numpy as np
+from tangles_tot._typing import Feature, FeatureId
+from .feature_tree import FeatureTree, Location, _IndexedTree, _FeatureTreeIndex
+
+NO_LOCATION = -1
+
+FILE_MAGIC = b"TOTTREE\x00"
+FILE_VERSION = 1
+# the arrays are aligned, such that they can be memory-mapped with any dtype
+_ALIGNMENT = 64
+_TREE_ARRAYS = [
+    "edge_ids",
+    "endpoints",
+    "location_offsets",
+    "location_feature_ids",
+    "location_specifications",
+]
+
+
+class CompactFeatureTree(_IndexedTree):
+    """
+    Encodes the tree structure of a set of nested features in NumPy arrays.
+
+    Implements the same public methods as FeatureTree and converts losslessly to and
+    from a FeatureTree. Instead of keeping a Location object for every node, the features
+    of all locations are stored in two flat arrays, the Locations are only created when
+    they are requested.
+
+    Attributes:
+        edge_ids: The feature ids of the nested features, one per edge.
+        endpoints: Array of shape (number of edges, 2) containing the node indices of the
+            locations containing (feature_id, 1) and (feature_id, -1) of every edge.
+        location_offsets: The features of the location with node index i are stored at
+            location_offsets[i]:location_offsets[i + 1] of the flat arrays.
+        location_feature_ids: The feature ids of the features of all locations.
+        location_specifications: The specifications of the features of all locations.
+    """
+
+    def __init__(
+        self,
+        edge_ids: np.ndarray,
+        endpoints: np.ndarray,
+        location_offsets: np.ndarray,
+        location_feature_ids: np.ndarray,
+        location_specifications: np.ndarray,
+    ):
+        self.edge_ids = np.asarray(edge_ids)
+        self.endpoints = np.asarray(endpoints).reshape(len(self.edge_ids), 2)
+        self.location_offsets = np.asarray(location_offsets)
+        self.location_feature_ids = np.asarray(location_feature_ids)
+        self.location_specifications = np.asarray(location_specifications)
+        self._index: Optional[_FeatureTreeIndex] = None
+
+    @staticmethod
+    def from_feature_tree(feature_tree: FeatureTree) -> "CompactFeatureTree":
+        """
+        Builds the compact representation of a FeatureTree.
+        """
+        locations = feature_tree.locations()
+        if any(location.node_idx != idx for idx, location in enumerate(locations)):
+            raise ValueError(
+                "the node indices of the locations of the feature tree must be their positions"
+            )
+        feature_ids = feature_tree.feature_ids()
+        endpoints = np.array(
+            [
+                [
+                    _node_idx_or_no_location(
+                        feature_tree.get_location_containing((feature_id, 1))
+                    ),
+                    _node_idx_or_no_location(
+                        feature_tree.get_location_containing((feature_id, -1))
+                    ),
+                ]
+                for feature_id in feature_ids
+            ],
+            dtype=np.int64,
+        ).reshape(len(feature_ids), 2)
+        location_offsets = np.zeros(len(locations) + 1, dtype=np.int64)
+        location_offsets[1:] = np.cumsum(
+            [len(location.features) for location in locations]
+        )
+        return CompactFeatureTree(
+            edge_ids=np.array(feature_ids, dtype=np.int64),
+            endpoints=endpoints,
+            location_offsets=location_offsets,
+            location_feature_ids=np.array(
+                [
+                    feature_id
+                    for location in locations
+                    for feature_id, _ in location.features
+                ],
+                dtype=np.int64,
+            ),
+            location_specifications=np.array(
+                [
+                    specification
+                    for location in locations
+                    for _, specification in location.features
+                ],
+                dtype=np.int8,
+            ),
+        )
+
+    def to_feature_tree(self) -> FeatureTree:
+        """
+        Builds the FeatureTree represented by the arrays.
+        """
+        locations = self.locations()
+        return FeatureTree(
+            _edges=self.edge_ids.tolist(),
+            _locations=locations,
+            _locations_of_edge={
+                feature_id: tuple(
+                    None if node_idx == NO_LOCATION else locations[node_idx]
+                    for node_idx in endpoints
+                )
+                for feature_id, endpoints in zip(
+                    self.edge_ids.tolist(), self.endpoints.tolist()
+                )
+            },
+        )
+
+    def feature_ids(self) -> list[FeatureId]:
+        """The feature ids of the nested features in the feature tree."""
+        return self.edge_ids.tolist()
+
+    def contains_edge(self, feature_id: FeatureId) -> bool:
+        """
+        Checks if a feature id is contained in the feature tree.
+        """
+        return feature_id in self._get_index().edge_positions
+
+    def number_of_locations(self) -> int:
+        """Returns the number of nodes of the feature tree."""
+        return len(self.location_offsets) - 1
+
+    def locations(self) -> list[Location]:
+        """Returns a list of all of the nodes of the feature tree."""
+        return [
+            self.get_location(node_idx)
+            for node_idx in range(self.number_of_locations())
+        ]
+
+    def get_location(self, node_idx: int) -> Location:
+        """
+        Gets a location of the feature tree from a node index.
+        """
+        start, stop = (
+            self.location_offsets[node_idx],
+            self.location_offsets[node_idx + 1],
+        )
+        return Location(
+            features=list(
+                zip(
+                    self.location_feature_ids[start:stop].tolist(),
+                    self.location_specifications[start:stop].tolist(),
+                )
+            ),
+            node_idx=node_idx,
+        )
+
+    def get_location_containing(self, feature: Feature) -> Optional[Location]:
+        node_idx = self.get_node_idx_of_location_containing(feature)
+        return None if node_idx == NO_LOCATION else self.get_location(node_idx)
+
+    def get_node_idx_of_location_containing(self, feature: Feature) -> int:
+        if feature[1] not in [1, -1]:
+            raise ValueError(
+                f"feature variable {feature} of type Feature has invalid form"
+            )
+        position = self._get_index().edge_positions[feature[0]]
+        return int(self.endpoints[position, 0 if feature[1] == 1 else 1])
+
+    def save(
+        self,
+        path: Union[str, os.PathLike],
+        labels: Optional[dict[FeatureId, str]] = None,
+    ):
+        """
+        Saves the arrays of the tree, and optionally a label for every edge, in a versioned
+        binary file, which can be opened by CompactFeatureTree.load.
+
+        Args:
+            path: The path of the file.
+            labels: Optional labels of the edges, by feature id.
+        """
+        arrays = {
+            "edge_ids": np.asarray(self.edge_ids, dtype="<i8"),
+            "endpoints": np.asarray(self.endpoints, dtype="<i8"),
+            "location_offsets": np.asarray(self.location_offsets, dtype="<i8"),
+            "location_feature_ids": np.asarray(self.location_feature_ids, dtype="<i8"),
+            "location_specifications": np.asarray(
+                self.location_specifications, dtype="i1"
+            ),
+        }
+        if labels is not None:
+            encoded = [
+                labels[feature_id].encode("utf-8") if feature_id in labels else b""
+                for feature_id in self.edge_ids.tolist()
+            ]
+            label_offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+            label_offsets[1:] = np.cumsum([len(label) for label in encoded])
+            arrays["label_offsets"] = label_offsets
+            arrays["label_data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            arrays["has_label"] = np.array(
+                [feature_id in labels for feature_id in self.edge_ids.tolist()],
+                dtype=bool,
+            )
+        _write_arrays(path, arrays)
+
+    @staticmethod
+    def load(path: Union[str, os.PathLike], mmap: bool = True) -> "CompactFeatureTree":
+        """
+        Loads a tree saved by CompactFeatureTree.save.
+
+        Args:
+            path: The path of the file.
+            mmap: If True, the arrays are memory-mapped instead of being read into memory.
+
+        Returns:
+            The tree.
+
+        Raises:
+            ValueError: If the file is not a saved tree or was saved in an unsupported version.
+        """
+        arrays = _read_arrays(path, mmap)
+        return CompactFeatureTree(*[arrays[name] for name in _TREE_ARRAYS])
+
+    @staticmethod
+    def load_labels(path: Union[str, os.PathLike]) -> Optional[dict[FeatureId, str]]:
+        """
+        Loads the labels of the edges saved by CompactFeatureTree.save.
+
+        Returns:
+            The labels by feature id, or None if no labels were saved.
+        """
+        arrays = _read_arrays(path, mmap=True)
+        if "label_offsets" not in arrays:
+            return None
+        label_data = bytes(arrays["label_data"])
+        offsets = arrays["label_offsets"].tolist()
+        return {
+            feature_id: label_data[offsets[idx] : offsets[idx + 1]].decode("utf-8")
+            for idx, feature_id in enumerate(arrays["edge_ids"].tolist())
+            if arrays["has_label"][idx]
+        }
+
+    def __getstate__(self) -> dict:
+        # the index is rebuilt after unpickling instead of being stored
+        state = self.__dict__.copy()
+        state["_index"] = None
+        return state
+
+    def _get_index(self) -> _FeatureTreeIndex:
+        if self._index is None:
+            self._index = _FeatureTreeIndex.build(
+                edge_ids=self.edge_ids,
+                endpoints=self.endpoints,
+                number_of_locations=self.number_of_locations(),
+            )
+        return self._index
+
+
+def _node_idx_or_no_location(location: Optional[Location]) -> int:
+    return NO_LOCATION if location is None else location.node_idx
+
+
+def _write_arrays(path: Union[str, os.PathLike], arrays: dict[str, np.ndarray]):
+    # the file consists of the magic bytes, the length of a JSON header describing the
+    # arrays, the header and the aligned raw data of the arrays
+    descriptions = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        descriptions[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += array.nbytes
+    header = json.dumps({"version": FILE_VERSION, "arrays": descriptions}).encode()
+    data_start = _aligned(len(FILE_MAGIC) + 8 + len(header))
+    with open(path, "wb") as file:
+        file.write(FILE_MAGIC)
+        file.write(np.uint64(len(header)).astype("<u8").tobytes())
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(data_start + descriptions[name]["offset"])
+            file.write(np.ascontiguousarray(array).tobytes())
+
+
+def _read_arrays(path: Union[str, os.PathLike], mmap: bool) -> dict[str, np.ndarray]:
+    with open(path, "rb") as file:
+        if file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{path} is not a saved tree of tangles.")
+        header_length = int(np.frombuffer(file.read(8), dtype="<u8")[0])
+        header = json.loads(file.read(header_length).decode())
+        if header["version"] > FILE_VERSION:
+            raise ValueError(
+                f"{path} was saved in version {header['version']} of the format, "
+                f"only versions up to {FILE_VERSION} are supported."
+            )
+        data_start = _aligned(len(FILE_MAGIC) + 8 + header_length)
+        arrays = {}
+        for name, description in header["arrays"].items():
+            dtype = np.dtype(description["dtype"])
+            shape = tuple(description["shape"])
+            offset = data_start + description["offset"]
+            if mmap and np.prod(shape) > 0:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode="r", offset=offset, shape=shape
+                )
+            else:
+                file.seek(offset)
+                arrays[name] = np.fromfile(
+                    file, dtype=dtype, count=int(np.prod(shape))
+                ).reshape(shape)
+    return arrays
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
@@ -0,0 +1,127 @@
+import numpy as np
+from tangles_tot._tangles_lib import LessOrEqFunc
+from .order_cache import feature_arrays_from_le_func
+
+DEFAULT_CHUNK_SIZE = 1024
+NO_PARENT = -1
+
+
+def find_containment_tree(
+    nested_feature_ids: np.ndarray,
+    is_le: LessOrEqFunc,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Orients a set of nested features away from a common root location and finds the
+    containment tree of the oriented features.
+
+    Oriented away from a common root, the nested features form a laminar family: two of
+    them are either disjoint or one contains the other. The parent of an oriented feature
+    in the containment tree is the smallest oriented feature strictly containing it.
+
+    If is_le is the order of a feature system, the oriented features are sorted by the size
+    of their sides and the parents are found with vectorized lookups of one representative
+    element per feature. Otherwise the features are inserted one by one into the
+    containment tree using is_le.
+
+    Args:
+        nested_feature_ids: The ids of the nested features.
+        is_le: The order function of the features.
+
+    Returns:
+        The specifications of the features oriented away from the root and the index
+        (into nested_feature_ids) of the parent of each feature, or NO_PARENT.
+    """
+    if len(nested_feature_ids) == 0:
+        return np.zeros(0, dtype=np.int8), np.zeros(0, dtype=int)
+    features = feature_arrays_from_le_func(is_le, nested_feature_ids)
+    if features is None:
+        return _find_containment_tree_using_le_func(nested_feature_ids, is_le)
+    return find_containment_tree_in_arrays(features)
+
+
+def find_containment_tree_in_arrays(
+    features: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the containment tree of the columns of a ±1 array of nested features,
+    oriented such that the first element is not contained in any oriented feature.
+
+    See find_containment_tree.
+    """
+    number_of_elements, number_of_features = features.shape
+    if number_of_elements == 0:
+        # without elements every oriented feature is empty, none contains another
+        return np.ones(number_of_features, dtype=np.int8), np.full(
+            number_of_features, NO_PARENT, dtype=int
+        )
+    specifications = np.where(features[0] == 1, -1, 1).astype(np.int8)
+    contained = features * specifications[np.newaxis, :] == 1
+    sizes = np.sum(contained, axis=0)
+    order = np.lexsort((np.arange(len(sizes)), -sizes))
+    rank = np.empty(len(sizes), dtype=int)
+    rank[order] = np.arange(len(sizes))
+    representatives = np.argmax(contained, axis=0)
+
+    parents = np.full(len(sizes), NO_PARENT, dtype=int)
+    for start in range(0, len(sizes), chunk_size):
+        chunk = np.arange(start, min(start + chunk_size, len(sizes)))
+        # empty features are represented by the first element, which no feature contains
+        is_candidate = contained[representatives[chunk]] & (
+            rank[np.newaxis, :] < rank[chunk, np.newaxis]
+        )
+        candidate_rank = np.where(is_candidate, rank[np.newaxis, :], -1)
+        closest_rank = np.max(candidate_rank, axis=1)
+        has_parent = closest_rank >= 0
+        parents[chunk[has_parent]] = order[closest_rank[has_parent]]
+    return specifications, parents
+
+
+def _find_containment_tree_using_le_func(
+    nested_feature_ids: np.ndarray, is_le: LessOrEqFunc
+) -> tuple[np.ndarray, np.ndarray]:
+    specifications = _orient_away_from_root(nested_feature_ids, is_le)
+    oriented = list(zip(nested_feature_ids, specifications))
+
+    def contains(idx_a: int, idx_b: int) -> bool:
+        return is_le(*oriented[idx_b], *oriented[idx_a])
+
+    children: dict[int, list[int]] = {NO_PARENT: []}
+    parents = np.full(len(oriented), NO_PARENT, dtype=int)
+    for idx in range(len(oriented)):
+        node = NO_PARENT
+        while True:
+            containing_child = next(
+                (child for child in children[node] if contains(child, idx)), None
+            )
+            if containing_child is None:
+                break
+            node = containing_child
+        contained_children = [child for child in children[node] if contains(idx, child)]
+        moved = set(contained_children)
+        children[node] = [child for child in children[node] if child not in moved] + [
+            idx
+        ]
+        children[idx] = contained_children
+        parents[idx] = node
+        parents[contained_children] = idx
+    return specifications, parents
+
+
+def _orient_away_from_root(
+    nested_feature_ids: np.ndarray, is_le: LessOrEqFunc
+) -> np.ndarray:
+    # the root is the location next to the first feature on its positive side
+    first_id = nested_feature_ids[0]
+    specifications = np.ones(len(nested_feature_ids), dtype=np.int8)
+    specifications[0] = -1
+    for idx in range(1, len(nested_feature_ids)):
+        feature_id = nested_feature_ids[idx]
+        if is_le(feature_id, 1, first_id, -1):
+            specifications[idx] = 1
+        elif is_le(feature_id, -1, first_id, -1):
+            specifications[idx] = -1
+        elif is_le(first_id, -1, feature_id, 1):
+            specifications[idx] = -1
+        else:
+            specifications[idx] = 1
+    return specifications
@@ -1,7 +1,12 @@
-from dataclasses import dataclass
-from typing import Optional
+import abc
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+import numpy as np
 from tangles_tot._typing import Specification, Feature, FeatureId, TangleId
 
+DEFAULT_LOCATE_CHUNK_SIZE = 16384
+DEFAULT_LOCATE_MAX_CELLS = 1 << 26
+
 
 @dataclass(frozen=True)
 class Location:
@@ -20,19 +25,271 @@ class Location:
     node_idx: int
 
 
+class _IndexedTree(abc.ABC):
+    """
+    Neighbour and path queries shared by the representations of feature trees,
+    answered from a _FeatureTreeIndex.
+    """
+
+    def neighbours(self, node_idx: int) -> list[int]:
+        """
+        Returns the node indices of the locations adjacent to a location.
+        """
+        index = self._get_index()
+        start, stop = index.offsets[node_idx], index.offsets[node_idx + 1]
+        return index.adjacent_locations[start:stop].tolist()
+
+    def incident_feature_ids(self, node_idx: int) -> list[FeatureId]:
+        """
+        Returns the feature ids of the edges incident to a location.
+        """
+        index = self._get_index()
+        start, stop = index.offsets[node_idx], index.offsets[node_idx + 1]
+        return index.edge_ids[index.adjacent_edges[start:stop]].tolist()
+
+    def root(self) -> int:
+        """
+        Returns the node index of the root location, the first location of the tree.
+        """
+        return self._get_index().root
+
+    def parent(self, node_idx: int) -> Optional[int]:
+        """
+        Returns the node index of the parent of a location when the tree is rooted at
+        the root location, or None for the root itself.
+        """
+        parent = self._get_index().parents[node_idx]
+        return None if parent < 0 else int(parent)
+
+    def children(self, node_idx: int) -> list[int]:
+        """
+        Returns the node indices of the children of a location when the tree is rooted
+        at the root location.
+        """
+        parents = self._get_index().parents
+        return [
+            neighbour
+            for neighbour in self.neighbours(node_idx)
+            if parents[neighbour] == node_idx
+        ]
+
+    def path(self, node_idx_a: int, node_idx_b: int) -> list[FeatureId]:
+        """
+        Returns the feature ids of the edges on the path from one location to another,
+        in the order in which the path passes them.
+        """
+        index = self._get_index()
+        edges_from_a, edges_from_b = [], []
+        while index.depths[node_idx_a] > index.depths[node_idx_b]:
+            edges_from_a.append(index.parent_edges[node_idx_a])
+            node_idx_a = index.parents[node_idx_a]
+        while index.depths[node_idx_b] > index.depths[node_idx_a]:
+            edges_from_b.append(index.parent_edges[node_idx_b])
+            node_idx_b = index.parents[node_idx_b]
+        while node_idx_a != node_idx_b:
+            edges_from_a.append(index.parent_edges[node_idx_a])
+            node_idx_a = index.parents[node_idx_a]
+            edges_from_b.append(index.parent_edges[node_idx_b])
+            node_idx_b = index.parents[node_idx_b]
+        return index.edge_ids[
+            np.array(edges_from_a + edges_from_b[::-1], dtype=int)
+        ].tolist()
+
+    def lowest_common_ancestors(
+        self, node_indices_a: np.ndarray, node_indices_b: np.ndarray
+    ) -> np.ndarray:
+        """
+        Returns the node indices of the lowest common ancestors of pairs of locations when
+        the tree is rooted at the root location.
+
+        Uses an Euler tour of the tree and a sparse table of the depths along the tour,
+        which are built the first time it is needed. Afterwards every pair costs O(1).
+
+        Args:
+            node_indices_a: Node indices of the first locations of the pairs.
+            node_indices_b: Node indices of the second locations of the pairs.
+
+        Returns:
+            Array containing the node index of the lowest common ancestor of every pair.
+        """
+        return (
+            self._get_index()
+            .lowest_common_ancestors()
+            .query(np.asarray(node_indices_a), np.asarray(node_indices_b))
+        )
+
+    def distances(
+        self, node_indices_a: np.ndarray, node_indices_b: np.ndarray
+    ) -> np.ndarray:
+        """
+        Returns the number of edges on the paths between pairs of locations.
+        """
+        depths = self._get_index().depths
+        node_indices_a = np.asarray(node_indices_a)
+        node_indices_b = np.asarray(node_indices_b)
+        ancestors = self.lowest_common_ancestors(node_indices_a, node_indices_b)
+        return depths[node_indices_a] + depths[node_indices_b] - 2 * depths[ancestors]
+
+    def paths(
+        self, node_indices_a: np.ndarray, node_indices_b: np.ndarray
+    ) -> list[list[FeatureId]]:
+        """
+        Returns the feature ids of the edges on the paths between pairs of locations,
+        in the order in which each path passes them.
+
+        All paths are walked up to the lowest common ancestor at the same time, one edge
+        per step, so the cost is linear in the total length of the paths.
+        """
+        index = self._get_index()
+        node_indices_a = np.asarray(node_indices_a)
+        node_indices_b = np.asarray(node_indices_b)
+        ancestors = self.lowest_common_ancestors(node_indices_a, node_indices_b)
+        steps_a = index.depths[node_indices_a] - index.depths[ancestors]
+        steps_b = index.depths[node_indices_b] - index.depths[ancestors]
+        lengths = steps_a + steps_b
+
+        queries, positions, edges = [], [], []
+        for start, steps, position_of_step in [
+            (node_indices_a, steps_a, lambda step: np.full(len(steps_a), step)),
+            (node_indices_b, steps_b, lambda step: lengths - 1 - step),
+        ]:
+            current = start.copy()
+            step = 0
+            active = np.nonzero(steps > step)[0]
+            while len(active) > 0:
+                queries.append(active)
+                positions.append(position_of_step(step)[active])
+                edges.append(index.parent_edges[current[active]])
+                current[active] = index.parents[current[active]]
+                step += 1
+                active = active[steps[active] > step]
+
+        queries = np.concatenate(queries) if queries else np.zeros(0, dtype=int)
+        positions = np.concatenate(positions) if positions else np.zeros(0, dtype=int)
+        edges = np.concatenate(edges) if edges else np.zeros(0, dtype=int)
+        order = np.lexsort((positions, queries))
+        feature_ids = index.edge_ids[edges[order]].tolist()
+        ends = np.cumsum(lengths).tolist()
+        return [
+            feature_ids[end - length : end]
+            for end, length in zip(ends, lengths.tolist())
+        ]
+
+    def locate(
+        self,
+        points: np.ndarray,
+        feature_ids: Optional[np.ndarray] = None,
+        chunk_size: int = DEFAULT_LOCATE_CHUNK_SIZE,
+    ) -> np.ndarray:
+        """
+        Finds the location of the tree each point falls into.
+
+        Starting at the root, every point moves along an edge to a child location if it
+        lies on the side of the edge feature pointing towards the child. This is done for
+        all points of a chunk and a batch of the edges of a depth of the tree at once, only
+        the current location of every point is kept.
+
+        Args:
+            points: Array of shape (number of points, number of features) with values 1 and -1.
+                Can be a np.memmap, it is only read chunk by chunk.
+            feature_ids: Optional feature ids of the columns of points. If not provided, the
+                columns of points are the feature ids.
+            chunk_size: Number of points processed at once.
+
+        Returns:
+            Array containing the node index of the location of every point.
+        """
+        column_of_feature = (
+            {feature_id: column for column, feature_id in enumerate(feature_ids)}
+            if feature_ids is not None
+            else None
+        )
+        locations = np.empty(len(points), dtype=int)
+        for start in range(0, len(points), chunk_size):
+            chunk = np.asarray(points[start : start + chunk_size])
+            locations[start : start + len(chunk)] = self._locate_columns(
+                lambda edge_ids: chunk[
+                    :,
+                    (
+                        edge_ids
+                        if column_of_feature is None
+                        else [column_of_feature[feature_id] for feature_id in edge_ids]
+                    ),
+                ],
+                len(chunk),
+            )
+        return locations
+
+    def _locate_columns(
+        self,
+        read_columns: Callable[[np.ndarray], np.ndarray],
+        number_of_points: int,
+        max_cells: int = DEFAULT_LOCATE_MAX_CELLS,
+    ) -> np.ndarray:
+        """
+        Locates points whose values on the edge features are read by read_columns, which
+        returns an array of shape (number of points, number of edge ids) for an array of
+        edge ids. At most max_cells values are read at once.
+        """
+        index = self._get_index()
+        children = np.nonzero(index.parents >= 0)[0]
+        children = children[np.argsort(index.depths[children], kind="stable")]
+        child_parents = index.parents[children]
+        child_edges = index.parent_edges[children]
+        child_specifications = np.where(
+            index.endpoints[child_edges, 0] == children, 1, -1
+        )
+        child_edge_ids = index.edge_ids[child_edges]
+        level_ends = np.searchsorted(
+            index.depths[children],
+            np.arange(1, np.max(index.depths, initial=0) + 1),
+            side="right",
+        )
+        batch_size = max(1, max_cells // max(1, number_of_points))
+
+        current = np.full(number_of_points, index.root, dtype=int)
+        level_start = 0
+        for level_end in level_ends:
+            for start in range(level_start, level_end, batch_size):
+                batch = slice(start, min(start + batch_size, level_end))
+                below = (
+                    np.asarray(read_columns(child_edge_ids[batch]))
+                    * child_specifications[np.newaxis, batch]
+                    == 1
+                )
+                # the children of a location are disjoint, a point moves to at most one
+                moves = below & (
+                    current[:, np.newaxis] == child_parents[np.newaxis, batch]
+                )
+                moved = np.flatnonzero(np.any(moves, axis=1))
+                current[moved] = children[batch][np.argmax(moves[moved], axis=1)]
+            level_start = level_end
+        return current
+
+    @abc.abstractmethod
+    def _get_index(self) -> "_FeatureTreeIndex":
+        pass
+
+
 @dataclass
-class FeatureTree:
+class FeatureTree(_IndexedTree):
     """
     Encodes the tree structure of a set of nested features.
 
     Consists of nodes which are Locations, connected by FeatureEdges.
 
     The FeatureEdges correspond to the nested features.
+
+    Membership, neighbour and path queries use an index which is built the first time
+    it is needed. The index assumes that the tree is not modified afterwards.
     """
 
     _edges: list[FeatureId]
     _locations: list[Location]
     _locations_of_edge: dict[FeatureId, tuple[Location, Location]]
+    _index: Optional["_FeatureTreeIndex"] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def feature_ids(self) -> list[FeatureId]:
         """The feature ids of the nested features in the feature tree."""
@@ -42,7 +299,7 @@ class FeatureTree:
         """
         Checks if a feature id is contained in the feature tree.
         """
-        return feature_id in self._edges
+        return feature_id in self._get_index().edge_positions
 
     def locations(self) -> list[Location]:
         """Returns a list of all of the nodes of the FeatureTree."""
@@ -63,3 +320,192 @@ class FeatureTree:
 
     def get_node_idx_of_location_containing(self, feature: Feature) -> int:
         return self.get_location_containing(feature).node_idx
+
+    def _get_index(self) -> "_FeatureTreeIndex":
+        if self._index is None:
+            self._index = _FeatureTreeIndex.build(
+                edge_ids=np.array(self._edges, dtype=int),
+                endpoints=np.array(
+                    [
+                        [
+                            self.get_node_idx_of_location_containing((feature_id, 1)),
+                            self.get_node_idx_of_location_containing((feature_id, -1)),
+                        ]
+                        for feature_id in self._edges
+                    ],
+                    dtype=int,
+                ).reshape(len(self._edges), 2),
+                number_of_locations=len(self._locations),
+            )
+        return self._index
+
+
+@dataclass
+class _FeatureTreeIndex:
+    """
+    Index of a feature tree.
+
+    Attributes:
+        edge_ids: The feature ids of the edges of the tree.
+        edge_positions: Maps each feature id to its position in the edges of the tree.
+        endpoints: The node indices of the locations containing (feature_id, 1) and
+            (feature_id, -1), for the feature id at each position.
+        offsets: The adjacency of location i is stored at offsets[i]:offsets[i + 1].
+        adjacent_locations: Node indices of the adjacent locations, grouped by location.
+        adjacent_edges: Positions of the edges to the adjacent locations, grouped by location.
+        root: Node index of the root location.
+        parents: Node index of the parent of each location, -1 for the root.
+        parent_edges: Position of the edge to the parent of each location, -1 for the root.
+        depths: Number of edges between each location and the root.
+    """
+
+    edge_ids: np.ndarray
+    edge_positions: dict[FeatureId, int]
+    endpoints: np.ndarray
+    offsets: np.ndarray
+    adjacent_locations: np.ndarray
+    adjacent_edges: np.ndarray
+    root: int
+    parents: np.ndarray
+    parent_edges: np.ndarray
+    depths: np.ndarray
+    _lowest_common_ancestors: Optional["_LowestCommonAncestors"] = field(
+        default=None, init=False, repr=False
+    )
+
+    def lowest_common_ancestors(self) -> "_LowestCommonAncestors":
+        if self._lowest_common_ancestors is None:
+            self._lowest_common_ancestors = _LowestCommonAncestors.build(self)
+        return self._lowest_common_ancestors
+
+    @staticmethod
+    def build(
+        edge_ids: np.ndarray, endpoints: np.ndarray, number_of_locations: int
+    ) -> "_FeatureTreeIndex":
+        number_of_edges = len(edge_ids)
+        edge_positions = {
+            feature_id: position
+            for position, feature_id in enumerate(edge_ids.tolist())
+        }
+
+        sources = np.concatenate([endpoints[:, 0], endpoints[:, 1]])
+        targets = np.concatenate([endpoints[:, 1], endpoints[:, 0]])
+        edges = np.concatenate([np.arange(number_of_edges)] * 2)
+        order = np.argsort(sources, kind="stable")
+        offsets = np.zeros(number_of_locations + 1, dtype=int)
+        offsets[1:] = np.cumsum(np.bincount(sources, minlength=number_of_locations))
+        adjacent_locations = targets[order]
+        adjacent_edges = edges[order]
+
+        root = 0
+        parents = np.full(number_of_locations, -1, dtype=int)
+        parent_edges = np.full(number_of_locations, -1, dtype=int)
+        depths = np.zeros(number_of_locations, dtype=int)
+        visited = np.zeros(number_of_locations, dtype=bool)
+        queue = [root] if number_of_locations > 0 else []
+        for node in queue:
+            visited[node] = True
+            for neighbour, edge in zip(
+                adjacent_locations[offsets[node] : offsets[node + 1]],
+                adjacent_edges[offsets[node] : offsets[node + 1]],
+            ):
+                if visited[neighbour]:
+                    continue
+                visited[neighbour] = True
+                parents[neighbour] = node
+                parent_edges[neighbour] = edge
+                depths[neighbour] = depths[node] + 1
+                queue.append(neighbour)
+
+        return _FeatureTreeIndex(
+            edge_ids=edge_ids,
+            edge_positions=edge_positions,
+            endpoints=endpoints,
+            offsets=offsets,
+            adjacent_locations=adjacent_locations,
+            adjacent_edges=adjacent_edges,
+            root=root,
+            parents=parents,
+            parent_edges=parent_edges,
+            depths=depths,
+        )
+
+
+@dataclass(frozen=True)
+class _LowestCommonAncestors:
+    """
+    Euler tour of a rooted feature tree with a sparse table for range minimum queries
+    of the depths along the tour.
+
+    Attributes:
+        first_visits: Position of the first visit of every location in the tour.
+        sparse_table: Level k contains, for every start position i of the tour, the
+            location of minimal depth among the positions i to i + 2**k - 1.
+        depths: Number of edges between each location and the root.
+    """
+
+    first_visits: np.ndarray
+    sparse_table: list[np.ndarray]
+    depths: np.ndarray
+
+    @staticmethod
+    def build(index: _FeatureTreeIndex) -> "_LowestCommonAncestors":
+        number_of_locations = len(index.depths)
+        first_visits = np.zeros(number_of_locations, dtype=int)
+        tour = []
+        if number_of_locations > 0:
+            tour.append(index.root)
+            stack = [index.root]
+            next_adjacency = index.offsets[:-1].tolist()
+            ends = index.offsets[1:].tolist()
+            while stack:
+                node = stack[-1]
+                if next_adjacency[node] == ends[node]:
+                    stack.pop()
+                    if stack:
+                        tour.append(stack[-1])
+                    continue
+                neighbour = int(index.adjacent_locations[next_adjacency[node]])
+                next_adjacency[node] += 1
+                if neighbour == index.parents[node]:
+                    continue
+                first_visits[neighbour] = len(tour)
+                tour.append(neighbour)
+                stack.append(neighbour)
+
+        sparse_table = [np.array(tour, dtype=int)]
+        width = 1
+        while 2 * width <= len(tour):
+            previous = sparse_table[-1]
+            left, right = previous[: len(previous) - width], previous[width:]
+            sparse_table.append(
+                np.where(index.depths[left] <= index.depths[right], left, right)
+            )
+            width *= 2
+        return _LowestCommonAncestors(
+            first_visits=first_visits,
+            sparse_table=sparse_table,
+            depths=index.depths,
+        )
+
+    def query(
+        self, node_indices_a: np.ndarray, node_indices_b: np.ndarray
+    ) -> np.ndarray:
+        visits_a = self.first_visits[node_indices_a]
+        visits_b = self.first_visits[node_indices_b]
+        starts = np.minimum(visits_a, visits_b)
+        stops = np.maximum(visits_a, visits_b) + 1
+        levels = np.zeros(starts.shape, dtype=int)
+        lengths = stops - starts
+        while np.any(lengths >= 2 ** (levels + 1)):
+            levels += lengths >= 2 ** (levels + 1)
+        ancestors = np.zeros(starts.shape, dtype=int)
+        for level in np.unique(levels):
+            mask = levels == level
+            table = self.sparse_table[level]
+            left = table[starts[mask]]
+            right = table[stops[mask] - 2**level]
+            ancestors[mask] = np.where(
+                self.depths[left] <= self.depths[right], left, right
+            )
+        return ancestors
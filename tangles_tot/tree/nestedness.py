@@ -0,0 +1,155 @@
+from typing import Optional
+import numpy as np
+from tangles_tot._tangles_lib import LessOrEqFunc
+from tangles_tot._typing import FeatureId
+from tangles_tot.search.uncrossing_feature_system import (
+    is_nested_in_arrays,
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_ROW_CHUNK_SIZE,
+)
+from .order_cache import feature_arrays_from_le_func
+
+
+def find_crossing_pair(
+    feature_ids: np.ndarray,
+    is_le: LessOrEqFunc,
+) -> Optional[tuple[FeatureId, FeatureId]]:
+    """
+    Finds the first pair of features, in the order of feature_ids, which is not nested.
+
+    If is_le is the order of a FeatureSystem (or UncrossingFeatureSystem) or of an
+    OrderCache knowing the feature arrays, the arrays of the features are pulled out once
+    and all pairs are checked at the same time using matrix products. Otherwise is_le is
+    called for every pair.
+
+    Args:
+        feature_ids: The ids of the features to check.
+        is_le: The order function of the features.
+
+    Returns:
+        The ids of the first crossing pair or None if all of the features are nested.
+    """
+    if len(feature_ids) < 2:
+        return None
+    features = feature_arrays_from_le_func(is_le, feature_ids)
+    if features is None:
+        return _find_crossing_pair_using_le_func(feature_ids, is_le)
+    crossing_pair = find_crossing_pair_in_arrays(features)
+    if crossing_pair is None:
+        return None
+    return feature_ids[crossing_pair[0]], feature_ids[crossing_pair[1]]
+
+
+def find_crossing_pair_in_arrays(
+    features: np.ndarray,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    row_chunk_size: int = DEFAULT_ROW_CHUNK_SIZE,
+) -> Optional[tuple[int, int]]:
+    """
+    Finds the first pair of columns of a ±1 feature array which is not nested.
+
+    The columns are compared blockwise using is_nested_in_arrays of the search package.
+
+    Args:
+        features: Array of shape (number of elements, number of features).
+        block_size: Number of columns compared against all other columns at once.
+        row_chunk_size: Number of rows converted to floating point at once.
+
+    Returns:
+        The column indices (i, j), i < j, of the lexicographically first crossing pair,
+        or None if all of the columns are nested.
+    """
+    number_of_features = features.shape[1]
+    sizes = np.sum(features == 1, axis=0)
+    has_zeros = bool(np.any(features == 0))
+    for block_start in range(0, number_of_features, block_size):
+        block = slice(block_start, min(block_start + block_size, number_of_features))
+        crossing = ~is_nested_in_arrays(
+            features[:, block],
+            features,
+            block_size,
+            row_chunk_size,
+            sizes_1=sizes[block],
+            sizes_2=sizes,
+            has_zeros=has_zeros,
+        )
+        crossing = np.triu(crossing, k=block_start + 1)
+        crossing_pairs = np.argwhere(crossing)
+        if len(crossing_pairs) > 0:
+            return (
+                int(crossing_pairs[0, 0] + block_start),
+                int(crossing_pairs[0, 1]),
+            )
+    return None
+
+
+def find_crossing_pair_with(
+    feature_ids: np.ndarray,
+    other_ids: np.ndarray,
+    is_le: LessOrEqFunc,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Optional[tuple[FeatureId, FeatureId]]:
+    """
+    Finds the first pair of a feature of feature_ids and a feature of other_ids which is
+    not nested, for example of new features with all features, if the other features are
+    already known to be nested with each other.
+
+    Args:
+        feature_ids: The ids of the features to check.
+        other_ids: The ids of the features they are checked against.
+        is_le: The order function of the features.
+        block_size: Number of features of feature_ids compared against all other features at once.
+
+    Returns:
+        The ids of the first crossing pair or None if all of the pairs are nested.
+    """
+    if len(feature_ids) == 0 or len(other_ids) == 0:
+        return None
+    features = feature_arrays_from_le_func(is_le, feature_ids)
+    others = feature_arrays_from_le_func(is_le, other_ids)
+    if features is None or others is None:
+        for feature_id in feature_ids:
+            for other_id in other_ids:
+                if not _is_nested(feature_id, other_id, is_le):
+                    return feature_id, other_id
+        return None
+    # the arrays pulled out of a feature system only contain 1 and -1
+    sizes = np.sum(features == 1, axis=0)
+    other_sizes = np.sum(others == 1, axis=0)
+    for block_start in range(0, len(feature_ids), block_size):
+        block = slice(block_start, min(block_start + block_size, len(feature_ids)))
+        crossing_pairs = np.argwhere(
+            ~is_nested_in_arrays(
+                features[:, block],
+                others,
+                block_size,
+                sizes_1=sizes[block],
+                sizes_2=other_sizes,
+                has_zeros=False,
+            )
+        )
+        if len(crossing_pairs) > 0:
+            return (
+                feature_ids[crossing_pairs[0, 0] + block_start],
+                other_ids[crossing_pairs[0, 1]],
+            )
+    return None
+
+
+def _find_crossing_pair_using_le_func(
+    feature_ids: np.ndarray, is_le: LessOrEqFunc
+) -> Optional[tuple[FeatureId, FeatureId]]:
+    for i in range(len(feature_ids)):
+        for j in range(i + 1, len(feature_ids)):
+            if not _is_nested(feature_ids[i], feature_ids[j], is_le):
+                return feature_ids[i], feature_ids[j]
+    return None
+
+
+def _is_nested(feature_1: FeatureId, feature_2: FeatureId, is_le: LessOrEqFunc) -> bool:
+    return (
+        is_le(feature_1, 1, feature_2, 1)
+        or is_le(feature_1, -1, feature_2, 1)
+        or is_le(feature_1, 1, feature_2, -1)
+        or is_le(feature_1, -1, feature_2, -1)
+    )
@@ -0,0 +1,159 @@
+from typing import Optional
+import numpy as np
+from tangles_tot._tangles_lib import FeatureSystem, LessOrEqFunc
+from tangles_tot._typing import FeatureId, Specification
+from tangles_tot.search import UncrossingFeatureSystem
+from tangles_tot.search.uncrossing_feature_system import (
+    positive_intersection_sizes,
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_ROW_CHUNK_SIZE,
+)
+
+
+class OrderCache:
+    """
+    Caches the order relation between the oriented features of a set of feature ids.
+
+    If the order function is the inclusion order of a feature system, the relation is
+    stored as a dense bit matrix over all pairs of oriented features, which is filled at
+    once from the feature arrays the first time it is queried. Otherwise every relation
+    is computed with the order function the first time it is queried and memoised in a
+    dictionary, such that the memory grows with the number of queried pairs only.
+
+    The is_le method can be used wherever a LessOrEqFunc is expected. Queries which are
+    answered from the matrix count as hits, queries which call the order function count
+    as misses.
+
+    Attributes:
+        feature_ids: The ids of the features whose relations are cached.
+        features: The arrays of the features if they could be pulled out of the feature system.
+        hits: The number of queries answered from the cache.
+        misses: The number of queries which called the order function.
+    """
+
+    def __init__(self, is_le: LessOrEqFunc, feature_ids: np.ndarray):
+        self.feature_ids = np.asarray(feature_ids)
+        self.features = (
+            feature_arrays_from_le_func(is_le, self.feature_ids)
+            if len(self.feature_ids) > 0
+            else None
+        )
+        self.hits = 0
+        self.misses = 0
+        self._le_func = is_le
+        self._positions = {
+            feature_id: position for position, feature_id in enumerate(feature_ids)
+        }
+        # the dense bit matrix, allocated by _fill_from_arrays
+        self._relations: Optional[np.ndarray] = None
+        self._memo: dict[tuple[int, int], bool] = {}
+
+    def is_le(
+        self,
+        feature_id_1: FeatureId,
+        specification_1: Specification,
+        feature_id_2: FeatureId,
+        specification_2: Specification,
+    ) -> bool:
+        row = self._oriented_index(feature_id_1, specification_1)
+        column = self._oriented_index(feature_id_2, specification_2)
+        if row is None or column is None:
+            self.misses += 1
+            return self._le_func(
+                feature_id_1, specification_1, feature_id_2, specification_2
+            )
+        if self.features is not None:
+            if self._relations is None:
+                self._fill_from_arrays()
+            self.hits += 1
+            return bool(self._relations[row, column >> 3] & (0x80 >> (column & 7)))
+        relation = self._memo.get((row, column))
+        if relation is not None:
+            self.hits += 1
+            return relation
+        self.misses += 1
+        relation = bool(
+            self._le_func(feature_id_1, specification_1, feature_id_2, specification_2)
+        )
+        self._memo[(row, column)] = relation
+        return relation
+
+    def feature_arrays(self, feature_ids: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Returns the arrays of the features, one column per feature id, or None if the
+        arrays are not known for all of the feature ids.
+        """
+        if self.features is None:
+            return None
+        positions = [self._positions.get(feature_id) for feature_id in feature_ids]
+        if any(position is None for position in positions):
+            return None
+        return self.features[:, positions]
+
+    def _oriented_index(
+        self, feature_id: FeatureId, specification: Specification
+    ) -> Optional[int]:
+        position = self._positions.get(feature_id)
+        if position is None:
+            return None
+        return position if specification == 1 else position + len(self.feature_ids)
+
+    def _fill_from_arrays(self):
+        number_of_elements, number_of_features = self.features.shape
+        self._relations = np.zeros(
+            (2 * number_of_features, (2 * number_of_features + 7) // 8),
+            dtype=np.uint8,
+        )
+        sizes = np.sum(self.features == 1, axis=0)
+        for block_start in range(0, number_of_features, DEFAULT_BLOCK_SIZE):
+            block = slice(
+                block_start, min(block_start + DEFAULT_BLOCK_SIZE, number_of_features)
+            )
+            intersection_sizes = positive_intersection_sizes(
+                self.features[:, block], self.features, DEFAULT_ROW_CHUNK_SIZE
+            )
+            block_sizes = sizes[block, np.newaxis]
+            other_sizes = sizes[np.newaxis, :]
+            # A ≤ B if and only if A ∩ ¬B is empty
+            positive_rows = np.concatenate(
+                [block_sizes - intersection_sizes == 0, intersection_sizes == 0],
+                axis=1,
+            )
+            negative_rows = np.concatenate(
+                [
+                    number_of_elements - block_sizes - other_sizes + intersection_sizes
+                    == 0,
+                    other_sizes - intersection_sizes == 0,
+                ],
+                axis=1,
+            )
+            self._relations[block] = np.packbits(positive_rows, axis=1)
+            self._relations[
+                block.start + number_of_features : block.stop + number_of_features
+            ] = np.packbits(negative_rows, axis=1)
+
+
+def feature_arrays_from_le_func(
+    is_le: LessOrEqFunc,
+    feature_ids: np.ndarray,
+) -> Optional[np.ndarray]:
+    """
+    Returns the arrays of the features, one column per feature id, if is_le is the
+    inclusion order of a feature system whose features only take the values 1 and -1,
+    or the is_le method of an OrderCache which knows these arrays.
+
+    Returns None if is_le is a custom order function which can not be vectorized.
+    """
+    if getattr(is_le, "__name__", None) not in ["is_le", "is_subset"]:
+        return None
+    feat_sys = getattr(is_le, "__self__", None)
+    if isinstance(feat_sys, OrderCache):
+        return feat_sys.feature_arrays(feature_ids)
+    if isinstance(feat_sys, UncrossingFeatureSystem):
+        feat_sys = feat_sys._feat_sys
+    if not isinstance(feat_sys, FeatureSystem):
+        return None
+    features = np.asarray(feat_sys[list(feature_ids)]).reshape(-1, len(feature_ids))
+    if np.any(features == 0):
+        return None
+    return features
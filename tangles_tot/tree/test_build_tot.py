@@ -1,9 +1,10 @@
 import pytest
 import numpy as np
-from tangles_tot._tangles_lib import TangleSweep, LessOrEqFunc
+from tangles_tot._tangles_lib import TangleSweep, LessOrEqFunc, FeatureSystem
 from tangles_tot._typing import FeatureId, Specification
 from .build_tot import (
     build_tree_of_tangles_from_sweep,
+    build_trees_of_tangles_from_sweep,
     _build_feature_tree_from_nested_features,
 )
 
@@ -98,3 +99,62 @@ def test_build_from_nested(is_le_for_three_star: LessOrEqFunc):
     assert feature_tree.get_node_idx_of_location_containing(
         (1, 1)
     ) == feature_tree.get_node_idx_of_location_containing((2, 1))
+
+
+@pytest.fixture
+def mock_tangle_sweep_of_feature_system() -> TangleSweep:
+    features = np.array(
+        [
+            [1, -1, 1, 1],
+            [-1, -1, 1, 1],
+            [-1, 1, 1, 1],
+            [-1, 1, -1, 1],
+            [-1, 1, -1, -1],
+        ]
+    )
+    feat_sys = FeatureSystem.with_array(features)
+    mock_agreement_function = lambda _: 0
+    mock_agreement_function.max_value = 10
+    mock_tangle_sweep = TangleSweep(mock_agreement_function, feat_sys.is_le, [0])
+    feature_ids = feat_sys.all_feature_ids()
+
+    def mock_get_efficient_distinguishers(
+        agreement: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        return None, feature_ids[: max(1, 14 - agreement)]
+
+    mock_tangle_sweep.tree.get_efficient_distinguishers = (
+        mock_get_efficient_distinguishers
+    )
+    return mock_tangle_sweep
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_build_trees_for_several_agreement_values(
+    mock_tangle_sweep_of_feature_system: TangleSweep, n_jobs
+):
+    agreement_values = [11, 12, 13]
+    trees = build_trees_of_tangles_from_sweep(
+        mock_tangle_sweep_of_feature_system, agreement_values, n_jobs=n_jobs
+    )
+    assert list(trees) == agreement_values
+    for agreement_value in agreement_values:
+        tree_of_tangles = build_tree_of_tangles_from_sweep(
+            mock_tangle_sweep_of_feature_system, agreement_value
+        )
+        assert trees[agreement_value].feature_tree == tree_of_tangles.feature_tree
+    assert [len(trees[agreement].feature_ids()) for agreement in agreement_values] == [
+        3,
+        2,
+        1,
+    ]
+
+
+def test_build_trees_for_several_agreement_values_not_uncrossed(
+    mock_tangle_sweep_not_uncrossed: TangleSweep,
+):
+    try:
+        build_trees_of_tangles_from_sweep(mock_tangle_sweep_not_uncrossed, [11, 12])
+    except ValueError:
+        return
+    assert False, "efficient distinguishers not being uncrossed was not caught"
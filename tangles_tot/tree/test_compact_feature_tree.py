@@ -0,0 +1,91 @@
+import pickle
+import pytest
+from tangles_tot._testing.feature_trees import three_star
+from .feature_tree import FeatureTree
+from .compact_feature_tree import CompactFeatureTree
+from .tree_of_tangles import TreeOfTangles
+
+
+@pytest.fixture
+def compact_three_star() -> CompactFeatureTree:
+    return CompactFeatureTree.from_feature_tree(three_star())
+
+
+def test_compact_feature_tree_round_trip(compact_three_star: CompactFeatureTree):
+    assert compact_three_star.to_feature_tree() == three_star()
+
+
+def test_compact_feature_tree_has_same_locations(
+    compact_three_star: CompactFeatureTree,
+):
+    feature_tree = three_star()
+    assert compact_three_star.feature_ids() == feature_tree.feature_ids()
+    assert compact_three_star.locations() == feature_tree.locations()
+    for feature_id in feature_tree.feature_ids():
+        assert compact_three_star.contains_edge(feature_id)
+        for specification in [1, -1]:
+            feature = (feature_id, specification)
+            assert compact_three_star.get_location_containing(
+                feature
+            ) == feature_tree.get_location_containing(feature)
+            assert compact_three_star.get_node_idx_of_location_containing(
+                feature
+            ) == feature_tree.get_node_idx_of_location_containing(feature)
+    assert not compact_three_star.contains_edge(3)
+
+
+def test_compact_feature_tree_queries(compact_three_star: CompactFeatureTree):
+    feature_tree = three_star()
+    for node_idx in range(4):
+        assert compact_three_star.neighbours(node_idx) == feature_tree.neighbours(
+            node_idx
+        )
+        assert compact_three_star.children(node_idx) == feature_tree.children(node_idx)
+    assert compact_three_star.path(1, 2) == feature_tree.path(1, 2)
+
+
+def test_compact_feature_tree_pickle(compact_three_star: CompactFeatureTree):
+    compact_three_star.path(1, 2)
+    unpickled = pickle.loads(pickle.dumps(compact_three_star))
+    assert unpickled.to_feature_tree() == three_star()
+    assert unpickled.path(1, 2) == [1, 2]
+
+
+def test_compact_feature_tree_invalid_specification(
+    compact_three_star: CompactFeatureTree,
+):
+    try:
+        compact_three_star.get_location_containing((0, 0))
+    except ValueError:
+        return
+    assert False, "invalid specification did not raise exception"
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_compact_feature_tree_save_and_load(
+    compact_three_star: CompactFeatureTree, tmp_path, mmap: bool
+):
+    path = tmp_path / "tree.tot"
+    compact_three_star.save(path, labels={0: "A ∧ B", 2: ""})
+    loaded = CompactFeatureTree.load(path, mmap=mmap)
+    assert loaded.to_feature_tree() == three_star()
+    assert loaded.path(1, 2) == [1, 2]
+    assert CompactFeatureTree.load_labels(path) == {0: "A ∧ B", 2: ""}
+
+    compact_three_star.save(path)
+    assert CompactFeatureTree.load_labels(path) is None
+
+
+def test_tree_of_tangles_save_and_load(tmp_path):
+    path = tmp_path / "tree.tot"
+    TreeOfTangles(feature_tree=three_star()).save(path)
+    loaded = TreeOfTangles.load(path)
+    assert loaded.feature_tree.to_feature_tree() == three_star()
+    assert loaded.locations() == three_star().locations()
+
+
+def test_compact_feature_tree_load_invalid_file(tmp_path):
+    path = tmp_path / "tree.tot"
+    path.write_bytes(b"not a tree")
+    with pytest.raises(ValueError):
+        CompactFeatureTree.load(path)
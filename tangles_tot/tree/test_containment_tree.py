@@ -0,0 +1,64 @@
+import numpy as np
+from tangles_tot._tangles_lib import FeatureSystem
+from .containment_tree import (
+    find_containment_tree,
+    find_containment_tree_in_arrays,
+    NO_PARENT,
+)
+
+
+def path_array() -> np.ndarray:
+    return np.array(
+        [
+            [1, -1, 1],
+            [-1, -1, 1],
+            [-1, 1, 1],
+            [-1, 1, -1],
+        ]
+    )
+
+
+def test_find_containment_tree_in_arrays_of_star():
+    features = np.array(
+        [
+            [1, 1, 1],
+            [-1, 1, 1],
+            [1, -1, 1],
+            [1, 1, -1],
+        ]
+    )
+    specifications, parents = find_containment_tree_in_arrays(features)
+    assert np.all(specifications == -1)
+    assert np.all(parents == NO_PARENT)
+
+
+def test_find_containment_tree_in_arrays_of_path():
+    specifications, parents = find_containment_tree_in_arrays(
+        path_array(), chunk_size=1
+    )
+    assert list(specifications) == [-1, 1, -1]
+    assert list(parents) == [NO_PARENT, 0, 1]
+
+
+def test_find_containment_tree_in_arrays_without_elements():
+    specifications, parents = find_containment_tree_in_arrays(
+        np.zeros((0, 3), dtype=np.int8)
+    )
+    assert list(specifications) == [1, 1, 1]
+    assert list(parents) == [NO_PARENT] * 3
+
+
+def test_find_containment_tree_with_custom_le_func():
+    feat_sys = FeatureSystem.with_array(path_array())
+    feature_ids = feat_sys.all_feature_ids()
+    is_le = lambda a, b, c, d: feat_sys.is_le(a, b, c, d)
+    specifications, parents = find_containment_tree(feature_ids, is_le)
+    oriented_sizes = [
+        np.sum(feat_sys[feature_id] * specification == 1)
+        for feature_id, specification in zip(feature_ids, specifications)
+    ]
+    assert sorted(oriented_sizes) == [1, 2, 3]
+    for idx, parent in enumerate(parents):
+        if parent != NO_PARENT:
+            assert oriented_sizes[parent] > oriented_sizes[idx]
+    assert np.sum(parents == NO_PARENT) == 1
@@ -0,0 +1,138 @@
+import pytest
+import numpy as np
+from tangles_tot._tangles_lib import FeatureSystem
+from tangles_tot._testing.feature_trees import three_star
+from .feature_tree import FeatureTree
+from .build_tot import _build_feature_tree_from_nested_features
+
+
+@pytest.fixture
+def path_tree() -> FeatureTree:
+    features = np.array(
+        [
+            [1, -1, 1],
+            [-1, -1, 1],
+            [-1, 1, 1],
+            [-1, 1, -1],
+        ]
+    )
+    feat_sys = FeatureSystem.with_array(features)
+    return _build_feature_tree_from_nested_features(
+        feat_sys.all_feature_ids(), feat_sys.is_le
+    )
+
+
+def test_contains_edge():
+    feature_tree = three_star()
+    assert all(feature_tree.contains_edge(feature_id) for feature_id in range(3))
+    assert not feature_tree.contains_edge(3)
+
+
+def test_neighbours_of_three_star():
+    feature_tree = three_star()
+    assert sorted(feature_tree.neighbours(3)) == [0, 1, 2]
+    assert sorted(feature_tree.incident_feature_ids(3)) == [0, 1, 2]
+    for node_idx in range(3):
+        assert feature_tree.neighbours(node_idx) == [3]
+        assert feature_tree.incident_feature_ids(node_idx) == [node_idx]
+
+
+def test_rooting_of_three_star():
+    feature_tree = three_star()
+    assert feature_tree.root() == 0
+    assert feature_tree.parent(0) is None
+    assert feature_tree.parent(3) == 0
+    assert feature_tree.children(0) == [3]
+    assert sorted(feature_tree.children(3)) == [1, 2]
+
+
+def test_path_in_three_star():
+    feature_tree = three_star()
+    assert feature_tree.path(0, 0) == []
+    assert feature_tree.path(0, 3) == [0]
+    assert feature_tree.path(1, 2) == [1, 2]
+    assert feature_tree.path(2, 1) == [2, 1]
+
+
+def test_path_in_path_tree(path_tree: FeatureTree):
+    leaves = [
+        location.node_idx
+        for location in path_tree.locations()
+        if len(path_tree.neighbours(location.node_idx)) == 1
+    ]
+    assert len(leaves) == 2
+    path = path_tree.path(leaves[0], leaves[1])
+    assert sorted(path) == sorted(path_tree.feature_ids())
+    assert path_tree.path(leaves[1], leaves[0]) == path[::-1]
+
+
+def test_batched_queries_of_three_star():
+    feature_tree = three_star()
+    node_indices_a = np.array([0, 1, 2, 3, 1])
+    node_indices_b = np.array([0, 2, 3, 1, 1])
+    assert list(
+        feature_tree.lowest_common_ancestors(node_indices_a, node_indices_b)
+    ) == [0, 3, 3, 3, 1]
+    assert list(feature_tree.distances(node_indices_a, node_indices_b)) == [
+        0,
+        2,
+        1,
+        1,
+        0,
+    ]
+    assert feature_tree.paths(node_indices_a, node_indices_b) == [
+        [],
+        [1, 2],
+        [2],
+        [1],
+        [],
+    ]
+
+
+def test_batched_paths_agree_with_path(path_tree: FeatureTree):
+    number_of_locations = len(path_tree.locations())
+    node_indices_a, node_indices_b = np.meshgrid(
+        np.arange(number_of_locations), np.arange(number_of_locations)
+    )
+    node_indices_a, node_indices_b = node_indices_a.ravel(), node_indices_b.ravel()
+    paths = path_tree.paths(node_indices_a, node_indices_b)
+    distances = path_tree.distances(node_indices_a, node_indices_b)
+    for node_idx_a, node_idx_b, path, distance in zip(
+        node_indices_a, node_indices_b, paths, distances
+    ):
+        assert path == path_tree.path(node_idx_a, node_idx_b)
+        assert distance == len(path)
+
+
+def test_locate_in_three_star():
+    points = np.array(
+        [
+            [1, 1, 1],
+            [-1, 1, 1],
+            [1, -1, 1],
+            [1, 1, -1],
+        ]
+    )
+    assert list(three_star().locate(points)) == [3, 0, 1, 2]
+    assert list(three_star().locate(points, chunk_size=1)) == [3, 0, 1, 2]
+    assert list(
+        three_star().locate(points[:, ::-1], feature_ids=np.array([2, 1, 0]))
+    ) == [3, 0, 1, 2]
+
+
+def test_locate_agrees_with_location_features(path_tree: FeatureTree):
+    feature_ids = path_tree.feature_ids()
+    points = np.array([[1 if (i >> j) & 1 else -1 for j in range(3)] for i in range(8)])
+    points_with_feature_ids = np.zeros((8, max(feature_ids) + 1), dtype=np.int8)
+    points_with_feature_ids[:, feature_ids] = points
+    locations = path_tree.locate(points_with_feature_ids)
+    for point, node_idx in zip(points_with_feature_ids, locations):
+        in_location = [
+            all(
+                point[feature_id] == specification
+                for feature_id, specification in location.features
+            )
+            for location in path_tree.locations()
+        ]
+        if any(in_location):
+            assert in_location[node_idx]
@@ -0,0 +1,73 @@
+import numpy as np
+from tangles_tot._tangles_lib import FeatureSystem
+from tangles_tot._testing import generate_random_features
+from .nestedness import (
+    find_crossing_pair,
+    find_crossing_pair_in_arrays,
+    find_crossing_pair_with,
+    _find_crossing_pair_using_le_func,
+)
+from .order_cache import feature_arrays_from_le_func
+
+
+def three_star_array() -> np.ndarray:
+    return np.array(
+        [
+            [-1, 1, 1],
+            [1, -1, 1],
+            [1, 1, -1],
+            [1, 1, 1],
+        ]
+    )
+
+
+def test_find_crossing_pair_in_nested_arrays():
+    assert find_crossing_pair_in_arrays(three_star_array()) is None
+
+
+def test_find_crossing_pair_in_crossing_arrays():
+    features = np.array(
+        [
+            [1, 1, 1],
+            [1, 1, -1],
+            [-1, 1, -1],
+            [-1, -1, 1],
+        ]
+    )
+    assert find_crossing_pair_in_arrays(features) == (0, 2)
+
+
+def test_find_crossing_pair_in_arrays_blockwise():
+    features = generate_random_features(30, 50)
+    expected = find_crossing_pair_in_arrays(features)
+    assert (
+        find_crossing_pair_in_arrays(features, block_size=7, row_chunk_size=3)
+        == expected
+    )
+
+
+def test_find_crossing_pair_vectorized_agrees_with_le_func():
+    features = generate_random_features(20, 8)
+    feat_sys = FeatureSystem.with_array(features)
+    feature_ids = feat_sys.all_feature_ids()
+    assert feature_arrays_from_le_func(feat_sys.is_le, feature_ids) is not None
+    assert find_crossing_pair(
+        feature_ids, feat_sys.is_le
+    ) == _find_crossing_pair_using_le_func(feature_ids, feat_sys.is_le)
+
+
+def test_find_crossing_pair_with_custom_le_func():
+    is_le = lambda _a, _b, _c, _d: False
+    assert feature_arrays_from_le_func(is_le, np.array([1, 3, 5])) is None
+    assert find_crossing_pair(np.array([1, 3, 5]), is_le) == (1, 3)
+
+
+def test_find_crossing_pair_with_agrees_with_le_func():
+    features = generate_random_features(20, 8)
+    feat_sys = FeatureSystem.with_array(features)
+    feature_ids = feat_sys.all_feature_ids()
+    new_ids = feature_ids[::4]
+    pair = find_crossing_pair_with(new_ids, feature_ids, feat_sys.is_le, block_size=2)
+    le_func = lambda a, sa, b, sb: feat_sys.is_le(a, sa, b, sb)
+    assert pair == find_crossing_pair_with(new_ids, feature_ids, le_func)
+    assert find_crossing_pair_with(new_ids, [], feat_sys.is_le) is None
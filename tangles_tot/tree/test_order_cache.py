@@ -0,0 +1,98 @@
+import numpy as np
+from tangles_tot._tangles_lib import FeatureSystem
+from tangles_tot._testing import generate_random_features
+from .order_cache import OrderCache, feature_arrays_from_le_func
+from .build_tot import _build_feature_tree_from_nested_features
+
+
+def test_order_cache_counts_hits_and_misses():
+    calls = []
+
+    def is_le(feature_a, specification_a, feature_b, specification_b) -> bool:
+        calls.append((feature_a, specification_a, feature_b, specification_b))
+        return feature_a == feature_b and specification_a == specification_b
+
+    order_cache = OrderCache(is_le, np.array([0, 1, 2]))
+    assert order_cache.is_le(0, 1, 1, -1) is False
+    assert order_cache.is_le(0, 1, 1, -1) is False
+    assert order_cache.is_le(2, -1, 2, -1) is True
+    assert order_cache.is_le(2, -1, 2, -1) is True
+    assert order_cache.misses == 2
+    assert order_cache.hits == 2
+    assert len(calls) == 2
+
+
+def test_order_cache_queries_outside_of_cache():
+    is_le = lambda _a, _b, _c, _d: True
+    order_cache = OrderCache(is_le, np.array([0, 1]))
+    assert order_cache.is_le(0, 1, 5, 1)
+    assert order_cache.is_le(0, 1, 5, 1)
+    assert order_cache.misses == 2
+    assert order_cache.hits == 0
+
+
+def test_order_cache_filled_from_feature_system():
+    features = generate_random_features(12, 6)
+    feat_sys = FeatureSystem.with_array(features)
+    feature_ids = feat_sys.all_feature_ids()
+    order_cache = OrderCache(feat_sys.is_le, feature_ids)
+    assert order_cache.features is not None
+    for feature_a in feature_ids:
+        for feature_b in feature_ids:
+            for specification_a in [1, -1]:
+                for specification_b in [1, -1]:
+                    assert order_cache.is_le(
+                        feature_a, specification_a, feature_b, specification_b
+                    ) == feat_sys.is_le(
+                        feature_a, specification_a, feature_b, specification_b
+                    )
+    assert order_cache.misses == 0
+
+
+def test_order_cache_shares_feature_arrays():
+    features = generate_random_features(5, 10)
+    feat_sys = FeatureSystem.with_array(features)
+    feature_ids = feat_sys.all_feature_ids()
+    order_cache = OrderCache(feat_sys.is_le, feature_ids)
+    assert np.all(
+        feature_arrays_from_le_func(order_cache.is_le, feature_ids[::-1])
+        == feat_sys[list(feature_ids[::-1])]
+    )
+    assert feature_arrays_from_le_func(order_cache.is_le, [len(feat_sys)]) is None
+
+
+def test_build_from_nested_with_order_cache():
+    def is_le(feature_a, specification_a, feature_b, specification_b) -> bool:
+        if feature_a == feature_b and specification_a == specification_b:
+            return True
+        return feature_a != feature_b and specification_a == -1 and specification_b == 1
+
+    order_cache = OrderCache(is_le, np.array([0, 1, 2]))
+    feature_tree = _build_feature_tree_from_nested_features(
+        np.array([0, 1, 2]), is_le, order_cache
+    )
+    assert len(feature_tree.locations()) == 4
+    misses = order_cache.misses
+    _build_feature_tree_from_nested_features(np.array([0, 1, 2]), is_le, order_cache)
+    assert order_cache.misses == misses
+
+
+def test_order_cache_allocates_relation_matrix_lazily():
+    is_le = lambda _a, _b, _c, _d: False
+    order_cache = OrderCache(is_le, np.arange(20000))
+    assert order_cache._relations is None
+    assert order_cache.is_le(0, 1, 19999, -1) is False
+    assert order_cache.is_le(0, 1, 19999, -1) is False
+    assert order_cache._relations is None
+    assert len(order_cache._memo) == 1
+
+    features = generate_random_features(4, 10)
+    feat_sys = FeatureSystem.with_array(features)
+    feature_ids = feat_sys.all_feature_ids()
+    order_cache = OrderCache(feat_sys.is_le, feature_ids)
+    assert order_cache._relations is None
+    order_cache.is_le(feature_ids[0], 1, feature_ids[-1], 1)
+    assert order_cache._relations.shape == (
+        2 * len(feature_ids),
+        (2 * len(feature_ids) + 7) // 8,
+    )
@@ -1,4 +1,6 @@
 import pytest
+import numpy as np
+from tangles_tot._tangles_lib import FeatureSystem
 from tangles_tot._testing.feature_trees import three_star
 from .tree_of_tangles import TreeOfTangles
 
@@ -31,3 +33,32 @@ def test_default_specification(tree_of_tangles: TreeOfTangles):
         1: 1,
         2: 1,
     }
+
+
+def test_distances(tree_of_tangles: TreeOfTangles):
+    assert list(tree_of_tangles.distances([0, 1], [1, 3])) == [2, 1]
+    assert tree_of_tangles.paths([0, 1], [1, 3]) == [[0, 1], [1]]
+
+
+def test_locate(tree_of_tangles: TreeOfTangles):
+    points = np.array(
+        [
+            [1, 1, 1],
+            [1, -1, 1],
+        ]
+    )
+    assert list(tree_of_tangles.locate(points)) == [3, 1]
+
+
+def test_locate_in_feature_system(tree_of_tangles: TreeOfTangles):
+    points = np.array(
+        [
+            [1, 1, 1],
+            [-1, 1, 1],
+            [1, -1, 1],
+            [1, 1, -1],
+        ]
+    )
+    feat_sys = FeatureSystem.with_array(points)
+    assert list(tree_of_tangles.locate(feat_sys)) == [3, 0, 1, 2]
+    assert list(tree_of_tangles.locate(feat_sys, chunk_size=1)) == [3, 0, 1, 2]
@@ -0,0 +1,143 @@
+import pytest
+import numpy as np
+from tangles_tot._tangles_lib import TangleSweep, FeatureSystem
+from tangles_tot._typing import FeatureId, Specification
+from .feature_tree import FeatureTree
+from .tree_of_tangles import TreeOfTangles
+from .build_tot import _build_feature_tree_from_nested_features
+from .update_tot import (
+    add_features_to_tree_of_tangles,
+    update_tree_of_tangles_from_sweep,
+)
+
+
+def tree_structure(feature_tree: FeatureTree) -> set[frozenset]:
+    return {
+        frozenset(
+            (int(feature_id), int(specification))
+            for feature_id, specification in location.features
+        )
+        for location in feature_tree.locations()
+    }
+
+
+@pytest.fixture
+def nested_feat_sys() -> FeatureSystem:
+    features = np.array(
+        [
+            [1, -1, 1, 1],
+            [-1, -1, 1, 1],
+            [-1, 1, 1, 1],
+            [-1, 1, -1, 1],
+            [-1, 1, -1, -1],
+        ]
+    )
+    return FeatureSystem.with_array(features)
+
+
+def test_add_features_to_empty_tree():
+    def is_le(
+        feature_a: FeatureId,
+        specification_a: Specification,
+        feature_b: FeatureId,
+        specification_b: Specification,
+    ) -> bool:
+        if feature_a == feature_b and specification_a == specification_b:
+            return True
+        return feature_a != feature_b and specification_a == -1 and specification_b == 1
+
+    empty_tree = TreeOfTangles(
+        FeatureTree(_edges=[], _locations=[], _locations_of_edge={})
+    )
+    tree_of_tangles = add_features_to_tree_of_tangles(
+        empty_tree, np.array([0, 1, 2]), is_le
+    )
+    assert tree_structure(tree_of_tangles.feature_tree) == tree_structure(
+        _build_feature_tree_from_nested_features(np.array([0, 1, 2]), is_le)
+    )
+
+
+def test_add_features_keeps_unaffected_locations(nested_feat_sys: FeatureSystem):
+    feature_ids = nested_feat_sys.all_feature_ids()
+    tree_of_tangles = TreeOfTangles(
+        _build_feature_tree_from_nested_features(feature_ids[:2], nested_feat_sys.is_le)
+    )
+    updated = add_features_to_tree_of_tangles(
+        tree_of_tangles, feature_ids[2:], nested_feat_sys.is_le
+    )
+    assert tree_structure(updated.feature_tree) == tree_structure(
+        _build_feature_tree_from_nested_features(feature_ids, nested_feat_sys.is_le)
+    )
+    assert len(tree_of_tangles.locations()) == 3
+    unaffected = [
+        location
+        for location in tree_of_tangles.locations()
+        if location in updated.locations()
+    ]
+    assert len(unaffected) > 0
+    for location in unaffected:
+        assert updated.feature_tree.get_location(location.node_idx) is location
+
+
+def test_update_tree_of_tangles_from_sweep(nested_feat_sys: FeatureSystem):
+    mock_agreement_function = lambda _: 0
+    mock_agreement_function.max_value = 10
+    tangle_sweep = TangleSweep(mock_agreement_function, nested_feat_sys.is_le, [0])
+    feature_ids = nested_feat_sys.all_feature_ids()
+    tangle_sweep.tree.get_efficient_distinguishers = lambda agreement: (
+        None,
+        feature_ids,
+    )
+    tree_of_tangles = TreeOfTangles(
+        _build_feature_tree_from_nested_features(feature_ids[:1], nested_feat_sys.is_le)
+    )
+    updated = update_tree_of_tangles_from_sweep(tree_of_tangles, tangle_sweep)
+    assert tree_structure(updated.feature_tree) == tree_structure(
+        _build_feature_tree_from_nested_features(feature_ids, nested_feat_sys.is_le)
+    )
+
+
+def test_update_tree_of_tangles_from_sweep_with_removed_feature(
+    nested_feat_sys: FeatureSystem,
+):
+    mock_agreement_function = lambda _: 0
+    mock_agreement_function.max_value = 10
+    tangle_sweep = TangleSweep(mock_agreement_function, nested_feat_sys.is_le, [0])
+    feature_ids = nested_feat_sys.all_feature_ids()
+    tangle_sweep.tree.get_efficient_distinguishers = lambda agreement: (
+        None,
+        feature_ids[1:],
+    )
+    tree_of_tangles = TreeOfTangles(
+        _build_feature_tree_from_nested_features(feature_ids[:1], nested_feat_sys.is_le)
+    )
+    try:
+        update_tree_of_tangles_from_sweep(tree_of_tangles, tangle_sweep)
+    except ValueError:
+        return
+    assert False, "removed feature of the tree of tangles did not raise exception"
+
+
+def test_update_tree_of_tangles_from_sweep_with_crossing_new_feature():
+    feat_sys = FeatureSystem.with_array(
+        np.array(
+            [
+                [1, 1, 1],
+                [1, -1, 1],
+                [-1, 1, 1],
+                [-1, -1, -1],
+            ]
+        )
+    )
+    mock_agreement_function = lambda _: 0
+    mock_agreement_function.max_value = 10
+    tangle_sweep = TangleSweep(mock_agreement_function, feat_sys.is_le, [0])
+    tangle_sweep.tree.get_efficient_distinguishers = lambda agreement: (
+        None,
+        np.array([0, 2, 1]),
+    )
+    tree_of_tangles = TreeOfTangles(
+        _build_feature_tree_from_nested_features(np.array([0, 2]), feat_sys.is_le)
+    )
+    with pytest.raises(ValueError, match="1 and 0"):
+        update_tree_of_tangles_from_sweep(tree_of_tangles, tangle_sweep)
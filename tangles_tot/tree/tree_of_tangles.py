@@ -1,6 +1,9 @@
-from typing import Union
+from typing import Optional, Union
+import os
+import numpy as np
 from tangles_tot._typing import Feature, FeatureId, Specification
-from .feature_tree import FeatureTree, Location
+from .feature_tree import FeatureTree, Location, DEFAULT_LOCATE_CHUNK_SIZE
+from .compact_feature_tree import CompactFeatureTree
 
 FeatureLabels = dict[Union[FeatureId, Feature], str]
 LocationIdx = int
@@ -32,6 +35,91 @@ class TreeOfTangles:
     def locations(self) -> list[Location]:
         return self.feature_tree.locations()
 
+    def paths(
+        self, location_indices_a: np.ndarray, location_indices_b: np.ndarray
+    ) -> list[list[FeatureId]]:
+        """
+        Returns, for pairs of locations, the feature ids of the features separating them.
+        """
+        return self.feature_tree.paths(location_indices_a, location_indices_b)
+
+    def distances(
+        self, location_indices_a: np.ndarray, location_indices_b: np.ndarray
+    ) -> np.ndarray:
+        """
+        Returns, for pairs of locations, the number of features separating them.
+        """
+        return self.feature_tree.distances(location_indices_a, location_indices_b)
+
+    def lowest_common_ancestors(
+        self, location_indices_a: np.ndarray, location_indices_b: np.ndarray
+    ) -> np.ndarray:
+        """
+        Returns, for pairs of locations, the index of their lowest common ancestor when
+        the tree is rooted at its first location.
+        """
+        return self.feature_tree.lowest_common_ancestors(
+            location_indices_a, location_indices_b
+        )
+
+    def locate(self, points, chunk_size: int = DEFAULT_LOCATE_CHUNK_SIZE) -> np.ndarray:
+        """
+        Finds the location of the tree of tangles each point falls into.
+
+        Args:
+            points: Either an array of shape (number of points, number of features) with
+                values 1 and -1, whose columns are the feature ids, or a feature system,
+                whose elements are located.
+            chunk_size: Number of points processed at once.
+
+        Returns:
+            Array containing the index of the location of every point.
+        """
+        if isinstance(points, np.ndarray):
+            return self.feature_tree.locate(points, chunk_size=chunk_size)
+        # a feature system is read in batches of feature columns, as many at a time as
+        # chunk_size rows of all features
+        feature_ids = self.feature_ids()
+        if len(feature_ids) == 0:
+            return np.zeros(0, dtype=int)
+        number_of_points = len(np.asarray(points[int(feature_ids[0])]))
+        return self.feature_tree._locate_columns(
+            lambda edge_ids: np.asarray(points[edge_ids.tolist()]).reshape(
+                number_of_points, -1
+            ),
+            number_of_points,
+            max_cells=chunk_size * len(feature_ids),
+        )
+
+    def save(
+        self,
+        path: Union[str, os.PathLike],
+        labels: Optional[dict[FeatureId, str]] = None,
+    ):
+        """
+        Saves the tree of tangles, and optionally labels of its features, in the binary
+        format of CompactFeatureTree.save.
+
+        Args:
+            path: The path of the file.
+            labels: Optional labels of the features, by feature id.
+        """
+        feature_tree = (
+            self.feature_tree
+            if isinstance(self.feature_tree, CompactFeatureTree)
+            else CompactFeatureTree.from_feature_tree(self.feature_tree)
+        )
+        feature_tree.save(path, labels=labels)
+
+    @staticmethod
+    def load(path: Union[str, os.PathLike], mmap: bool = True) -> "TreeOfTangles":
+        """
+        Loads a tree of tangles saved by TreeOfTangles.save. Its feature tree is a
+        CompactFeatureTree, whose arrays are memory-mapped if mmap is True. The labels
+        can be loaded by CompactFeatureTree.load_labels.
+        """
+        return TreeOfTangles(feature_tree=CompactFeatureTree.load(path, mmap=mmap))
+
     def label_features_by_id(self) -> FeatureLabels:
         """
         Returns labels of the features of the form "label {feature_id}" for
@@ -0,0 +1,189 @@
+from typing import Optional
+import numpy as np
+from tangles_tot._tangles_lib import TangleSweep, LessOrEqFunc
+from tangles_tot._typing import FeatureId, Feature, Specification
+from .tree_of_tangles import TreeOfTangles
+from .feature_tree import FeatureTree, Location
+from .order_cache import OrderCache
+from .nestedness import find_crossing_pair_with
+from .build_tot import _get_efficient_distinguishers, _raise_not_uncrossed
+
+
+def update_tree_of_tangles_from_sweep(
+    tree_of_tangles: TreeOfTangles,
+    tangle_sweep: TangleSweep,
+    agreement_value: Optional[int] = None,
+    order_cache: Optional[OrderCache] = None,
+) -> TreeOfTangles:
+    """
+    Updates a tree of tangles, built from the same tangle sweep at a higher agreement
+    value, after the sweep has been continued to a lower agreement value.
+
+    Only the locations which are split by the newly added efficient distinguishers are
+    rebuilt, the node indices of all other locations stay the same.
+
+    Args:
+        tree_of_tangles: The tree of tangles to update.
+        tangle_sweep: The tangle sweep whose efficient distinguishers have been uncrossed.
+        agreement_value: Optional agreement value, defaults to one more than the limit of the sweep.
+        order_cache: Optional OrderCache of the order of the tangle sweep, containing at
+            least the new efficient distinguishers.
+
+    Returns:
+        The updated tree of tangles.
+    """
+    is_le, efficient_distinguishers = _get_efficient_distinguishers(
+        tangle_sweep, agreement_value
+    )
+    efficient_distinguisher_set = set(efficient_distinguishers.tolist())
+    removed = [
+        feature_id
+        for feature_id in tree_of_tangles.feature_ids()
+        if feature_id not in efficient_distinguisher_set
+    ]
+    if len(removed) > 0:
+        raise ValueError(
+            f"The features {removed} of the tree of tangles are not efficient distinguishers "
+            f"of the tangle sweep for agreement value {agreement_value}. The tree of tangles "
+            "can only be updated if its features are kept, please build it again instead."
+        )
+    new_feature_ids = np.array(
+        [
+            feature_id
+            for feature_id in efficient_distinguishers
+            if not tree_of_tangles.feature_tree.contains_edge(feature_id)
+        ],
+        dtype=int,
+    )
+    # the features of the tree of tangles are nested with each other, only the pairs
+    # containing a new feature are checked and cached
+    if order_cache is None:
+        order_cache = OrderCache(is_le, new_feature_ids)
+    crossing_pair = find_crossing_pair_with(
+        new_feature_ids, np.asarray(efficient_distinguishers, dtype=int), is_le
+    )
+    if crossing_pair is not None:
+        _raise_not_uncrossed(crossing_pair)
+    return add_features_to_tree_of_tangles(
+        tree_of_tangles, new_feature_ids, order_cache.is_le
+    )
+
+
+def add_features_to_tree_of_tangles(
+    tree_of_tangles: TreeOfTangles,
+    nested_feature_ids: np.ndarray,
+    is_le: LessOrEqFunc,
+) -> TreeOfTangles:
+    """
+    Adds features, which are nested with each other and with the features of the tree
+    of tangles, to the tree of tangles.
+
+    Every feature is located in the tree by walking towards it from the first location,
+    then the location it lies in is split into two. The location on the positive side of
+    the feature keeps its node index, the location on the negative side is appended.
+
+    Args:
+        tree_of_tangles: The tree of tangles to add the features to. It is not modified.
+        nested_feature_ids: The ids of the new features.
+        is_le: The order function of the features.
+
+    Returns:
+        A tree of tangles containing the features of both.
+    """
+    feature_tree = tree_of_tangles.feature_tree
+    edges = list(feature_tree.feature_ids())
+    location_features = [
+        list(location.features) for location in feature_tree.locations()
+    ]
+    locations_of_edge = {
+        feature_id: (
+            feature_tree.get_node_idx_of_location_containing((feature_id, 1)),
+            feature_tree.get_node_idx_of_location_containing((feature_id, -1)),
+        )
+        for feature_id in edges
+    }
+    changed_locations = set()
+
+    for feature_id in nested_feature_ids:
+        if len(location_features) == 0:
+            location_features = [[(feature_id, 1)], [(feature_id, -1)]]
+            locations_of_edge[feature_id] = (0, 1)
+            changed_locations.update([0, 1])
+            edges.append(feature_id)
+            continue
+        node_idx = _walk_to_location_of(
+            feature_id, location_features, locations_of_edge, is_le
+        )
+        positive_side, negative_side = [], []
+        for feature in location_features[node_idx]:
+            if _side_of(feature[0], feature_id, is_le) == 1:
+                positive_side.append(feature)
+            else:
+                negative_side.append(feature)
+        new_node_idx = len(location_features)
+        location_features[node_idx] = positive_side + [(feature_id, 1)]
+        location_features.append(negative_side + [(feature_id, -1)])
+        for moved_id, moved_specification in negative_side:
+            endpoints = locations_of_edge[moved_id]
+            locations_of_edge[moved_id] = (
+                (new_node_idx, endpoints[1])
+                if moved_specification == 1
+                else (endpoints[0], new_node_idx)
+            )
+        locations_of_edge[feature_id] = (node_idx, new_node_idx)
+        changed_locations.update([node_idx, new_node_idx])
+        edges.append(feature_id)
+
+    locations = [
+        (
+            Location(features=features, node_idx=node_idx)
+            if node_idx in changed_locations
+            else feature_tree.get_location(node_idx)
+        )
+        for node_idx, features in enumerate(location_features)
+    ]
+    return TreeOfTangles(
+        feature_tree=FeatureTree(
+            _edges=edges,
+            _locations=locations,
+            _locations_of_edge={
+                feature_id: (locations[positive], locations[negative])
+                for feature_id, (positive, negative) in locations_of_edge.items()
+            },
+        )
+    )
+
+
+def _walk_to_location_of(
+    feature_id: FeatureId,
+    location_features: list[list[Feature]],
+    locations_of_edge: dict[FeatureId, tuple[int, int]],
+    is_le: LessOrEqFunc,
+) -> int:
+    # the features of a location point towards it, the walk follows the unique
+    # feature of the current location which points away from the new feature
+    node_idx = 0
+    previous_edge = None
+    while True:
+        for edge_id, specification in location_features[node_idx]:
+            if edge_id == previous_edge:
+                continue
+            if _side_of(feature_id, edge_id, is_le) != specification:
+                node_idx = locations_of_edge[edge_id][0 if specification == -1 else 1]
+                previous_edge = edge_id
+                break
+        else:
+            return node_idx
+
+
+def _side_of(
+    feature_id: FeatureId, edge_id: FeatureId, is_le: LessOrEqFunc
+) -> Specification:
+    """Returns the side of the edge feature, which the feature lies on."""
+    for side in [1, -1]:
+        if is_le(feature_id, 1, edge_id, side) or is_le(feature_id, -1, edge_id, side):
+            return side
+    raise ValueError(
+        f"The features {feature_id} and {edge_id} are not nested, please uncross them "
+        "before adding them to a tree of tangles."
+    )